@@ -30,7 +30,11 @@ setup(
     version='0.3.5',
     packages=['travispy', 'travispy.entities'],
     python_requires='>=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*',
-    install_requires=['requests'],
+    install_requires=['requests', 'futures; python_version < "3"'],
+    extras_require={
+        'msgpack': ['msgpack'],
+        'zstd': ['zstandard'],
+    },
 
     # metadata for upload to PyPI
     author='Fabio Menegazzo',
@@ -22,5 +22,40 @@ For full documentation please refer to |travisci| `official API`_ documentation.
     :target: https://coveralls.io/r/menegazzo/travispy
     :alt: Coveralls
 '''
-from .entities import *
-from .travispy import TravisPy
+import importlib
+import sys
+
+from . import entities
+
+
+# Public names and the modules where they are defined. Modules are only imported when their names
+# are first accessed, so "import travispy" stays cheap.
+_MODULES = dict(
+    [(name, '.entities') for name in entities.__all__] + [
+        ('TravisPy', '.travispy'),
+    ]
+)
+
+__all__ = sorted(_MODULES)
+
+
+def _import(name):
+    return getattr(importlib.import_module(_MODULES[name], __name__), name)
+
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        if name not in _MODULES:
+            raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+        value = globals()[name] = _import(name)
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
+
+else:
+    # Module level __getattr__ is not supported (PEP 562): importing everything eagerly.
+    for _name in _MODULES:
+        globals()[_name] = _import(_name)
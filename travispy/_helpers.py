@@ -1,4 +1,5 @@
 from .errors import TravisError
+from .instrumentation import get_record, timer
 import textwrap
 
 
@@ -15,6 +16,7 @@ def get_response_contents(response):
     :raises TravisError: when return code is different than 200 or an unexpected error happens.
     '''
     status_code = response.status_code
+    start = timer()
     try:
         contents = response.json()
     except:
@@ -33,8 +35,96 @@ def get_response_contents(response):
         }
         raise TravisError(contents)
 
+    record = get_record(response)
+    if record is not None:
+        record.add_timing('decode', timer() - start)
+
     if status_code == 200:
         return contents
     else:
         contents['status_code'] = status_code
         raise TravisError(contents)
+
+
+class LineSplitter(object):
+    '''
+    Joins contents split anywhere into blocks of complete lines, keeping the last incomplete line
+    until the next chunk arrives.
+    '''
+
+    def __init__(self):
+        self._pending = b''
+
+    def feed(self, chunk):
+        '''
+        :param bytes chunk:
+            Next part of contents.
+
+        :rtype: bytes
+        :returns:
+            Complete lines, each one ending with ``\\n``. Empty when ``chunk`` ends no line.
+        '''
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            self._pending += chunk
+            return b''
+        block, self._pending = self._pending + chunk[:end], chunk[end:]
+        return block
+
+    def close(self):
+        '''
+        :rtype: bytes
+        :returns:
+            Last line, when contents do not end with ``\\n``.
+        '''
+        pending, self._pending = self._pending, b''
+        return pending
+
+
+def iter_blocks(chunks):
+    '''
+    :param iterable(bytes) chunks:
+        Contents split anywhere, such as the ones from ``response.iter_content()``.
+
+    :rtype: iterable(bytes)
+    :returns:
+        Blocks of complete lines (see :class:`LineSplitter`). The last block does not end with
+        ``\\n`` when contents do not.
+    '''
+    splitter = LineSplitter()
+    for chunk in chunks:
+        block = splitter.feed(chunk)
+        if block:
+            yield block
+    block = splitter.close()
+    if block:
+        yield block
+
+
+def split_lines(block):
+    '''
+    :param bytes block:
+        Block returned by :func:`iter_blocks`.
+
+    :rtype: list(bytes)
+    :returns:
+        Lines without line endings (``\\n``).
+    '''
+    lines = block.split(b'\n')
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def iter_lines(chunks):
+    '''
+    :param iterable(bytes) chunks:
+        Contents split anywhere, such as the ones from ``response.iter_content()``.
+
+    :rtype: iterable(bytes)
+    :returns:
+        Lines without line endings (``\\n``).
+    '''
+    for block in iter_blocks(chunks):
+        for line in split_lines(block):
+            yield line
@@ -0,0 +1,143 @@
+'''
+Incremental parsing of JSON objects received in chunks.
+
+Only the top level object is parsed incrementally: arrays found directly in it are decoded one
+element at a time, so huge lists never have to be held (neither as text nor as decoded values)
+before being used.
+'''
+import codecs
+import json
+
+
+_WHITESPACE = ' \t\n\r'
+
+# Compact buffer once this many characters were consumed.
+_COMPACT_SIZE = 64 * 1024
+
+
+class _Buffer(object):
+    '''
+    Text received so far, with a position on it.
+
+    :param iterable(bytes) chunks:
+        Encoded JSON document.
+    '''
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._eof = False
+        self.text = ''
+        self.position = 0
+
+    def fill(self):
+        '''
+        Reads the next chunk.
+
+        :raises ValueError: when document ends unexpectedly.
+        '''
+        if self._eof:
+            raise ValueError('Unexpected end of JSON document')
+
+        if self.position >= _COMPACT_SIZE:
+            self.text = self.text[self.position:]
+            self.position = 0
+
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            chunk = b''
+        self.text += self._decoder.decode(chunk, final=self._eof)
+
+    def peek(self):
+        '''
+        :rtype: str
+        :returns:
+            Next character that is not a whitespace. It is not consumed.
+        '''
+        while True:
+            text = self.text
+            position = self.position
+            while position < len(text) and text[position] in _WHITESPACE:
+                position += 1
+            self.position = position
+            if position < len(text):
+                return text[position]
+            self.fill()
+
+    def expect(self, characters):
+        '''
+        Consumes next character that is not a whitespace.
+
+        :rtype: str
+        :returns:
+            The consumed character.
+
+        :raises ValueError: when it is not one of ``characters``.
+        '''
+        character = self.peek()
+        if character not in characters:
+            raise ValueError('Expecting one of %r at %d' % (characters, self.position))
+        self.position += 1
+        return character
+
+    def value(self, decoder=json.JSONDecoder()):
+        '''
+        Consumes next JSON value, reading chunks until it is complete.
+        '''
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.position)
+            except ValueError:
+                # Incomplete value (or invalid document, detected at its end).
+                self.fill()
+                continue
+
+            # Numbers and literals may continue in the next chunk.
+            if end == len(self.text) and not self._eof:
+                self.fill()
+                continue
+
+            self.position = end
+            return value
+
+
+def iter_object(chunks):
+    '''
+    Parses a JSON object as its contents arrive.
+
+    :param iterable(bytes) chunks:
+        UTF-8 encoded JSON object, such as ``response.iter_content(chunk_size)``.
+
+    :rtype: iterable(tuple(str, object, bool))
+    :returns:
+        Tuples ``(key, value, element)`` following document order. For arrays, one tuple is
+        generated per element with ``element`` set to ``True`` (empty arrays generate nothing).
+        Other values generate a single tuple with ``element`` set to ``False``.
+
+    :raises ValueError: when document is not a valid JSON object.
+    '''
+    buffer = _Buffer(chunks)
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+
+    while True:
+        key = buffer.value()
+        buffer.expect(':')
+        if buffer.peek() == '[':
+            buffer.expect('[')
+            if buffer.peek() == ']':
+                buffer.expect(']')
+            else:
+                while True:
+                    yield key, buffer.value(), True
+                    if buffer.expect(',]') == ']':
+                        break
+        else:
+            yield key, buffer.value(), False
+
+        if buffer.expect(',}') == '}':
+            return
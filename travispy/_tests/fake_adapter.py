@@ -0,0 +1,92 @@
+from datetime import timedelta
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+import io
+import json
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:  # Python 2
+    from urlparse import urlsplit
+
+
+class FakeAdapter(BaseAdapter):
+    '''
+    Transport adapter that answers requests with registered contents instead of reaching the
+    network.
+
+    Routes are registered through :meth:`add` and matched against request method and path.
+    '''
+
+    def __init__(self):
+        BaseAdapter.__init__(self)
+        self.routes = {}
+        self.requests = []
+        self.timeouts = []
+
+    def add(self, method, path, body=None, status_code=200, headers=None):
+        '''
+        :param body:
+            Response body. ``dict`` and ``list`` are encoded as JSON. A callable receives the
+            request and must return a tuple ``(status_code, body, headers)``.
+        '''
+        self.routes[(method, path)] = (status_code, body, headers or {})
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests.append(request)
+        self.timeouts.append(timeout)
+        path = urlsplit(request.url).path
+        status_code, body, headers = self.routes.get(
+            (request.method, path),
+            (404, {'error': 'not found'}, {}),
+        )
+        if callable(body):
+            status_code, body, headers = body(request)
+
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+        if not isinstance(body, bytes):
+            body = (body or '').encode('utf-8')
+
+        response = Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(0)
+        if not stream:
+            response._content = body
+        return response
+
+    def close(self):
+        pass
+
+
+def fake_session(uri='https://api.travis-ci.org'):
+    '''
+    :rtype: tuple(:class:`.Session`, :class:`FakeAdapter`)
+    '''
+    from travispy.entities import Session
+
+    session = Session(uri)
+    adapter = FakeAdapter()
+    session.mount(uri, adapter)
+    return session, adapter
+
+
+def fake_travis(**kwargs):
+    '''
+    :param kwargs:
+        Arguments passed to :class:`.TravisPy`.
+
+    :rtype: tuple(:class:`.TravisPy`, :class:`FakeAdapter`)
+    '''
+    from travispy import TravisPy
+    from travispy.entities import TransportPool
+
+    pool = TransportPool()
+    pool.adapter = adapter = FakeAdapter()
+    return TravisPy(transport=pool, **kwargs), adapter
@@ -0,0 +1,60 @@
+from travispy.entities import Branch, Job
+from travispy.entities._entity import _split_ids
+from travispy._tests.fake_adapter import fake_session
+
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:  # Python 2
+    from urlparse import parse_qs, urlsplit
+
+
+def jobs(request):
+    '''
+    Fake adapter handler answering requested jobs in reverse order, with their commits sideloaded.
+    '''
+    assert len(request.url) <= 200
+    ids = [int(i) for i in parse_qs(urlsplit(request.url).query)['ids']]
+    ids.reverse()
+    return 200, {
+        'jobs': [{'id': i, 'commit_id': i * 10} for i in ids],
+        'commits': [{'id': i * 10} for i in ids],
+    }, {}
+
+
+def test_split_ids():
+    url = 'https://api.travis-ci.org/jobs'
+    assert _split_ids(url, {'state': 'passed'}, 100) is None
+    assert _split_ids(url, {'ids': [1, 2, 3]}, 100) is None
+
+    chunks = _split_ids(url, {'ids': list(range(100))}, 100)
+    assert [i for chunk in chunks for i in chunk] == list(range(100))
+    assert len(chunks) > 1
+    assert all(len(url) + len('?ids=') + len('&ids='.join(map(str, chunk))) <= 100
+               for chunk in chunks)
+
+    # A single id always goes in a chunk, even if it does not fit.
+    assert _split_ids(url, {'ids': [1, 2]}, 10) == [[1], [2]]
+
+
+def test_find_many_chunked(monkeypatch):
+    monkeypatch.setattr(Job, 'MAX_URL_LENGTH', 200)
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs', jobs)
+
+    ids = list(range(1, 101))
+    result = Job.find_many(session, ids=ids)
+    assert [job.id for job in result] == ids
+    assert [job.commit.id for job in result] == [i * 10 for i in ids]
+    assert len(adapter.requests) > 1
+
+
+def test_lazy_jobs_chunked(monkeypatch):
+    monkeypatch.setattr(Job, 'MAX_URL_LENGTH', 200)
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs', jobs)
+
+    branch = Branch(session)
+    branch.job_ids = list(range(50, 0, -1))
+    with session.deadline(10.0):
+        assert [job.id for job in branch.jobs] == branch.job_ids
+    assert len(adapter.requests) > 1
@@ -0,0 +1,166 @@
+from travispy import TravisPy
+from travispy.concurrency import AdaptiveLimiter, FanOut, bulk_map
+from travispy.entities import Build
+from travispy.instrumentation import timer
+from travispy._tests.fake_adapter import FakeAdapter
+import pytest
+import threading
+import time
+
+
+def test_aimd():
+    limiter = AdaptiveLimiter(initial=2, minimum=1, maximum=4)
+
+    limiter.record(0.1, 200)
+    limiter.record(0.1, 200)
+    assert limiter.limit == 2
+    limiter.record(0.1, 200)
+    assert limiter.limit == 3
+
+    limiter.record(0.1, 503)
+    assert limiter.limit == 1
+    limiter.record(0.1, 429)
+    assert limiter.limit == 1
+
+    for _ in range(100):
+        limiter.record(0.1, 200)
+    assert limiter.limit == 4
+
+    # Latency spike, of a request started after the last decrease.
+    limiter.record(1.0, 200, started=timer())
+    assert limiter.limit == 2
+
+    limiter.record(0.1, None, error=IOError(), started=timer())
+    assert limiter.limit == 1
+
+
+def test_decrease_once_per_window():
+    limiter = AdaptiveLimiter(initial=32)
+    started = timer()
+    # Requests sent together, all failing.
+    for _ in range(8):
+        limiter.record(0.1, 503, started=started)
+    assert limiter.limit == 16
+
+    limiter.record(0.1, 503, started=timer())
+    assert limiter.limit == 8
+
+
+def test_latency_per_endpoint():
+    limiter = AdaptiveLimiter(initial=32)
+    for _ in range(10):
+        limiter.record(0.05, 200, endpoint='/builds/{id}')
+    limiter.record(0.4, 200, endpoint='/builds')
+    assert limiter.limit == 32
+    limiter.record(0.4, 200, endpoint='/builds/{id}')
+    assert limiter.limit == 16
+
+
+def test_bulk_map_respects_limit():
+    limiter = AdaptiveLimiter(initial=3, maximum=3)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def function(item):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return item * 2
+
+    assert bulk_map(function, range(20), limiter) == [item * 2 for item in range(20)]
+    assert peak[0] <= 3
+    assert limiter.in_flight == 0
+
+
+def test_bulk_map_errors():
+    limiter = AdaptiveLimiter()
+
+    def function(item):
+        if item == 2:
+            raise ValueError(item)
+        return item
+
+    with pytest.raises(ValueError):
+        bulk_map(function, range(5), limiter)
+    assert limiter.in_flight == 0
+
+
+def test_cancel_many():
+    adapter = FakeAdapter()
+    travis = TravisPy()
+    travis._session.mount(travis._session.uri, adapter)
+    builds = []
+    for build_id in range(1, 6):
+        status_code = 409 if build_id == 3 else 204
+        adapter.add('POST', '/builds/%d/cancel' % build_id, status_code=status_code)
+        build = Build(travis._session)
+        build.id = build_id
+        builds.append(build)
+
+    assert travis.cancel_many(builds) == [True, True, False, True, True]
+    assert travis.stats()['gauges']['concurrency_limit'] >= 4
+
+
+def test_shared_instrumentation():
+    shared = TravisPy()
+    instances = [TravisPy(instrumentation=shared.instrumentation) for _ in range(3)]
+    assert shared.instrumentation.after_request == []
+    assert shared.stats()['gauges']['concurrency_limit'] == shared._session.concurrency.limit
+
+    adapter = FakeAdapter()
+    adapter.add('GET', '/builds/1', status_code=503)
+    session = instances[0]._session
+    session.mount(session.uri, adapter)
+    limiter = session.concurrency
+    limit = limiter.limit
+    assert session.get(session.uri + '/builds/1', idempotent=False).status_code == 503
+    assert limiter.limit < limit
+    assert [i._session.concurrency.limit for i in instances[1:]] == [limit, limit]
+    assert shared._session.concurrency.limit == limit
+
+
+def test_fan_out():
+    fan_out = FanOut(maxsize=2)
+
+    def producer(item):
+        for i in range(item):
+            if not fan_out.put((item, i)):
+                return
+
+    results = list(fan_out.run(producer, [3, 0, 5], max_workers=2))
+    assert sorted(results) == [(3, 0), (3, 1), (3, 2)] + [(5, i) for i in range(5)]
+    assert [i for item, i in results if item == 5] == list(range(5))
+    assert fan_out.stopped.is_set()
+
+
+def test_fan_out_errors():
+    fan_out = FanOut()
+
+    def producer(item):
+        if item == 2:
+            raise ValueError(item)
+        fan_out.put(item)
+
+    with pytest.raises(ValueError):
+        list(fan_out.run(producer, [1, 2, 3], max_workers=1))
+
+
+def test_fan_out_stop():
+    fan_out = FanOut(maxsize=1)
+    produced = []
+
+    def producer(item):
+        while fan_out.put(item):
+            produced.append(item)
+
+    results = fan_out.run(producer, [1, 2], max_workers=2)
+    assert next(results) in (1, 2)
+    results.close()
+    assert fan_out.stopped.is_set()
+    count = len(produced)
+    time.sleep(0.2)
+    assert len(produced) == count
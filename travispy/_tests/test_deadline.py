@@ -0,0 +1,89 @@
+from travispy.entities import Build
+from travispy.errors import DeadlineExceeded, TravisError
+from travispy.retry import RetryPolicy
+from travispy._tests.fake_adapter import fake_session, fake_travis
+import pytest
+import threading
+
+
+def test_default_timeout():
+    session, adapter = fake_session()
+    adapter.add('GET', '/builds/1', {'build': {'id': 1}})
+
+    Build.find_one(session, 1)
+    session.get(session.uri + '/builds/1', timeout=3)
+    assert adapter.timeouts == [(10.0, 60.0), 3]
+
+    session.timeout = None
+    session.get(session.uri + '/builds/1')
+    assert adapter.timeouts[-1] is None
+
+
+def test_travispy_timeout():
+    travis, adapter = fake_travis(timeout=(1, 2))
+    adapter.add('GET', '/builds/1', {'build': {'id': 1}})
+
+    travis.build(1)
+    assert adapter.timeouts == [(1, 2)]
+
+
+def test_deadline_reduces_timeout():
+    session, adapter = fake_session()
+    adapter.add('GET', '/builds/1', {'build': {'id': 1}})
+
+    with session.deadline(5.0):
+        assert 0 < session.remaining() <= 5.0
+        Build.find_one(session, 1)
+        with session.deadline(30.0):
+            assert session.remaining() <= 5.0
+    assert session.remaining() is None
+
+    connect, read = adapter.timeouts[0]
+    assert 4.0 < connect <= 5.0
+    assert connect == read
+
+
+def test_deadline_exceeded():
+    session, adapter = fake_session()
+    adapter.add('GET', '/builds/1', {'build': {'id': 1}})
+
+    with session.deadline(0):
+        with pytest.raises(DeadlineExceeded) as info:
+            Build.find_one(session, 1)
+    assert isinstance(info.value, TravisError)
+    assert str(info.value) == '[408] Deadline of 0s exceeded'
+    assert adapter.requests == []
+
+
+def test_deadline_bounds_retries():
+    session, adapter = fake_session()
+    session.retry = policy = RetryPolicy()
+    policy.delays = []
+    policy.sleep = policy.delays.append
+    adapter.add('GET', '/builds/1', {'error': 'unavailable'}, status_code=503,
+                headers={'Retry-After': '60'})
+
+    with session.deadline(5.0):
+        response = session.get(session.uri + '/builds/1')
+    assert response.status_code == 503
+    assert policy.delays == []
+    assert len(adapter.requests) == 1
+
+
+def test_propagate():
+    session, adapter = fake_session()
+    remaining = []
+
+    def target():
+        remaining.append(session.remaining())
+
+    with session.deadline(5.0):
+        thread = threading.Thread(target=session.propagate(target))
+        thread.start()
+        thread.join()
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+    assert 0 < remaining[0] <= 5.0
+    assert remaining[1] is None
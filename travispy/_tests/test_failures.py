@@ -0,0 +1,86 @@
+from travispy.failures import FailureClusterer, failure_region, normalize, shingles
+from travispy._tests.fake_adapter import fake_travis
+import random
+
+
+IMPORT_ERROR = '''\
+E   ImportError: No module named 'foo'
+/home/travis/build/%(owner)s/project/tests/test_%(n)d.py:%(line)d: ImportError
+%(n)d failed, %(passed)d passed in %(seconds).2f seconds
+The command "pytest" exited with 1.'''
+
+SEGFAULT = '''\
+Fatal Python error: Segmentation fault
+Current thread 0x%(thread)x (most recent call first):
+  File "/opt/python/3.6/lib/site-packages/numpy/core.py", line %(line)d in dot
+The command "make test" exited with 139.'''
+
+TIMEOUT = '''\
+No output has been received in the last 10m0s, this potentially indicates a stalled build.
+Your build has been stopped.'''
+
+
+def log(template, seed):
+    generator = random.Random(seed)
+    values = {
+        'owner': generator.choice(['alice', 'bob', 'carol']),
+        'n': generator.randint(1, 50),
+        'line': generator.randint(1, 999),
+        'passed': generator.randint(100, 500),
+        'seconds': generator.random() * 100,
+        'thread': generator.getrandbits(48),
+    }
+    lines = ['travis_fold:start:install\r\x1b[0K']
+    lines += ['Collecting package-%d==%d.0' % (i, generator.randint(1, 9)) for i in range(300)]
+    lines += ['travis_fold:end:install\r\x1b[0K', '\x1b[31;1m' + template % values + '\x1b[0m']
+    lines += ['', 'Done. Your build exited with 1.']
+    return '\n'.join(lines).split('\n')
+
+
+def test_failure_region():
+    assert failure_region(log(TIMEOUT, 1), tail_lines=10) == TIMEOUT.split('\n')
+    assert failure_region(['a', 'b', 'c'], tail_lines=2) == ['b', 'c']
+    assert failure_region([b'\x1b[0K', b'ok\r\x1b[0KError: x', b'next']) == [u'Error: x', u'next']
+
+
+def test_normalize():
+    assert normalize(
+        '2017-01-02T10:11:12Z /home/travis/build/a/b.py:12 0x7f3a commit 1a2b3c4d5e'
+    ) == '<time> <path>:<n> <hex> commit <hex>'
+    assert normalize('Ran 25 tests in 0.131s') == 'Ran <n> tests in <n>s'
+    assert normalize('same: <uuid> deadbeef') == 'same: <uuid> deadbeef'
+
+
+def test_shingles():
+    assert len(shingles(['a b c d'])) == 2
+    assert len(shingles(['a b'])) == 1
+    assert shingles([]) == set()
+
+
+def test_cluster():
+    clusterer = FailureClusterer()
+    templates = [IMPORT_ERROR] * 30 + [SEGFAULT] * 10 + [TIMEOUT] * 3
+    for i, template in enumerate(templates):
+        clusterer.add(i, log(template, i))
+    clusterer.add('unique', ['Something completely different happened here today'])
+
+    clusters = clusterer.clusters()
+    assert [cluster.count for cluster in clusters] == [30, 10, 3, 1]
+    assert clusters[0].keys == list(range(30))
+    assert 'ImportError' in clusters[0].example
+    assert 'Segmentation fault' in clusters[1].example
+    assert clusters[3].keys == ['unique']
+
+
+def test_cluster_failures():
+    travis, adapter = fake_travis()
+    for i in range(12):
+        template = IMPORT_ERROR if i % 3 else SEGFAULT
+        adapter.add('GET', '/jobs/%d/log' % i, '\n'.join(log(template, i)))
+
+    with travis:
+        clusters = travis.cluster_failures(range(12), concurrency=4)
+    assert [(cluster.count, cluster.keys) for cluster in clusters] == [
+        (8, [1, 2, 4, 5, 7, 8, 10, 11]),
+        (4, [0, 3, 6, 9]),
+    ]
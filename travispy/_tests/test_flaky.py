@@ -0,0 +1,198 @@
+from travispy.entities import Job
+from travispy.flaky import Flake, FlakyDetector, job_key
+from travispy.testresults import extract
+from travispy._tests.fake_adapter import fake_travis
+
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:  # Python 2
+    from urlparse import parse_qs, urlsplit
+
+
+PAGE_SIZE = 2
+
+
+class FakeHistory(object):
+    '''
+    Fake adapter handlers serving builds (in pages, newest first) and jobs of a repository.
+    '''
+
+    def __init__(self, adapter):
+        self.adapter = adapter
+        self.builds = []
+        self.jobs = {}
+        self.requested_pages = []
+        adapter.add('GET', '/builds', self.builds_handler)
+        adapter.add('GET', '/jobs', self.jobs_handler)
+
+    def add_build(self, sha, states, failed_tests=()):
+        number = len(self.builds) + 1
+        job_ids = []
+        for position, state in enumerate(states, 1):
+            job_id = number * 100 + position
+            job_ids.append(job_id)
+            self.finish(job_id, '%d.%d' % (number, position), state, failed_tests)
+        self.builds.append({
+            'id': number, 'number': str(number), 'commit_id': number, 'job_ids': job_ids,
+            'sha': sha,
+        })
+
+    def finish(self, job_id, number, state, failed_tests=(), finished_at='2017-01-01T00:00:00Z'):
+        self.jobs[job_id] = {
+            'id': job_id, 'number': number, 'state': state, 'finished_at': finished_at,
+        }
+        log = ''.join('FAILED %s - AssertionError\n' % name for name in failed_tests)
+        self.adapter.add('GET', '/jobs/%d/log' % job_id, log)
+
+    def builds_handler(self, request):
+        query = parse_qs(urlsplit(request.url).query)
+        after = int(query.get('after_number', [len(self.builds) + 1])[0])
+        self.requested_pages.append(after)
+        page = [build for build in reversed(self.builds) if int(build['number']) < after]
+        page = page[:PAGE_SIZE]
+        return 200, {
+            'builds': [dict((k, v) for k, v in build.items() if k != 'sha') for build in page],
+            'commits': [{'id': build['commit_id'], 'sha': build['sha']} for build in page],
+        }, {}
+
+    def jobs_handler(self, request):
+        ids = [int(i) for i in parse_qs(urlsplit(request.url).query)['ids']]
+        return 200, {'jobs': [self.jobs[i] for i in ids]}, {}
+
+
+def make_travis():
+    travis, adapter = fake_travis()
+    return travis, FakeHistory(adapter)
+
+
+def test_iter_builds():
+    travis, history = make_travis()
+    for i in range(5):
+        history.add_build('sha%d' % i, ['passed'])
+
+    builds = list(travis.iter_builds(slug='owner/repo'))
+    assert [build.number for build in builds] == ['5', '4', '3', '2', '1']
+    assert [build.commit.sha for build in builds] == ['sha4', 'sha3', 'sha2', 'sha1', 'sha0']
+    assert history.requested_pages == [6, 4, 2, 1]
+    travis.close()
+
+
+def test_add():
+    detector = FlakyDetector(window=2)
+    assert detector.add('a', '1', 'run1', False, ['test_x', 'test_y'])
+    assert not detector.add('a', '1', 'run1', False, ['test_x'])
+    assert detector.add('a', '1', 'run2', True)
+    assert detector.add('a', '2', 'run3', False)
+    assert detector.flakes() == [
+        Flake('1', None, 1, 1, 1.0),
+        Flake('1', 'test_x', 1, 1, 1.0),
+        Flake('1', 'test_y', 1, 1, 1.0),
+    ]
+
+    # Oldest commit leaves the window.
+    detector.add('b', '1', 'run4', True)
+    detector.add('c', '1', 'run5', True)
+    assert len(detector) == 2
+    assert detector.flakes() == []
+
+
+def test_scores():
+    detector = FlakyDetector()
+    for i in range(4):
+        sha = 'sha%d' % i
+        detector.add(sha, '1', 'a%d' % i, False, ['test_flaky', 'test_broken'])
+        detector.add(sha, '1', 'b%d' % i, i % 2 == 0, None if i % 2 == 0 else ['test_broken'])
+    flakes = detector.flakes()
+    assert flakes == [
+        Flake('1', 'test_flaky', 4, 4, 1.0),
+        Flake('1', None, 2, 4, 0.5),
+        Flake('1', 'test_broken', 2, 4, 0.5),
+    ]
+    assert detector.flakes(min_score=0.6) == flakes[:1]
+
+
+def test_update(tmpdir):
+    travis, history = make_travis()
+    history.add_build('same', ['passed', 'failed'], ['tests/test_a.py::test_net'])
+    history.add_build('same', ['passed', 'passed'])
+    history.add_build('other', ['failed', 'passed'], ['tests/test_a.py::test_broken'])
+
+    detector = FlakyDetector(rescan=1)
+    assert detector.update(travis, 'owner/repo') == 6
+    assert detector.checkpoints == {'owner/repo': 3}
+    assert detector.flakes() == [
+        Flake('2', 'tests/test_a.py::test_net', 1, 1, 1.0),
+        Flake('2', None, 1, 2, 0.5),
+    ]
+
+    path = str(tmpdir.join('flaky.json'))
+    detector.save(path)
+    detector = FlakyDetector.load(path)
+
+    # Restart of job 301 (build 3, within rescan), and a new build: older builds are not fetched.
+    history.finish(301, '3.1', 'passed', finished_at='2017-01-02T00:00:00Z')
+    history.add_build('new', ['passed', 'passed'])
+    del history.requested_pages[:]
+    assert detector.update(travis, 'owner/repo') == 3
+    assert history.requested_pages == [5, 3]
+    assert detector.checkpoints == {'owner/repo': 4}
+    assert Flake('1', None, 1, 3, 1 / 3.0) in detector.flakes()
+    assert Flake('1', 'tests/test_a.py::test_broken', 1, 1, 1.0) in detector.flakes()
+
+    assert detector.update(travis, 'owner/repo') == 0
+    travis.close()
+
+
+def test_no_test_results():
+    errored = Job(None)
+    errored.id, errored.number, errored.state = 1, '1.1', 'errored'
+    failed = Job(None)
+    failed.id, failed.number, failed.state = 2, '2.1', 'failed'
+
+    detector = FlakyDetector()
+    # An install error: no tests ran, so nothing is known about test_x.
+    assert detector.needs_log(errored, 'sha')
+    assert detector.add_job(errored, 'sha', [])
+    # Its log was read already.
+    assert not detector.needs_log(errored, 'sha')
+    results = extract([b'FAILED tests/test_a.py::test_x - AssertionError\n'])
+    assert detector.add_job(failed, 'sha', results)
+    assert detector.flakes() == []
+
+
+def test_unnamed_failures():
+    named = Job(None)
+    named.id, named.number, named.state = 1, '1.1', 'failed'
+    quiet = Job(None)
+    quiet.id, quiet.number, quiet.state = 2, '2.1', 'failed'
+
+    detector = FlakyDetector()
+    detector.add_job(named, 'sha', extract([b'FAILED tests/test_a.py::test_x - AssertionError\n']))
+    # Quiet pytest output: one test failed, but which one is unknown.
+    detector.add_job(quiet, 'sha', extract([b'F..\n==== 1 failed, 2 passed in 0.10s ====\n']))
+    assert not detector.needs_log(quiet, 'sha')
+    assert detector.flakes() == []
+
+
+def test_job_key():
+    job = Job(None)
+    job.number = '123.4'
+    assert job_key(job) == '4'
+
+
+def test_load_missing(tmpdir):
+    detector = FlakyDetector.load(str(tmpdir.join('missing.json')))
+    assert len(detector) == 0
+    assert detector.checkpoints == {}
+
+
+def test_update_reads_logs_once():
+    travis, history = make_travis()
+    history.add_build('sha', ['errored'])
+    detector = FlakyDetector()
+    assert detector.update(travis, 'owner/repo') == 1
+    assert detector.update(travis, 'owner/repo') == 0
+
+    logs = [r for r in history.adapter.requests if r.path_url.endswith('/log')]
+    assert len(logs) == 1
+    travis.close()
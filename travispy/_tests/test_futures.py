@@ -0,0 +1,72 @@
+from travispy.errors import TravisError
+from travispy._tests.fake_adapter import fake_travis
+from concurrent.futures import Future
+import pytest
+import threading
+
+
+@pytest.fixture
+def travis():
+    travis, adapter = fake_travis(max_workers=4)
+    for i in range(1, 6):
+        adapter.add('GET', '/builds/%d' % i, {'build': {'id': i}})
+        adapter.add('GET', '/jobs/%d' % i, {'job': {'id': i, 'duration': 10}})
+        adapter.add('GET', '/logs/%d' % i, {'log': {'id': i, 'type': 'Log'}})
+        adapter.add('GET', '/repos/%d' % i, {'repo': {'id': i}})
+    with travis:
+        yield travis
+
+
+def test_map(travis):
+    builds = travis.map(travis.build, [3, 1, 2])
+    assert [build.id for build in builds] == [3, 1, 2]
+
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def function(item):
+        with lock:
+            running.append(item)
+            peak.append(len(running))
+        travis.build(item)
+        with lock:
+            running.remove(item)
+        return item * 2
+
+    assert travis.map(function, range(1, 6), max_workers=2) == [2, 4, 6, 8, 10]
+    assert max(peak) <= 2
+
+    with pytest.raises(TravisError):
+        travis.map(travis.build, [1, 404])
+
+
+def test_submit(travis):
+    futures = [
+        travis.submit_build(1),
+        travis.submit_job(2),
+        travis.submit_log(3),
+        travis.submit_repo(4),
+    ]
+    assert all(isinstance(future, Future) for future in futures)
+    build, job, log, repo = [future.result() for future in futures]
+    assert (build.id, job.id, log.id, repo.id) == (1, 2, 3, 4)
+    assert travis.stats()['endpoints']['GET /builds/{id}']['count'] == 1
+
+    with pytest.raises(TravisError):
+        travis.submit_build(404).result()
+
+
+def test_submit_propagates_deadline(travis):
+    with travis.deadline(5.0):
+        remaining = travis.submit(travis._session.remaining).result()
+    assert 0 < remaining <= 5.0
+    assert travis.submit(travis._session.remaining).result() is None
+
+
+def test_close(travis):
+    executor = travis.executor
+    assert travis.executor is executor
+    travis.close()
+    assert travis._executor is None
+    assert travis.submit_build(1).result().id == 1
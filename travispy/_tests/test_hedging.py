@@ -0,0 +1,109 @@
+from travispy.entities import Build
+from travispy.hedging import HedgePolicy
+from travispy.retry import RetryBudget
+from travispy._tests.fake_adapter import fake_session
+import threading
+import time
+
+
+def slow_first(release):
+    '''
+    :returns:
+        A fake adapter handler whose second request blocks until ``release`` is set.
+    '''
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 2:
+            release.wait(5)
+        return 200, {'build': {'id': len(calls)}}, {}
+    return handler
+
+
+def test_hedge():
+    session, adapter = fake_session()
+    session.hedge = hedge = HedgePolicy(min_samples=1)
+    release = threading.Event()
+    adapter.add('GET', '/builds/1', slow_first(release))
+
+    try:
+        assert Build.find_one(session, 1).id == 1  # Warms up latency samples.
+        assert Build.find_one(session, 1).id == 3  # Hedge answers first.
+    finally:
+        release.set()
+        hedge.close()
+
+    assert len(adapter.requests) == 3
+    assert session.instrumentation.counters()['hedges'] == 1
+    assert session.instrumentation.stats()['endpoints']['GET /builds/{id}']['count'] == 3
+
+
+def test_hedge_budget():
+    session, adapter = fake_session()
+    session.hedge = hedge = HedgePolicy(min_samples=1, budget=RetryBudget(ratio=0, min_retries=0))
+    release = threading.Event()
+    adapter.add('GET', '/builds/1', slow_first(release))
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    try:
+        Build.find_one(session, 1)
+        assert Build.find_one(session, 1).id == 2
+    finally:
+        timer.cancel()
+        release.set()
+        hedge.close()
+
+    assert len(adapter.requests) == 2
+    assert 'hedges' not in session.instrumentation.counters()
+
+
+def test_no_hedge_without_samples():
+    session, adapter = fake_session()
+    session.hedge = HedgePolicy()
+    adapter.add('GET', '/builds/1', {'build': {'id': 1}})
+
+    Build.find_one(session, 1)
+    session.post(session.uri + '/builds/1')
+    assert session.hedge._executor is None
+
+
+def test_primary_not_queued():
+    session, adapter = fake_session()
+    session.hedge = hedge = HedgePolicy(min_samples=1, max_workers=1)
+    adapter.add('GET', '/builds/1', {'build': {'id': 1}})
+    busy = threading.Event()
+    blocker = hedge.executor().submit(busy.wait, 5)
+
+    try:
+        Build.find_one(session, 1)
+        start = time.time()
+        # Sent although the executor is busy, and answered before the blocker is done.
+        assert Build.find_one(session, 1).id == 1
+        assert time.time() - start < 1
+        assert not blocker.done()
+    finally:
+        busy.set()
+        hedge.close()
+
+
+def test_no_hedge_when_busy():
+    session, adapter = fake_session()
+    session.hedge = hedge = HedgePolicy(min_samples=1, max_workers=1)
+    release = threading.Event()
+    adapter.add('GET', '/builds/1', slow_first(release))
+    hedge._hedging = 1  # All hedge workers are sending hedges.
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    try:
+        Build.find_one(session, 1)
+        assert Build.find_one(session, 1).id == 2
+    finally:
+        timer.cancel()
+        release.set()
+        hedge.close()
+
+    assert len(adapter.requests) == 2
+    assert 'hedges' not in session.instrumentation.counters()
@@ -0,0 +1,78 @@
+import subprocess
+import sys
+import pytest
+
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (3, 7),
+    reason='lazy attribute loading requires module level __getattr__ (PEP 562)',
+)
+
+
+def import_times(statement):
+    '''
+    :param str statement:
+        Python statement executed in a fresh interpreter.
+
+    :rtype: dict(str, int)
+    :returns:
+        Cumulative import time, in microseconds, of every module imported by ``statement`` as
+        reported by ``python -X importtime``.
+    '''
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stderr=subprocess.STDOUT,
+    ).decode('utf-8')
+
+    result = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        result[module.strip()] = int(cumulative)
+    return result
+
+
+def imported_modules(statement):
+    '''
+    :param str statement:
+        Python statement executed in a fresh interpreter.
+
+    :rtype: set(str)
+    :returns:
+        Names of all modules imported by ``statement``.
+    '''
+    output = subprocess.check_output(
+        [sys.executable, '-c', statement + '; import sys; print("\\n".join(sys.modules))'],
+    ).decode('utf-8')
+    return set(output.split())
+
+
+def test_import_time():
+    times = import_times('import travispy')
+    assert 'travispy' in times
+    assert 'requests' not in times
+    assert 'travispy.entities.session' not in times
+
+    print('\n"import travispy" took %.1f ms' % (times['travispy'] / 1000.0))
+
+
+@pytest.mark.parametrize('statement, expected', [
+    ('from travispy import Build', ['travispy.entities.build']),
+    ('from travispy.entities import COMMAND_TO_ENTITY', ['travispy.entities.setting']),
+    ('from travispy import TravisPy', ['travispy.travispy', 'requests']),
+])
+def test_lazy_attributes(statement, expected):
+    modules = imported_modules(statement)
+    for module in expected:
+        assert module in modules
+    if 'requests' not in expected:
+        assert 'requests' not in modules
+
+
+def test_dir():
+    import travispy
+    assert 'TravisPy' in dir(travispy)
+    assert 'Build' in travispy.__all__
+    with pytest.raises(AttributeError):
+        travispy.Unknown
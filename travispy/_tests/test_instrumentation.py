@@ -0,0 +1,61 @@
+from travispy.entities import Build
+from travispy.instrumentation import Histogram, endpoint_template
+from travispy._tests.fake_adapter import fake_session
+import pytest
+
+
+@pytest.mark.parametrize(
+    'url, expected', [
+        ('https://api.travis-ci.org/builds/123', '/builds/{id}'),
+        ('https://api.travis-ci.org/builds?ids=1', '/builds'),
+        ('https://api.travis-ci.org/jobs/-1/log', '/jobs/{id}/log'),
+        ('https://api.travis-ci.org/repos/owner/name', '/repos/{slug}'),
+        (
+            'https://api.travis-ci.org/repos/owner/name/branches/master',
+            '/repos/{slug}/branches/{name}',
+        ),
+        ('https://api.travis-ci.org/repos/12/branches/master', '/repos/{id}/branches/{name}'),
+    ],
+)
+def test_endpoint_template(url, expected):
+    assert endpoint_template('https://api.travis-ci.org', url) == expected
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, 2), window=3)
+    for value in [0.5, 1.5, 3, 4]:
+        histogram.add(value)
+
+    assert histogram.count == 4
+    assert histogram.cumulative() == [(1, 1), (2, 2), (float('inf'), 4)]
+    assert histogram.quantile(0) == 1.5
+    assert histogram.quantile(1) == 4
+    assert histogram.summary()['max'] == 4
+
+
+def test_session_instrumentation():
+    session, adapter = fake_session()
+    adapter.add('GET', '/builds/1', {'build': {'id': 1, 'number': '1'}, 'commit': {'id': 2}})
+
+    events = []
+    instrumentation = session.instrumentation
+    instrumentation.before_request.append(lambda record: events.append(('before', record)))
+    instrumentation.after_request.append(lambda record: events.append(('after', record)))
+    instrumentation.after_load.append(lambda record: events.append(('load', record)))
+
+    build = Build.find_one(session, 1)
+    assert build.commit.id == 2
+
+    assert [event for event, _ in events] == ['before', 'after', 'load']
+    record = events[-1][1]
+    assert record.method == 'GET'
+    assert record.endpoint == '/builds/{id}'
+    assert record.status_code == 200
+    assert record.bytes > 0
+    assert set(record.timings) == set(['wait', 'transfer', 'total', 'decode', 'load'])
+
+    stats = instrumentation.stats()['endpoints']['GET /builds/{id}']
+    assert stats['count'] == 1
+    assert stats['status'] == {200: 1}
+    assert stats['bytes'] == record.bytes
+    assert stats['timings']['load']['count'] == 1
@@ -0,0 +1,55 @@
+from travispy.entities import Job
+from travispy.interning import FrozenDict, Interner
+from travispy._tests.fake_adapter import fake_session
+import copy
+import json
+import pickle
+import pytest
+
+
+def test_interner():
+    interner = Interner(max_string_length=6)
+
+    config = interner.intern({'language': 'python', 'python': ['2.7', '3.6']})
+    assert isinstance(config, FrozenDict)
+    assert config == {'language': 'python', 'python': ['2.7', '3.6']}
+    assert interner.intern({'python': ['2.7', '3.6'], 'language': 'python'}) is config
+    assert interner.intern({'language': 'ruby'}) is not config
+
+    with pytest.raises(TypeError):
+        config['language'] = 'ruby'
+    with pytest.raises(TypeError):
+        config['python'].append('3.7')
+
+    assert json.loads(json.dumps(config)) == config
+    assert pickle.loads(pickle.dumps(config)) == config
+    assert copy.deepcopy(config)['python'] == ['2.7', '3.6']
+
+    short = ''.join(['pa', 'ssed'])
+    assert interner.intern(short) is interner.intern('passed')
+    long_value = ''.join(['failed', 'x'])
+    assert interner.intern(long_value) is long_value
+    assert interner.intern(1) == 1
+
+    sha = ''.join(['ab', 'c'])
+    assert interner.intern(sha, 'sha') is sha
+    assert interner.intern(''.join(['pa', 'ssed']), 'state') is short
+
+
+def test_load_interning():
+    session, adapter = fake_session()
+    session.interner = Interner()
+    config = {'language': 'python', 'os': 'linux'}
+    adapter.add('GET', '/jobs', {
+        'jobs': [
+            {'id': 1, 'state': 'passed', 'config': dict(config), 'started_at': '2017-01-01'},
+            {'id': 2, 'state': 'passed', 'config': dict(config), 'started_at': '2017-01-02'},
+        ],
+    })
+
+    jobs = Job.find_many(session, ids=[1, 2])
+    assert jobs[0].config is jobs[1].config
+    assert jobs[0].state is jobs[1].state
+    assert jobs[0].config == config
+    # Unique values are not kept.
+    assert '2017-01-01' not in session.interner._strings
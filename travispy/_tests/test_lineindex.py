@@ -0,0 +1,82 @@
+from travispy.entities import Log
+from travispy.lineindex import LineIndex, build_offsets
+from travispy._tests.fake_adapter import fake_session
+import mmap
+import pytest
+import tempfile
+
+
+TEXTS = [
+    u'',
+    u'\n',
+    u'one',
+    u'one\n',
+    u'one\ntwo\n\nfour',
+    u'one\ntwo\n\nfour\n',
+    u'\n\nthree\n',
+]
+
+
+@pytest.mark.parametrize('text', TEXTS)
+@pytest.mark.parametrize('encode', [False, True])
+def test_matches_split(text, encode):
+    data = text.encode('utf-8') if encode else text
+    newline = b'\n' if encode else u'\n'
+    expected = data.split(newline)
+    if data.endswith(newline) or not data:
+        expected.pop()
+
+    lines = LineIndex(data)
+    assert len(lines) == len(expected)
+    assert list(lines) == expected
+    assert lines[:] == expected
+    assert lines[1:3] == expected[1:3]
+    assert lines[-2:] == expected[-2:]
+    assert lines[::2] == expected[::2]
+    assert lines[3:1] == []
+    assert lines.tail(2) == expected[-2:]
+    assert lines.tail(0) == []
+    for index in range(-len(expected), len(expected)):
+        assert lines[index] == expected[index]
+    with pytest.raises(IndexError):
+        lines[len(expected)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 100])
+def test_build_offsets_chunks(size):
+    data = b'one\ntwo\n\nfour\nfive'
+    chunks = [data[i:i + size] for i in range(0, len(data), size)]
+    assert build_offsets(chunks) == LineIndex(data).offsets
+    assert list(build_offsets(chunks)) == [0, 4, 8, 9, 14, 18]
+
+
+def test_offset():
+    lines = LineIndex(b'one\ntwo\nthree\n')
+    assert lines.offset(1) == 4
+    assert lines.offset(-1) == 8
+
+
+def test_mmap():
+    with tempfile.TemporaryFile() as stream:
+        stream.write(b'one\ntwo\nthree')
+        stream.flush()
+        data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            lines = LineIndex(data)
+            assert len(lines) == 3
+            assert lines[-1] == b'three'
+            assert lines[:2] == [b'one', b'two']
+        finally:
+            data.close()
+
+
+def test_log_lines():
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs/1/log', u'first\nsecond\nthird\n')
+    log = Log(session)
+    log.job_id = 1
+    assert len(log.lines) == 3
+    assert log.lines[1:] == [u'second', u'third']
+    assert log.lines.tail(1) == [u'third']
+    assert log.lines is log.lines
+    assert len(adapter.requests) == 1
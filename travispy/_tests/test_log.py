@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from travispy.entities import Log
+from travispy.errors import TravisError
+from travispy._tests.fake_adapter import fake_session
+import mmap
+import os
+import pytest
+
+
+BODY = u'first\n☃ second\nthird'
+
+
+def make_log(body=BODY, status_code=200):
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs/1/log', body, status_code)
+    log = Log(session)
+    log.job_id = 1
+    return log, adapter
+
+
+def test_raw():
+    log, adapter = make_log()
+    assert log.raw == BODY.encode('utf-8')
+    assert log._body is None
+
+    assert log.lines[1] == u'☃ second'
+    assert log._body is None
+
+    assert log.body == BODY
+    # Bytes are dropped once decoded, and encoded again when needed.
+    assert log._raw is None
+    assert log._lines is None
+    assert log.raw == BODY.encode('utf-8')
+    assert log.lines[1] == u'☃ second'
+    # Lines of the decoded body are indexed, instead of holding an encoded copy.
+    assert log.lines.data is log.body
+    assert log._raw is None
+    assert log.get_archived_log() == BODY
+    assert len(adapter.requests) == 2
+
+
+def test_cache(tmpdir):
+    path = str(tmpdir.join('1.log'))
+    log, adapter = make_log()
+    raw = log.cache(path, chunk_size=4)
+    assert isinstance(raw, mmap.mmap)
+    assert log.raw is raw
+    assert raw[:] == BODY.encode('utf-8')
+    assert list(log.lines.offsets) == [0, 6, 17, 22]
+    assert log.lines[:] == [u'first', u'☃ second', u'third']
+    assert log.body == BODY
+    assert log.raw is raw
+    assert os.listdir(str(tmpdir)) == ['1.log']
+
+    other, other_adapter = make_log()
+    other.cache(path)
+    assert other.lines.tail(1) == [u'third']
+    assert other_adapter.requests == []
+    assert len(adapter.requests) == 1
+
+
+def test_cache_empty(tmpdir):
+    log, _ = make_log(u'')
+    assert log.cache(str(tmpdir.join('1.log'))) == b''
+    assert len(log.lines) == 0
+
+
+def test_cache_error(tmpdir):
+    log, _ = make_log(u'{"error": "not found"}', 404)
+    with pytest.raises(TravisError):
+        log.cache(str(tmpdir.join('1.log')))
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_raw_from_body():
+    log, adapter = make_log()
+    log._body = u'☃\nsnowman'
+    assert log.raw == u'☃\nsnowman'.encode('utf-8')
+    assert log.lines[:] == [u'☃', u'snowman']
+    assert log.lines.data is log._body
+    assert log.sections() is not None
+    assert adapter.requests == []
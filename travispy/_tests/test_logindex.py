@@ -0,0 +1,117 @@
+from travispy.logindex import TrigramIndex, required_literals, trigrams
+from travispy.logsearch import Match
+from travispy.logstore import LogStore
+import os
+import pytest
+import re
+
+
+@pytest.fixture
+def store(tmpdir):
+    store = LogStore(str(tmpdir))
+    store.put(1, b'collecting\nE   AssertionError: boom\n1 failed\n')
+    store.put(2, b'collecting\n10 passed\n')
+    store.put(3, b'Segmentation fault\nError: core dumped\n')
+    return store
+
+
+def test_trigrams():
+    assert trigrams(b'abcd\nab\nabc') == set([b'abc', b'bcd'])
+
+
+@pytest.mark.parametrize('pattern, expected', [
+    (b'Segmentation fault', [b'Segmentation fault']),
+    (b'Error: \\d+ tests', [b'Error: ', b' tests']),
+    (b'colou?r', [b'colo', b'r']),
+    (b'ab+c', [b'ab', b'c']),
+    (b'x{2,3}yz', [b'yz']),
+    (b'core (dumped)? now', [b'core ', b' now']),
+    (b'[Ee]rror\\.', [b'rror.']),
+    (b'foo|bar', []),
+    (b'(?i)error', []),
+    (u'caf\xe9', [u'caf\xe9'.encode('utf-8')]),
+    (br'foo\x41bar', [b'fooAbar']),
+    (br'\x1b\[0K', [b'\x1b[0K']),
+    (br'a\x4', [b'a\x04']),
+    (br'foo\0123bar', [b'foo\n3bar']),
+    (br'foo\101bar', [b'fooAbar']),
+    (br'foo\0bar', [b'foo\x00bar']),
+    (br'(a)b\12c', [b'b', b'c']),
+    (br'(a)b\1c', [b'b', b'c']),
+    (br'tab\there', [b'tab\there']),
+    (br'foo\N{DIGIT ONE}bar', [b'foo', b'bar']),
+    (br'foo\u0041bar', [b'foo', b'bar']),
+    (br'foo\U00000041bar', [b'foo', b'bar']),
+    (br'\bword\b', [b'word']),
+    (br'x[abc\]def]y', [b'x', b'y']),
+    (br'x[]a]y', [b'x', b'y']),
+    (br'x[^]a]y', [b'x', b'y']),
+    (br'x[\\]y', [b'x', b'y']),
+    (br'abc[def', []),
+])
+def test_required_literals(pattern, expected):
+    assert required_literals(pattern) == expected
+
+
+def test_search(store):
+    index = TrigramIndex(store)
+    assert index.update() == 3
+    assert len(index) == 3
+
+    assert index.candidates([b'collecting']) == [1, 2]
+    assert index.candidates([b'Error']) == [1, 3]
+    assert index.candidates([b'nowhere']) == []
+    assert index.candidates([b'ab']) == [1, 2, 3]
+
+    assert list(index.search(b'Error: \\w+')) == [
+        Match(1, 1, 24, u'E   AssertionError: boom'),
+        Match(3, 1, 19, u'Error: core dumped'),
+    ]
+    assert [match.job_id for match in index.search(re.compile(b'ERROR', re.I))] == [1, 3]
+    assert [match.job_id for match in index.search(re.compile(br'core\ dum ped', re.X))] == [3]
+    assert [match.job_id for match in index.search(re.compile(b'core dumped$', re.M))] == [3]
+    assert [m.line for m in index.search(u'collect', max_count=1)] == [u'collecting'] * 2
+    assert [(m.job_id, m.line) for m in index.search(b'^\\d+ failed$')] == [(1, u'1 failed')]
+
+
+def test_incremental(store):
+    index = TrigramIndex(store)
+    index.update()
+
+    store.put(4, b'Segmentation fault again\n')
+    store.put(2, b'now Error\n')
+    os.utime(store.path(2), (0, 0))  # Makes sure modification time changes.
+    store.delete(3)
+    assert index.update() == 2
+
+    assert sorted(index._live) == [1, 2, 4]
+    assert index.candidates([b'Segmentation']) == [4]
+    assert index.candidates([b'Error']) == [1, 2]
+    assert index.candidates([b'collecting']) == [1]
+
+
+def test_save_load(store, tmpdir):
+    index = TrigramIndex(store)
+    index.update()
+    store.delete(2)
+    index.update()
+    index.save()
+    assert os.path.exists(os.path.join(str(tmpdir), 'trigrams.idx'))
+    assert sorted(store.job_ids()) == [1, 3]
+
+    loaded = TrigramIndex.load(store)
+    assert sorted(loaded._live) == [1, 3]
+    assert loaded.candidates([b'Error']) == [1, 3]
+    assert loaded.candidates([b'collecting']) == [1]
+    assert loaded.update() == 0
+
+    assert len(TrigramIndex.load(store, str(tmpdir.join('missing.idx')))) == 0
+
+
+def test_search_character_class(tmpdir):
+    store = LogStore(str(tmpdir))
+    store.put(1, b'value]done\n')
+    store.put(2, b'valuedef\n')
+    index = TrigramIndex(store)
+    index.update()
+    assert [match.job_id for match in index.search(br'value[abc\]def]')] == [1, 2]
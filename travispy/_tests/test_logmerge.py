@@ -0,0 +1,94 @@
+from travispy.entities import Build
+from travispy.errors import TravisError
+from travispy.logmerge import LogLine
+from travispy._tests.fake_adapter import fake_session
+import gzip
+import io
+import pytest
+import threading
+
+
+LOGS = {
+    1: b'one\ntwo\n',
+    2: b'\xe2\x98\x83\nlast without newline',
+    3: b'',
+}
+
+
+def make_build(logs=LOGS):
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs', {
+        'jobs': [{'id': job_id, 'number': '7.%d' % job_id} for job_id in sorted(logs)],
+    })
+    for job_id, body in logs.items():
+        adapter.add('GET', '/jobs/%d/log' % job_id, body)
+
+    build = Build(session)
+    build.job_ids = sorted(logs)
+    return build, adapter
+
+
+def test_logs():
+    build, adapter = make_build()
+    lines = sorted(build.logs(concurrency=2))
+    assert lines == [
+        LogLine('7.1', 1, 0, u'one'),
+        LogLine('7.1', 1, 1, u'two'),
+        LogLine('7.2', 2, 0, u'\u2603'),
+        LogLine('7.2', 2, 1, u'last without newline'),
+    ]
+    assert len(adapter.requests) == 4
+
+    lines = sorted(build.logs(encoding=None))
+    assert lines[2] == LogLine('7.2', 2, 0, b'\xe2\x98\x83')
+
+
+def test_logs_concurrent():
+    arrived = []
+    all_arrived = threading.Event()
+
+    def log(request):
+        # Each download waits for the others to start.
+        arrived.append(request)
+        if len(arrived) == 3:
+            all_arrived.set()
+        assert all_arrived.wait(5)
+        return 200, b'done\n', {}
+
+    build, adapter = make_build()
+    for job_id in LOGS:
+        adapter.add('GET', '/jobs/%d/log' % job_id, log)
+    assert len(list(build.logs(concurrency=3))) == 3
+
+
+def test_logs_archive(tmpdir):
+    build, _ = make_build()
+    stream = io.BytesIO()
+    list(build.logs(archive=stream))
+    data = gzip.GzipFile(fileobj=io.BytesIO(stream.getvalue())).read()
+    assert sorted(data.split(b'\n')) == sorted([
+        b'7.1\tone',
+        b'7.1\ttwo',
+        b'7.2\t\xe2\x98\x83',
+        b'7.2\tlast without newline',
+        b'',
+    ])
+
+    path = str(tmpdir.join('build.log.gz'))
+    list(build.logs(archive=path))
+    with gzip.open(path, 'rb') as archive:
+        assert sorted(archive.read().split(b'\n')) == sorted(data.split(b'\n'))
+
+
+def test_logs_error():
+    build, adapter = make_build()
+    adapter.add('GET', '/jobs/2/log', {'error': 'not found'}, 404)
+    with pytest.raises(TravisError):
+        list(build.logs())
+
+
+def test_logs_interrupted():
+    build, _ = make_build(dict((job_id, b'line\n' * 100000) for job_id in range(1, 5)))
+    lines = build.logs(concurrency=2)
+    next(lines)
+    lines.close()
@@ -0,0 +1,84 @@
+from travispy.entities import Log
+from travispy.logparser import LogParser, parse, strip_ansi
+from travispy._tests.fake_adapter import fake_session
+import pytest
+
+
+LOG = u'''\
+Worker information
+travis_fold:start:system_info\r\x1b[0K\x1b[33;1mBuild system information\x1b[0m
+Build language: python
+travis_fold:end:system_info\r\x1b[0K
+travis_fold:start:install\r\x1b[0Ktravis_time:start:0a1b\r\x1b[0K$ pip install -r requirements.txt
+Collecting requests
+travis_time:end:0a1b:start=1000000000,finish=4000000000,duration=3000000000\r\x1b[0K
+travis_time:start:0c2d\r\x1b[0K$ pip install .
+travis_time:end:0c2d:start=4500000000,finish=5000000000,duration=500000000\r\x1b[0K
+travis_fold:end:install\r\x1b[0K
+travis_time:start:0e3f\r\x1b[0K
+$ pytest
+\x1b[32m10 passed\x1b[0m
+travis_time:end:0e3f:start=6000000000,finish=16000000000,duration=10000000000\r\x1b[0K
+Done. Your build exited with 0.'''
+
+
+def summary(root):
+    return [
+        (depth, section.kind, section.name, section.start_line, section.end_line,
+         section.duration)
+        for section, depth in root.walk()
+    ]
+
+
+EXPECTED = [
+    (0, 'root', None, 0, 15, 15000000000),
+    (1, 'fold', 'system_info', 1, 4, None),
+    (1, 'fold', 'install', 4, 10, 4000000000),
+    (2, 'time', '$ pip install -r requirements.txt', 4, 7, 3000000000),
+    (2, 'time', '$ pip install .', 7, 9, 500000000),
+    (1, 'time', '$ pytest', 10, 14, 10000000000),
+]
+
+
+@pytest.mark.parametrize('encode', [False, True])
+def test_parse(encode):
+    lines = LOG.split('\n')
+    if encode:
+        lines = [line.encode('utf-8') for line in lines]
+    assert summary(parse(lines)) == EXPECTED
+
+
+def test_strip_ansi():
+    assert strip_ansi(u'\x1b[33;1mBuild\x1b[0m \x1b[0K') == u'Build '
+    assert strip_ansi(b'\x1b[?25lplain') == b'plain'
+    line = u'no escapes'
+    assert strip_ansi(line) is line
+
+
+def test_unbalanced():
+    parser = LogParser()
+    for line in [
+        'travis_fold:end:never_started',
+        'travis_fold:start:outer',
+        'travis_fold:start:inner',
+        'travis_time:start:1',
+        'travis_fold:end:outer',
+        'travis_fold:start:open',
+        'last',
+    ]:
+        parser.feed(line)
+    assert summary(parser.close()) == [
+        (0, 'root', None, 0, 7, None),
+        (1, 'fold', 'outer', 1, 5, None),
+        (2, 'fold', 'inner', 2, 5, None),
+        (3, 'time', None, 3, 5, None),
+        (1, 'fold', 'open', 5, 7, None),
+    ]
+
+
+def test_log_sections():
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs/1/log', LOG)
+    log = Log(session)
+    log.job_id = 1
+    assert summary(log.sections()) == EXPECTED
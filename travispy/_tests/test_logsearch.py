@@ -0,0 +1,79 @@
+from travispy.entities import Job
+from travispy.errors import TravisError
+from travispy.logsearch import Match, search_block
+from travispy._tests.fake_adapter import fake_travis
+import pytest
+import re
+
+
+LOGS = {
+    1: b'collecting\nE   AssertionError: boom\n1 failed\n',
+    2: b'collecting\n10 passed\n',
+    3: b''.join(b'line %d\n' % i for i in range(1000)) + b'Error: last line without newline',
+}
+
+
+@pytest.fixture
+def travis():
+    travis, adapter = fake_travis()
+    for job_id, body in LOGS.items():
+        adapter.add('GET', '/jobs/%d/log' % job_id, body)
+    with travis:
+        travis.adapter = adapter
+        yield travis
+
+
+def test_search_block():
+    block = b'a\nfoo bar foo\nb\nfoo\n'
+    assert search_block(re.compile(b'foo'), block) == [(1, 2, b'foo bar foo'), (3, 16, b'foo')]
+    assert search_block(re.compile(b'nothing'), block) == []
+
+
+def test_search_block_lines():
+    block = b'ok\nERROR one\nfix\nERROR two x\n'
+    assert search_block(re.compile(b'^ERROR'), block) == [
+        (1, 3, b'ERROR one'), (3, 17, b'ERROR two x')]
+    assert search_block(re.compile(b'x$'), block) == [(2, 15, b'fix'), (3, 27, b'ERROR two x')]
+    # Matches never span lines.
+    assert search_block(re.compile(b'ok\\s+ERROR'), block) == []
+    assert search_block(re.compile(b'x[^z]*'), block) == [(2, 15, b'fix'), (3, 27, b'ERROR two x')]
+    assert search_block(re.compile(b'one\\s*'), b'one\n') == [(0, 0, b'one')]
+
+
+def test_search_logs(travis):
+    job = Job(travis._session)
+    job.id = 1
+    matches = sorted(travis.search_logs([job, 2, 3], br'Error', concurrency=2))
+    assert matches == [
+        Match(1, 1, LOGS[1].index(b'Error'), u'E   AssertionError: boom'),
+        Match(3, 1000, LOGS[3].index(b'Error'), u'Error: last line without newline'),
+    ]
+
+
+def test_chunks(travis):
+    from travispy.logsearch import search
+    matches = list(search(travis._session, [3], u'line 99\\d', chunk_size=7))
+    assert [match.line_number for match in matches] == list(range(990, 1000))
+    assert all(LOGS[3][match.offset:].startswith(b'line 99') for match in matches)
+
+
+def test_max_count(travis):
+    matches = list(travis.search_logs([3], br'line', max_count=3))
+    assert [match.line for match in matches] == [u'line 0', u'line 1', u'line 2']
+
+
+def test_early_stop(travis):
+    results = travis.search_logs(list(LOGS) * 20, br'line \d+', concurrency=2)
+    next(results)
+    results.close()
+    assert len(travis.adapter.requests) < 60
+
+
+def test_errors(travis):
+    with pytest.raises(TravisError):
+        list(travis.search_logs([1, 404], b'Error'))
+
+
+def test_processes(travis):
+    matches = list(travis.search_logs([1], b'failed', processes=1))
+    assert matches == [Match(1, 2, LOGS[1].index(b'failed'), u'1 failed')]
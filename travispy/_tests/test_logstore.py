@@ -0,0 +1,87 @@
+from travispy.logstore import LogStore, zstandard
+from travispy._tests.fake_adapter import fake_session
+from travispy.entities import Log
+import os
+import pytest
+
+
+LINES = [('line %d ' % i) * (i % 7) for i in range(1000)]
+DATA = '\n'.join(LINES).encode('utf-8')
+
+
+@pytest.fixture(params=['zlib', 'zstd'])
+def store(request, tmpdir):
+    if request.param == 'zstd' and zstandard is None:
+        pytest.skip('zstandard is not installed')
+    return LogStore(str(tmpdir), codec=request.param, frame_size=512)
+
+
+def test_put(store):
+    assert store.put(1234, DATA) == len(LINES)
+    assert 1234 in store
+    assert 4321 not in store
+    assert store.path(1234).endswith(os.path.join('234', '1234.log'))
+    assert list(store.job_ids()) == [1234]
+    assert store.line_count(1234) == len(LINES)
+    assert store.read(1234) == DATA
+    assert os.path.getsize(store.path(1234)) < len(DATA)
+
+    store.delete(1234)
+    assert 1234 not in store
+
+
+@pytest.mark.parametrize('start, stop', [
+    (0, None), (0, 1), (10, 20), (500, 900), (-50, None), (-3, -1), (999, 2000), (20, 10),
+])
+def test_lines(store, start, stop):
+    store.put(1, DATA)
+    assert store.lines(1, start, stop) == LINES[start:stop]
+
+
+def test_chunks(store):
+    chunks = [DATA[i:i + 100] for i in range(0, len(DATA), 100)]
+    store.put(1, iter(chunks))
+    assert store.read(1) == DATA
+    assert store.lines(1, 400, 410, encoding=None) == [
+        line.encode('utf-8') for line in LINES[400:410]
+    ]
+
+
+def test_edge_cases(store):
+    store.put(1, b'')
+    assert store.line_count(1) == 0
+    assert store.lines(1) == []
+
+    store.put(2, u'caf\xe9\n')
+    assert store.lines(2) == [u'caf\xe9']
+    assert store.line_count(2) == 1
+
+    long_line = b'x' * 2000
+    store.put(3, long_line + b'\nend')
+    assert store.lines(3, encoding=None) == [long_line, b'end']
+
+
+def test_archive(tmpdir):
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs/7/log', 'first\nsecond\n')
+    log = Log(session)
+    log.job_id = 7
+
+    store = LogStore(str(tmpdir))
+    assert store.archive(log)
+    assert not store.archive(log)
+    assert store.lines(7) == ['first', 'second']
+    assert len(adapter.requests) == 1
+
+
+def test_archive_cached(tmpdir):
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs/7/log', 'first\nsecond\n' * 1000)
+    log = Log(session)
+    log.job_id = 7
+    log.cache(str(tmpdir.join('7.log')))
+
+    store = LogStore(str(tmpdir.join('store')), frame_size=1000)
+    assert store.archive(log)
+    assert store.read(7) == log.raw[:]
+    assert store.lines(7, 1999) == ['second']
@@ -0,0 +1,63 @@
+from travispy.entities import (
+    Account, Branch, Broadcast, Build, Commit, Hook, Job, Log, Repo, Setting, User)
+from travispy.entities._entity import Entity
+import gc
+import pytest
+
+tracemalloc = pytest.importorskip('tracemalloc')
+
+
+ENTITY_CLASSES = [Account, Branch, Broadcast, Build, Commit, Hook, Job, Log, Repo, Setting, User]
+
+# Number of instances created to measure memory footprint of each class.
+COUNT = 10000
+
+
+def bytes_per_entity(entity_class, count=COUNT):
+    '''
+    :rtype: float
+    :returns:
+        Average number of bytes allocated by each instance of ``entity_class``, as reported by
+        :mod:`tracemalloc`.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        entities = [entity_class(None) for _ in range(count)]
+        for entity in entities:
+            entity.id = 1
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    # The list holding instances is not part of their footprint.
+    return (after - before) / float(count) - 8
+
+
+@pytest.mark.parametrize('entity_class', ENTITY_CLASSES, ids=lambda c: c.__name__)
+def test_no_instance_dict(entity_class):
+    entity = entity_class(None)
+    assert not hasattr(entity, '__dict__')
+    assert not hasattr(entity, '_Entity__cache')
+
+
+def test_lazy_cache_allocation():
+    entity = Entity(None)
+    entity.id = 1
+    loaded = entity._load_lazy_information('id', 'self', lambda session, id: [id], 'id')
+    assert loaded == [1]
+    assert entity._Entity__cache == {'cached_id': 1, 'cached_self': [1]}
+
+
+def test_bytes_per_entity():
+    report = []
+    for entity_class in ENTITY_CLASSES:
+        size = bytes_per_entity(entity_class)
+        report.append('%-10s %6.1f bytes' % (entity_class.__name__, size))
+
+        # One pointer per slot plus object header, without instance dict or lazy cache.
+        slots = sum(len(getattr(c, '__slots__', ())) for c in entity_class.__mro__)
+        assert size <= 8 * slots + 64, entity_class.__name__
+
+    print('\nBytes per entity:\n' + '\n'.join(report))
@@ -0,0 +1,69 @@
+from travispy import metrics
+from travispy.entities import Build
+from travispy._tests.fake_adapter import fake_session
+
+try:
+    from urllib.request import urlopen
+except ImportError:  # Python 2
+    from urllib2 import urlopen
+
+
+def test_render():
+    session, adapter = fake_session()
+    adapter.add('GET', '/builds/1', {'build': {'id': 1, 'repository_id': 2}})
+    adapter.add('GET', '/repos/2', {'repo': {'id': 2}})
+
+    build = Build.find_one(session, 1)
+    assert build.repository.id == 2
+    assert build.repository.id == 2
+
+    text = metrics.render(session)
+    lines = text.splitlines()
+
+    assert '# TYPE travispy_requests_total counter' in lines
+    assert 'travispy_requests_total{endpoint="/builds/{id}",method="GET",status="200"} 1' in lines
+    assert 'travispy_cache_hits_total 1' in lines
+    assert 'travispy_cache_misses_total 1' in lines
+    assert 'travispy_retries_total 0' in lines
+    assert 'travispy_request_duration_seconds_count{%s} 1' % (
+        'endpoint="/repos/{id}",method="GET",phase="load"'
+    ) in lines
+    assert any(
+        line.startswith('travispy_request_duration_seconds_bucket{') and 'le="+Inf"' in line
+        for line in lines
+    )
+
+
+def test_render_many_sources():
+    sessions = []
+    for _ in range(2):
+        session, adapter = fake_session()
+        adapter.add('GET', '/builds/1', {'build': {'id': 1}})
+        Build.find_one(session, 1)
+        sessions.append(session)
+    record = sessions[1].instrumentation.start('GET', '/builds/{id}')
+    record.add_timing('load', 100.0)
+
+    lines = metrics.render(*sessions).splitlines()
+    samples = [line.rpartition(' ')[0] for line in lines if not line.startswith('#')]
+    assert len(samples) == len(set(samples))
+
+    assert 'travispy_requests_total{endpoint="/builds/{id}",method="GET",status="200"} 2' in lines
+    labels = 'endpoint="/builds/{id}",method="GET",phase="load"'
+    assert 'travispy_request_duration_seconds_count{%s} 3' % labels in lines
+    bucket = 'travispy_request_duration_seconds_bucket{endpoint="/builds/{id}",le="%s",' \
+        'method="GET",phase="load"} %d'
+    assert bucket % ('60.0', 2) in lines
+    assert bucket % ('+Inf', 3) in lines
+
+
+def test_serve():
+    session, adapter = fake_session()
+    server = metrics.serve(session, port=0, addr='127.0.0.1')
+    try:
+        response = urlopen('http://127.0.0.1:%d/metrics' % server.server_address[1])
+        assert response.headers['Content-Type'] == metrics.CONTENT_TYPE
+        assert b'travispy_retries_total 0' in response.read()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,101 @@
+from travispy import metrics
+from travispy.ratelimit import RateLimiter
+from travispy.retry import RetryPolicy
+from travispy._tests.fake_adapter import fake_session
+import pytest
+import threading
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def limiter(clock, *args, **kwargs):
+    result = RateLimiter(*args, **kwargs)
+    result.clock = clock
+    result.sleep = clock.sleep
+    result._updated = clock.now
+    return result
+
+
+def test_burst(clock):
+    rate_limiter = limiter(clock, rate=2, burst=3)
+    assert [rate_limiter.reserve() for _ in range(3)] == [0, 0, 0]
+    assert rate_limiter.reserve() == 0.5
+    assert rate_limiter.reserve() == 1.0
+
+    clock.now += 10
+    assert rate_limiter.reserve() == 0
+
+
+def test_acquire(clock):
+    rate_limiter = limiter(clock, rate=10, burst=1)
+    for _ in range(11):
+        rate_limiter.acquire()
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_throttled(clock):
+    rate_limiter = limiter(clock, rate=10, min_rate=2, recovery_time=8)
+    rate_limiter.throttled()
+    assert rate_limiter.rate == 5
+    rate_limiter.throttled()
+    rate_limiter.throttled()
+    assert rate_limiter.rate == 2
+
+    clock.now += 4
+    assert rate_limiter.rate == 6
+    clock.now += 100
+    assert rate_limiter.rate == 10
+
+    rate_limiter.throttled(retry_after=3)
+    assert rate_limiter.reserve() == pytest.approx(3 + 1 / 5.0)
+
+
+def test_thread_safety():
+    rate_limiter = RateLimiter(rate=1, burst=100)
+    delays = []
+
+    def reserve():
+        for _ in range(50):
+            delays.append(rate_limiter.reserve())
+
+    threads = [threading.Thread(target=reserve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert delays.count(0) == 100
+
+
+def test_session(clock):
+    rate_limiter = limiter(clock, rate=10, burst=1)
+    session, adapter = fake_session()
+    session.rate_limiter = rate_limiter
+    session.retry = RetryPolicy(total=1)
+    session.retry.sleep = clock.sleep
+    session.instrumentation.register_gauge('rate_limit', lambda: rate_limiter.rate)
+
+    statuses = [429, 200]
+    adapter.add('GET', '/builds/1', lambda request: (statuses.pop(0), {}, {'Retry-After': '1'}))
+
+    assert session.get(session.uri + '/builds/1').status_code == 200
+    assert rate_limiter.rate < 10
+    assert session.instrumentation.stats()['gauges']['rate_limit'] == rate_limiter.rate
+    assert 'travispy_rate_limit{source="0"}' in metrics.render(session)
@@ -0,0 +1,144 @@
+from travispy.entities import Build
+from travispy.retry import RetryBudget, RetryPolicy
+from travispy._tests.fake_adapter import fake_session
+from requests.packages.urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+import pytest
+import requests
+import socket
+
+
+@pytest.fixture
+def policy():
+    policy = RetryPolicy(total=3, backoff=1, max_backoff=3)
+    policy.delays = []
+    policy.sleep = policy.delays.append
+    policy.random = lambda: 1.0
+    return policy
+
+
+def responses(*statuses, **headers):
+    '''
+    :returns:
+        A fake adapter handler answering with given ``statuses``, one per request.
+    '''
+    statuses = list(statuses)
+
+    def handler(request):
+        status_code = statuses.pop(0)
+        if isinstance(status_code, Exception):
+            raise status_code
+        body = {'build': {'id': 1}} if status_code == 200 else {'error': 'unavailable'}
+        return status_code, body, headers
+    return handler
+
+
+def test_backoff(policy):
+    session, adapter = fake_session()
+    session.retry = policy
+    adapter.add('GET', '/builds/1', responses(503, 502, 429, 200))
+
+    assert Build.find_one(session, 1).id == 1
+    assert policy.delays == [1, 2, 3]
+    assert session.instrumentation.counters()['retries'] == 3
+    assert session.instrumentation.stats()['endpoints']['GET /builds/{id}']['status'] == {
+        200: 1, 429: 1, 502: 1, 503: 1,
+    }
+
+
+def test_total(policy):
+    session, adapter = fake_session()
+    session.retry = policy
+    adapter.add('GET', '/builds/1', responses(503, 503, 503, 503))
+
+    assert session.get(session.uri + '/builds/1').status_code == 503
+    assert len(policy.delays) == 3
+
+
+def test_retry_after(policy):
+    session, adapter = fake_session()
+    session.retry = policy
+    adapter.add('GET', '/builds/1', responses(429, 200, **{'Retry-After': '7'}))
+    assert session.get(session.uri + '/builds/1').status_code == 200
+    assert policy.delays == [7]
+
+    adapter.add('GET', '/builds/1', responses(429, 200, **{'Retry-After': '700'}))
+    assert session.get(session.uri + '/builds/1').status_code == 429
+
+
+def test_connection_errors(policy):
+    session, adapter = fake_session()
+    session.retry = policy
+    adapter.add('GET', '/builds/1', responses(requests.ConnectionError(), 200))
+    assert session.get(session.uri + '/builds/1').status_code == 200
+
+    adapter.add('POST', '/builds/1/restart', responses(requests.ReadTimeout(), 200))
+    with pytest.raises(requests.ReadTimeout):
+        session.post(session.uri + '/builds/1/restart')
+
+    adapter.add('POST', '/builds/1/restart', responses(requests.ConnectTimeout(), 200))
+    assert session.post(session.uri + '/builds/1/restart').status_code == 200
+
+
+def test_connection_refused(policy):
+    session, adapter = fake_session()
+    session.retry = policy
+    url = session.uri + '/builds/1/restart'
+
+    refused = requests.ConnectionError(
+        MaxRetryError(None, url, NewConnectionError(None, 'Connection refused')))
+    adapter.add('POST', '/builds/1/restart', responses(refused, 200))
+    assert session.post(url).status_code == 200
+
+    # The connection was established, so the request may have been processed.
+    reset = requests.ConnectionError(ProtocolError('Connection aborted.'))
+    adapter.add('POST', '/builds/1/restart', responses(reset, 200))
+    with pytest.raises(requests.ConnectionError):
+        session.post(url)
+
+
+def test_connection_refused_by_server(policy):
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    port = listener.getsockname()[1]
+    listener.close()  # Nothing listens on port anymore.
+
+    session, _ = fake_session()
+    session.retry = policy
+    session.mount('http://', requests.adapters.HTTPAdapter())
+    with pytest.raises(requests.ConnectionError):
+        session.post('http://127.0.0.1:%d/builds/1/restart' % port, timeout=1)
+    assert len(policy.delays) == policy.total
+
+
+def test_idempotency(policy):
+    session, adapter = fake_session()
+    session.retry = policy
+
+    adapter.add('POST', '/builds/1/restart', responses(503, 200))
+    assert session.post(session.uri + '/builds/1/restart').status_code == 503
+
+    adapter.add('POST', '/builds/1/restart', responses(429, 200))
+    assert session.post(session.uri + '/builds/1/restart').status_code == 200
+
+    adapter.add('POST', '/builds/1/cancel', responses(503, 204))
+    build = Build(session)
+    build.id = 1
+    assert build.cancel() is True
+
+
+def test_budget(policy):
+    budget = RetryBudget(ratio=0.5, min_retries=1, max_tokens=2)
+    policy.budget = budget
+
+    session, adapter = fake_session()
+    session.retry = policy
+    adapter.add('GET', '/builds/1', responses(*[503] * 10))
+
+    # Initial token plus half a token deposited by the request.
+    assert session.get(session.uri + '/builds/1').status_code == 503
+    assert len(policy.delays) == 1
+    assert budget.tokens == 0.5
+
+    assert session.get(session.uri + '/builds/1').status_code == 503
+    assert len(policy.delays) == 2
+    assert budget.tokens == 0
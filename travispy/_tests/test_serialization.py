@@ -0,0 +1,107 @@
+from travispy import serialization
+from travispy.entities import Build, Commit, Job, Log, Repo
+from travispy.interning import Interner
+from travispy._tests.fake_adapter import fake_session
+import pickle
+import pytest
+
+
+@pytest.fixture
+def build():
+    commit = Commit(None)
+    commit.id = 3
+    commit.sha = 'abc'
+
+    job = Job(None)
+    job.id = 2
+    job.state = 'failed'
+
+    build = Build(None)
+    build.id = 1
+    build.state = 'failed'
+    build.config = Interner().intern({'language': 'python', 'python': ['3.6']})
+    build.job_ids = [2]
+    build.jobs = [job]
+    build.commit = commit
+    return build
+
+
+def test_to_dict(build):
+    info = build.to_dict()
+    assert info['id'] == 1
+    assert info['commit'] == {'id': 3, 'sha': 'abc', '__entity__': 'Commit'}
+    assert info['jobs'] == [{'id': 2, 'state': 'failed', '__entity__': 'Job'}]
+    assert 'number' not in info
+
+    session = object()
+    loaded = Build.from_dict(session, info)
+    assert loaded._session is session
+    assert loaded.commit._session is session
+    assert loaded.jobs[0].state == 'failed'
+    assert loaded.to_dict() == info
+
+
+def test_repo_state_is_not_a_field():
+    repo = Repo(None)
+    repo.last_build_state = 'passed'
+    assert repo.to_dict() == {'last_build_state': 'passed'}
+
+
+@pytest.mark.parametrize('use_msgpack', [False, True])
+def test_dumps_loads(build, use_msgpack):
+    if use_msgpack and serialization.msgpack is None:
+        pytest.skip('msgpack is not installed')
+
+    repo = Repo(None)
+    repo.id = 5
+    repo.slug = 'owner/name'
+
+    data = serialization.dumps([build, repo, build], use_msgpack=use_msgpack)
+    data = pickle.loads(pickle.dumps(data))
+
+    session = object()
+    loaded = serialization.loads(data, session)
+    assert [type(entity) for entity in loaded] == [Build, Repo, Build]
+    assert loaded[0].to_dict() == build.to_dict()
+    assert loaded[1].slug == 'owner/name'
+    assert loaded[2].jobs[0]._session is session
+
+    with pytest.raises(ValueError):
+        serialization.loads(b'X' + data[1:])
+
+
+@pytest.mark.parametrize('use_msgpack', [False, True])
+def test_dumps_loads_log(tmpdir, use_msgpack):
+    if use_msgpack and serialization.msgpack is None:
+        pytest.skip('msgpack is not installed')
+
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs/2/log', b'one\ntwo\n')
+    log = Log(session)
+    log.id = 1
+    log.job_id = 2
+    assert log.body == u'one\ntwo\n'
+    assert log.lines[1] == u'two'
+    log.cache(str(tmpdir.join('2.log')))
+    assert log.to_dict() == {'id': 1, 'job_id': 2, '_body': None}
+
+    loaded = serialization.loads(serialization.dumps([log], use_msgpack=use_msgpack), session)
+    assert loaded[0].to_dict() == log.to_dict()
+    assert loaded[0].raw == b'one\ntwo\n'
+
+
+@pytest.mark.parametrize('use_msgpack', [False, True])
+def test_dumps_loads_log_body(use_msgpack):
+    if use_msgpack and serialization.msgpack is None:
+        pytest.skip('msgpack is not installed')
+
+    session, adapter = fake_session()
+    adapter.add('GET', '/logs/1', {'log': {'id': 1, 'job_id': 2, 'type': 'Log', 'body': u'one'}})
+    log = Log.find_one(session, 1)
+
+    loaded = serialization.loads(serialization.dumps([log], use_msgpack=use_msgpack), session)
+    assert loaded[0].to_dict() == log.to_dict()
+    assert Log.from_dict(session, log.to_dict()).body == u'one'
+    assert loaded[0].body == u'one'
+    assert loaded[0].raw == b'one'
+    assert [request.path_url for request in adapter.requests] == ['/logs/1']
@@ -0,0 +1,74 @@
+from travispy.entities import Job
+from travispy.errors import TravisError
+from travispy._jsonstream import iter_object
+from travispy._tests.fake_adapter import fake_session, fake_travis
+import json
+import pytest
+
+
+def chunked(document, size):
+    data = json.dumps(document).encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 3, 64, 4096])
+def test_iter_object(size):
+    document = {
+        'commits': [{'id': 1, 'message': u'caf\xe9 \u2603'}],
+        'jobs': [{'id': 1, 'number': '1.1'}, {'id': 2, 'allow_failure': True}],
+        'total': 12345,
+        'empty': [],
+        'meta': {'limit': None},
+    }
+    assert list(iter_object(chunked(document, size))) == [
+        ('commits', {'id': 1, 'message': u'caf\xe9 \u2603'}, True),
+        ('jobs', {'id': 1, 'number': '1.1'}, True),
+        ('jobs', {'id': 2, 'allow_failure': True}, True),
+        ('total', 12345, False),
+        ('meta', {'limit': None}, False),
+    ]
+    assert list(iter_object([b'{}'])) == []
+
+
+@pytest.mark.parametrize('data', [b'', b'[1]', b'{"jobs": [1, 2', b'{"jobs": [1} '])
+def test_iter_object_invalid(data):
+    with pytest.raises(ValueError):
+        list(iter_object([data]))
+
+
+@pytest.mark.parametrize('commits_first', [True, False])
+def test_iter_many(commits_first):
+    session, adapter = fake_session()
+    jobs = [{'id': i, 'commit_id': i * 10} for i in range(1, 4)]
+    commits = [{'id': i * 10} for i in range(1, 4)]
+    sections = ['"jobs": %s' % json.dumps(jobs), '"commits": %s' % json.dumps(commits)]
+    if commits_first:
+        sections.reverse()
+    body = '{%s}' % ', '.join(sections)
+    adapter.add('GET', '/jobs', body)
+
+    result = []
+    for job in Job.iter_many(session, state='passed', chunk_size=7):
+        if commits_first:
+            assert job.commit.id == job.id * 10
+        result.append(job)
+
+    assert [job.id for job in result] == [1, 2, 3]
+    assert [job.commit.id for job in result] == [10, 20, 30]
+    assert session.instrumentation.stats()['endpoints']['GET /jobs']['count'] == 1
+
+
+def test_iter_many_errors():
+    session, adapter = fake_session()
+    adapter.add('GET', '/jobs', {'error': 'forbidden'}, status_code=403)
+
+    with pytest.raises(RuntimeError):
+        next(Job.iter_many(session))
+    with pytest.raises(TravisError):
+        next(Job.iter_many(session, state='passed'))
+
+
+def test_iter_repos():
+    travis, adapter = fake_travis()
+    adapter.add('GET', '/repos', {'repos': [{'id': 1}, {'id': 2}]})
+    assert [repo.id for repo in travis.iter_repos(member='travispy')] == [1, 2]
@@ -0,0 +1,202 @@
+from travispy.testresults import TestResultExtractor, extract
+from travispy._tests.fake_adapter import fake_travis
+import pytest
+import random
+import time
+
+
+PYTEST = b'''\
+$ pytest -v
+============================= test session starts ==============================
+tests/test_a.py::test_one PASSED                                         [ 25%]
+tests/test_a.py::test_two FAILED                                         [ 50%]
+=================================== FAILURES ===================================
+=========================== short test summary info ============================
+FAILED tests/test_a.py::test_two - AssertionError: assert 1 == 2
+ERROR tests/test_b.py::test_three - fixture 'db' not found
+\x1b[31m=========== 1 failed, 10 passed, 2 skipped, 1 error in 12.50s ============\x1b[0m
+'''
+
+UNITTEST = b'''\
+======================================================================
+FAIL: test_add (tests.test_math.MathTest)
+----------------------------------------------------------------------
+ERROR: test_div (tests.test_math.MathTest.test_div)
+----------------------------------------------------------------------
+Ran 20 tests in 0.250s
+
+FAILED (failures=1, errors=1, skipped=3)
+Ran 5 tests in 1.000s
+
+OK
+'''
+
+SUREFIRE = b'''\
+[INFO] Running com.example.FooTest
+[ERROR] Tests run: 4, Failures: 1, Errors: 0, Skipped: 1, Time elapsed: 0.5 s <<< FAILURE! - in \
+com.example.FooTest
+[ERROR] testBar(com.example.FooTest)  Time elapsed: 0.01 s  <<< FAILURE!
+[INFO] Tests run: 6, Failures: 0, Errors: 1, Skipped: 0, Time elapsed: 1.5 s - in \
+com.example.BazTest
+[ERROR] com.example.BazTest.testQux  Time elapsed: 0.2 s  <<< ERROR!
+[INFO] Results:
+[ERROR] Tests run: 10, Failures: 1, Errors: 1, Skipped: 1
+'''.replace(b'\\\n', b'')
+
+GRADLE = b'''\
+com.example.FooTest > testBar FAILED
+    java.lang.AssertionError at FooTest.java:12
+12 tests completed, 1 failed, 2 skipped
+'''
+
+RSPEC = b'''\
+Finished in 1 minute 2.5 seconds (files took 0.4 seconds to load)
+8 examples, 2 failures, 1 pending
+
+Failed examples:
+
+rspec ./spec/foo_spec.rb:12 # Foo does bar
+rspec ./spec/foo_spec.rb:20
+'''
+
+GO = b'''\
+=== RUN   TestAdd
+--- PASS: TestAdd (0.00s)
+=== RUN   TestDiv
+    --- FAIL: TestDiv/by_zero (0.01s)
+--- FAIL: TestDiv (0.01s)
+--- SKIP: TestSlow (0.00s)
+FAIL\tgithub.com/example/math\t0.015s
+ok  \tgithub.com/example/strings\t0.5s
+'''
+
+
+def summary(log):
+    return [
+        (r.runner, r.passed, r.failed, r.errors, r.skipped, r.duration, r.failed_tests)
+        for r in extract([log])
+    ]
+
+
+def test_pytest():
+    assert summary(PYTEST) == [('pytest', 10, 1, 1, 2, 12.5, [
+        'tests/test_a.py::test_two', 'tests/test_b.py::test_three'])]
+
+
+def test_pytest_quiet():
+    assert summary(b'..F\n1 failed, 2 passed, 1 warning in 0.12 seconds\n') == [
+        ('pytest', 2, 1, 0, 0, 0.12, [])]
+    assert summary(b'= no tests ran in 0.01s =\n') == [('pytest', 0, 0, 0, 0, 0.01, [])]
+    assert summary(b'1 passed, 2 hours in queue\n') == []
+
+
+def test_unittest():
+    assert summary(UNITTEST) == [('unittest', 20, 1, 1, 3, 1.25, [
+        'tests.test_math.MathTest.test_add', 'tests.test_math.MathTest.test_div'])]
+
+
+def test_surefire():
+    assert summary(SUREFIRE) == [('junit', 7, 1, 1, 1, 2.0, [
+        'com.example.FooTest.testBar', 'com.example.BazTest.testQux'])]
+
+
+def test_surefire_totals_only():
+    log = b'[INFO] Tests run: 3, Failures: 0, Errors: 0, Skipped: 0\n'
+    assert summary(log) == [('junit', 3, 0, 0, 0, None, [])]
+
+
+def test_gradle():
+    assert summary(GRADLE) == [('junit', 9, 1, 0, 2, None, ['com.example.FooTest.testBar'])]
+
+
+def test_rspec():
+    assert summary(RSPEC) == [('rspec', 5, 2, 0, 1, 62.5, [
+        'Foo does bar', './spec/foo_spec.rb:20'])]
+
+
+def test_go():
+    assert summary(GO) == [('go', 1, 2, 0, 1, 0.515, ['TestDiv/by_zero', 'TestDiv'])]
+
+
+def test_many_runners():
+    results = extract([GO, PYTEST.decode('utf-8')])
+    assert [result.runner for result in results] == ['pytest', 'go']
+    assert results[0].to_dict()['failed'] == 1
+    assert not results[0].success
+    assert results[0].total == 14
+
+
+def test_no_results():
+    assert extract([b'$ make\nDone. Your build exited with 0.\n']) == []
+
+
+@pytest.mark.parametrize('size', [1, 7, 64])
+def test_chunks(size):
+    log = PYTEST + UNITTEST + GO
+    extractor = TestResultExtractor()
+    for i in range(0, len(log), size):
+        extractor.feed(log[i:i + size])
+    results = extractor.close()
+    assert [(r.runner, r.passed, r.failed) for r in results] == [
+        ('pytest', 10, 1), ('unittest', 20, 1), ('go', 1, 2)]
+
+
+def test_carriage_return():
+    log = b'progress 10%\rprogress 100%\r============ 3 passed in 1.00s ============\r\n'
+    assert summary(log) == [('pytest', 3, 0, 0, 0, 1.0, [])]
+
+
+def synthetic_log(size, seed=0):
+    '''
+    :rtype: bytes
+    :returns:
+        Log of about ``size`` bytes of build noise, with a pytest summary at the end.
+    '''
+    generator = random.Random(seed)
+    noise = [
+        b'Collecting requests>=2.0 (from -r requirements.txt (line 1))',
+        b'  Downloading requests-2.18.4-py2.py3-none-any.whl (88kB)',
+        b'tests/test_module.py::test_case_%d PASSED                   [ 42%%]',
+        b'\x1b[0K\x1b[33;1mInstalling dependencies\x1b[0m',
+        b'gcc -pthread -fno-strict-aliasing -O2 -DNDEBUG -fPIC -c src/module.c -o module.o',
+        b'',
+    ]
+    lines = []
+    total = 0
+    while total < size:
+        line = generator.choice(noise)
+        if b'%' in line:
+            line = line % generator.randrange(1000)
+        lines.append(line)
+        total += len(line) + 1
+    lines.append(b'================ 1000 passed in 10.00s ================')
+    return b'\n'.join(lines) + b'\n'
+
+
+def test_benchmark():
+    log = synthetic_log(20 * 1024 * 1024)
+    chunk_size = 64 * 1024
+    chunks = [log[i:i + chunk_size] for i in range(0, len(log), chunk_size)]
+
+    start = time.time()
+    results = extract(chunks)
+    elapsed = time.time() - start
+
+    throughput = len(log) / 1024.0 / 1024.0 / elapsed
+    print('\nExtracted test results at %.1f MB/s' % throughput)
+    assert [(r.runner, r.passed) for r in results] == [('pytest', 1000)]
+    # A generous bound, to notice when lines stop being skipped by the marker pattern.
+    assert throughput > 5
+
+
+def test_test_results():
+    travis, adapter = fake_travis()
+    adapter.add('GET', '/jobs/1/log', PYTEST)
+    adapter.add('GET', '/jobs/2/log', GO)
+    adapter.add('GET', '/jobs/3/log', b'no tests\n')
+    with travis:
+        results = travis.test_results([1, 2, 3], concurrency=2)
+    assert sorted(results) == [1, 2, 3]
+    assert [r.runner for r in results[1]] == ['pytest']
+    assert results[2][0].failed_tests == ['TestDiv/by_zero', 'TestDiv']
+    assert results[3] == []
@@ -0,0 +1,59 @@
+from travispy import TravisPy
+from travispy.entities import Session, TransportPool
+from travispy._tests.fake_adapter import FakeAdapter
+
+
+def test_shared_pool():
+    first = TravisPy('first')
+    second = TravisPy('second')
+    uri = first._session.uri
+
+    adapter = TransportPool.default().adapter
+    assert first._session.get_adapter(uri) is adapter
+    assert second._session.get_adapter(uri) is adapter
+
+    assert first._session.headers['Authorization'] == 'token first'
+    assert second._session.headers['Authorization'] == 'token second'
+
+
+def test_custom_pool():
+    pool = TransportPool(pool_connections=2, pool_maxsize=20)
+    assert pool.adapter._pool_maxsize == 20
+
+    session = Session('https://travis.example.com/api', transport=pool)
+    assert session.transport is pool
+    assert session.get_adapter('https://travis.example.com/api/builds') is pool.adapter
+    assert session.get_adapter('http://travis.example.com/api/builds') is pool.adapter
+
+
+def test_default_pool_size():
+    # Every connection of a bulk operation at its highest concurrency is kept.
+    session = Session('https://api.travis-ci.org', transport=TransportPool())
+    assert session.transport.adapter._pool_maxsize >= session.concurrency.maximum
+
+
+def test_close_session_keeps_pool():
+    pool = TransportPool()
+    session = Session('https://api.travis-ci.org', transport=pool)
+    pool.adapter.poolmanager.connection_from_url('https://api.travis-ci.org')
+
+    session.close()
+    assert len(pool.adapter.poolmanager.pools) == 1
+
+    pool.close()
+    assert len(pool.adapter.poolmanager.pools) == 0
+
+
+def test_github_auth():
+    adapter = FakeAdapter()
+    adapter.add('POST', '/auth/github', {'access_token': 'secret'})
+
+    pool = TransportPool()
+    pool.adapter = adapter
+    travis = TravisPy.github_auth('github', transport=pool)
+
+    request = adapter.requests[0]
+    assert 'Authorization' not in request.headers
+    assert request.headers['User-Agent'] == 'TravisPy'
+    assert travis._session.headers['Authorization'] == 'token secret'
+    assert travis.stats()['endpoints']['POST /auth/github']['count'] == 1
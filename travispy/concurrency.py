@@ -0,0 +1,306 @@
+'''
+Adaptive concurrency for bulk operations.
+
+Instead of guessing a number of threads, bulk operations (such as :meth:`.TravisPy.cancel_many`)
+run as many requests simultaneously as allowed by the :class:`AdaptiveLimiter` of their
+:class:`.Session`. Its limit follows an AIMD (additive increase, multiplicative decrease) rule:
+
+    - it grows by about one request per "round" while responses are fast and successful;
+    - it is cut by half on ``429`` or ``5xx`` responses, connection errors and latency spikes,
+      at most once per "round": requests started before the last cut do not cut it again.
+
+The current limit is reported as the ``concurrency_limit`` gauge in :meth:`.TravisPy.stats`.
+
+Operations generating results as they arrive (such as :meth:`.TravisPy.search_logs`) run their
+producers with a :class:`FanOut` instead.
+'''
+from concurrent.futures import ThreadPoolExecutor
+from travispy.instrumentation import timer
+import threading
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+# Default highest number of simultaneous requests of bulk operations.
+DEFAULT_MAXIMUM = 64
+
+
+class AdaptiveLimiter(object):
+    '''
+    :param int initial:
+        Initial number of simultaneous requests.
+
+    :param int minimum:
+        Lowest limit.
+
+    :param int maximum:
+        Highest limit.
+
+    :param float decrease:
+        Factor applied to limit on congestion.
+
+    :param float latency_factor:
+        A request is considered a latency spike when it takes longer than this factor times the
+        average latency of recent successful requests to the same endpoint.
+
+    :param float smoothing:
+        Weight of each new sample on average latency.
+    '''
+
+    def __init__(
+            self,
+            initial=4,
+            minimum=1,
+            maximum=DEFAULT_MAXIMUM,
+            decrease=0.5,
+            latency_factor=3.0,
+            smoothing=0.1):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.smoothing = smoothing
+
+        self._limit = float(initial)
+        self._in_flight = 0
+        # Average latency of each endpoint.
+        self._latencies = {}
+        # When limit was last decreased.
+        self._decreased = None
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        '''
+        :rtype: int
+        :returns:
+            Number of simultaneous requests currently allowed.
+        '''
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        '''
+        :rtype: int
+        :returns:
+            Number of slots currently acquired.
+        '''
+        return self._in_flight
+
+    def acquire(self):
+        '''
+        Blocks until a slot is available.
+        '''
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self):
+        '''
+        Releases a slot acquired through :meth:`acquire`.
+        '''
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def record(self, latency, status_code=None, error=None, endpoint=None, started=None):
+        '''
+        Adjusts limit according to the outcome of a request.
+
+        :param float latency:
+            Seconds the request took.
+
+        :type status_code: int | None
+        :param status_code:
+            Response status code, ``None`` if request failed without a response.
+
+        :type error: Exception | None
+        :param error:
+            Error raised by the request, if any.
+
+        :param endpoint:
+            Key of the endpoint requested. Latency is compared with recent ones of the same key.
+
+        :type started: float | None
+        :param started:
+            When request started (a :func:`.timer` value). Default is ``latency`` seconds ago.
+        '''
+        congested = (
+            error is not None or
+            status_code is None or
+            status_code == 429 or
+            status_code >= 500
+        )
+
+        now = timer()
+        if started is None:
+            started = now - latency
+
+        with self._condition:
+            average = self._latencies.get(endpoint)
+            if not congested and average is not None and latency > self.latency_factor * average:
+                congested = True
+
+            if congested:
+                # Requests sent before the last decrease reflect the previous limit.
+                if self._decreased is None or started >= self._decreased:
+                    self._limit = max(float(self.minimum), self._limit * self.decrease)
+                    self._decreased = now
+            else:
+                self._limit = min(float(self.maximum), self._limit + 1.0 / self._limit)
+                if average is None:
+                    self._latencies[endpoint] = latency
+                else:
+                    self._latencies[endpoint] = average + self.smoothing * (latency - average)
+                self._condition.notify_all()
+
+    def on_request(self, record):
+        '''
+        Feeds :meth:`record` with a finished request of the :class:`.Session` using this limiter.
+
+        :type record: :class:`.RequestRecord`
+        '''
+        self.record(
+            record.timings.get('total', 0.0), record.status_code, record.error,
+            (record.method, record.endpoint),
+        )
+
+
+def bulk_map(function, items, limiter, executor=None):
+    '''
+    Calls ``function`` for each item, running as many calls simultaneously as allowed by
+    ``limiter``.
+
+    :param callable function:
+        Function receiving one item.
+
+    :param iterable items:
+        Items to be processed.
+
+    :type limiter: :class:`AdaptiveLimiter` | :class:`threading.Semaphore`
+    :param limiter:
+        Limiter controlling concurrency.
+
+    :type executor: :class:`concurrent.futures.Executor` | None
+    :param executor:
+        Executor running calls. When not given a temporary one is created (``limiter`` must be an
+        :class:`AdaptiveLimiter` in that case).
+
+    :rtype: list
+    :returns:
+        Results in the same order as ``items``.
+
+    :raises Exception: the first error (following ``items`` order) raised by ``function``, after
+        all calls are finished.
+    '''
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=limiter.maximum)
+
+    def call(item):
+        try:
+            return function(item)
+        finally:
+            limiter.release()
+
+    futures = []
+    try:
+        for item in items:
+            limiter.acquire()
+            futures.append(executor.submit(call, item))
+        return [future.result() for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown(wait=True)
+
+
+class FanOut(object):
+    '''
+    Runs a producer for each item on a pool of threads, and generates what producers put on a
+    bounded queue, as it arrives (see :meth:`run`). Producers block while the consumer is behind.
+
+    :param int maxsize:
+        Maximum number of items waiting for the consumer.
+    '''
+
+    # Queue items meaning a producer returned.
+    _DONE = object()
+
+    def __init__(self, maxsize=256):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stopped = threading.Event()
+
+    def put(self, item):
+        '''
+        Called by producers to pass an item to the consumer.
+
+        :rtype: bool
+        :returns:
+            ``False`` when consumer stopped, so producer must return.
+        '''
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self, producer, item):
+        if self.stopped.is_set():
+            return
+        try:
+            producer(item)
+        except Exception as error:
+            self.put(error)
+        self.put(self._DONE)
+
+    def run(self, producer, items, max_workers):
+        '''
+        :param callable producer:
+            Function receiving one item, passing results to :meth:`put`. It may check
+            :attr:`stopped` to return early.
+
+        :param list items:
+            Items to be processed.
+
+        :param int max_workers:
+            Number of producers running simultaneously.
+
+        :rtype: iterable
+        :returns:
+            Items put by producers. When iteration is interrupted (or a producer fails) producers
+            are stopped and pending items are not processed.
+
+        :raises Exception: the first error raised by a producer.
+        '''
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = []
+        try:
+            for item in items:
+                futures.append(executor.submit(self._produce, producer, item))
+
+            remaining = len(futures)
+            while remaining:
+                result = self.queue.get()
+                if result is self._DONE:
+                    remaining -= 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            self.stopped.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
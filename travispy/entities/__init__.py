@@ -1,48 +1,99 @@
-from .account import Account
-from .branch import Branch
-from .broadcast import Broadcast
-from .build import Build
-from .commit import Commit
-from .hook import Hook
-from .job import Job
-from .log import Log
-from .repo import Repo
-from .session import Session
-from .user import User
-from .setting import Setting
+import importlib
+import sys
 
 
-COMMAND_TO_ENTITY = {
-    Account.many(): Account,
-    Account.one(): Account,
+# Entity class names and the modules where they are defined. Modules are only imported when their
+# classes are first accessed (Session, for instance, requires the heavy "requests" package).
+_MODULES = {
+    'Account': '.account',
+    'Branch': '.branch',
+    'Broadcast': '.broadcast',
+    'Build': '.build',
+    'Commit': '.commit',
+    'Hook': '.hook',
+    'Job': '.job',
+    'Log': '.log',
+    'Repo': '.repo',
+    'Session': '.session',
+    'TransportPool': '.session',
+    'User': '.user',
+    'Setting': '.setting',
+}
 
-    Branch.many(): Branch,
-    Branch.one(): Branch,
+__all__ = sorted(_MODULES) + ['COMMAND_TO_ENTITY']
 
-    Broadcast.many(): Broadcast,
-    Broadcast.one(): Broadcast,
 
-    Build.many(): Build,
-    Build.one(): Build,
+def _import(name):
+    return getattr(importlib.import_module(_MODULES[name], __name__), name)
 
-    Commit.many(): Commit,
-    Commit.one(): Commit,
 
-    Hook.many(): Hook,
-    Hook.one(): Hook,
+def _command_to_entity():
+    from .account import Account
+    from .branch import Branch
+    from .broadcast import Broadcast
+    from .build import Build
+    from .commit import Commit
+    from .hook import Hook
+    from .job import Job
+    from .log import Log
+    from .repo import Repo
+    from .user import User
+    from .setting import Setting
 
-    Job.many(): Job,
-    Job.one(): Job,
+    return {
+        Account.many(): Account,
+        Account.one(): Account,
 
-    Log.many(): Log,
-    Log.one(): Log,
+        Branch.many(): Branch,
+        Branch.one(): Branch,
 
-    Repo.many(): Repo,
-    Repo.one(): Repo,
+        Broadcast.many(): Broadcast,
+        Broadcast.one(): Broadcast,
 
-    User.many(): User,
-    User.one(): User,
+        Build.many(): Build,
+        Build.one(): Build,
 
-    Setting.many(): Setting,
-    Setting.one(): Setting,
-}
+        Commit.many(): Commit,
+        Commit.one(): Commit,
+
+        Hook.many(): Hook,
+        Hook.one(): Hook,
+
+        Job.many(): Job,
+        Job.one(): Job,
+
+        Log.many(): Log,
+        Log.one(): Log,
+
+        Repo.many(): Repo,
+        Repo.one(): Repo,
+
+        User.many(): User,
+        User.one(): User,
+
+        Setting.many(): Setting,
+        Setting.one(): Setting,
+    }
+
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        if name == 'COMMAND_TO_ENTITY':
+            value = _command_to_entity()
+        elif name in _MODULES:
+            value = _import(name)
+        else:
+            raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
+
+else:
+    # Module level __getattr__ is not supported (PEP 562): importing everything eagerly.
+    for _name in _MODULES:
+        globals()[_name] = _import(_name)
+    COMMAND_TO_ENTITY = _command_to_entity()
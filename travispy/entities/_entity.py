@@ -1,10 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import types
 
 from travispy._helpers import get_response_contents
+from travispy._jsonstream import iter_object
+from travispy.instrumentation import get_record, timer
+
+try:
+    from urllib.parse import urlencode
+except ImportError:  # Python 2
+    from urllib import urlencode
 
 log = logging.getLogger(__name__)
 
 
+# Slots that are not Travis CI information: the session, the lazy information cache and the
+# caches of Log contents.
+_NOT_FIELDS = ('_session', '__cache', '_raw', '_lines')
+
+
 class Entity(object):
     '''
     Base class for all |travisci| entities.
@@ -20,15 +34,15 @@ class Entity(object):
     __slots__ = [
         'id',
         '_session',
+
+        # A dictionary used to cache objects loaded from lazy information. It is only allocated
+        # when lazy information is first loaded (see _load_lazy_information).
         '__cache',
     ]
 
     def __init__(self, session):
         self._session = session
 
-        # A dictionary used to cache objects loaded from lazy information.
-        self.__cache = {}
-
     @classmethod
     def one(cls):
         '''
@@ -93,6 +107,7 @@ class Entity(object):
         if command not in contents:
             return
 
+        start = timer()
         info = contents.pop(command, {})
         result = cls._load(info, session)[0]
 
@@ -107,14 +122,21 @@ class Entity(object):
             if name == entity_class.one():
                 dependency = dependency[0]
 
-            setattr(result, name, dependency)
+            try:
+                setattr(result, name, dependency)
+            except AttributeError:
+                log.debug('Unknown {0} dependency {1}'.format(cls.__name__, name))
 
+        cls._loaded(response, start)
         return result
 
     # Constant that holds parameter names that should be exclusive.
     # That means no more than one of these values may be given.
     _FIND_MANY_EXCLUSIVE_PARAMETERS = []
 
+    # Longest URL sent by find_many. Longer "ids" lists are split among many requests.
+    MAX_URL_LENGTH = 2000
+
     @classmethod
     def find_many(cls, session, **kwargs):
         '''
@@ -126,10 +148,91 @@ class Entity(object):
 
         :rtype: list(:class:`.Entity`)
 
+        :raises TravisError: when response has status code different than 200.
+
+        .. note::
+            When ``ids`` does not fit in a URL of :attr:`MAX_URL_LENGTH` characters it is split
+            into chunks fetched concurrently. Results are then sorted following ``ids``.
+        '''
+        cls._check_find_many_parameters(kwargs)
+
+        chunks = _split_ids(session.uri + '/%s' % cls.many(), kwargs, cls.MAX_URL_LENGTH)
+        if chunks is None:
+            return cls._find_many(session, **kwargs)
+        return cls._find_many_chunked(session, chunks, **kwargs)
+
+    @classmethod
+    def iter_many(cls, session, chunk_size=64 * 1024, **kwargs):
+        '''
+        Streaming version of :meth:`find_many`: the response is parsed as it arrives and entities
+        are generated as soon as they are complete, so the whole response is never held in memory.
+
+        Sideloaded entities (such as commits of builds) sent before the main list are injected
+        before entities are generated. Those sent after the main list can only be injected into
+        entities already generated, once they arrive: do not rely on them before the iteration
+        is over.
+
+        :type session: :class:`.Session`
+        :param session:
+            Session that must be used to search for results.
+
+        :param int chunk_size:
+            Number of bytes read at once.
+
+        :rtype: iterable(:class:`.Entity`)
+
         :raises TravisError: when response has status code different than 200.
         '''
         from travispy.entities import COMMAND_TO_ENTITY
 
+        cls._check_find_many_parameters(kwargs)
+
+        command = cls.many()
+        response = session.get(session.uri + '/%s' % command, params=kwargs, stream=True)
+        try:
+            if response.status_code != 200:
+                get_response_contents(response)
+
+            # Sideloaded entities by dependency name, and entities already generated.
+            dependencies = {}
+            result = []
+            for name, info, _ in iter_object(response.iter_content(chunk_size)):
+                if name == command:
+                    entity = cls._load(info, session)[0]
+                    index = len(result)
+                    for dependency_name, loaded in dependencies.items():
+                        if index < len(loaded):
+                            cls._set_dependency(entity, dependency_name, loaded[index])
+                    result.append(entity)
+                    yield entity
+
+                elif name in COMMAND_TO_ENTITY:
+                    entity_class = COMMAND_TO_ENTITY[name]
+                    dependency_name = entity_class.one()
+                    loaded = dependencies.setdefault(dependency_name, [])
+                    dependency = entity_class._load(info, session)[0]
+                    if len(loaded) < len(result):
+                        cls._set_dependency(result[len(loaded)], dependency_name, dependency)
+                    loaded.append(dependency)
+
+            record = get_record(response)
+            if record is not None:
+                record.loaded()
+        finally:
+            response.close()
+
+    @classmethod
+    def _set_dependency(cls, entity, name, dependency):
+        try:
+            setattr(entity, name, dependency)
+        except AttributeError:
+            log.debug('Unknown {0} dependency {1}'.format(cls.__name__, name))
+
+    @classmethod
+    def _check_find_many_parameters(cls, kwargs):
+        '''
+        :raises RuntimeError: when not exactly one of exclusive parameters is given.
+        '''
         count = 0
         for param in cls._FIND_MANY_EXCLUSIVE_PARAMETERS:
             if param in kwargs:
@@ -139,11 +242,40 @@ class Entity(object):
             exclusive_parameters = '", "'.join(cls._FIND_MANY_EXCLUSIVE_PARAMETERS)
             raise RuntimeError('You have to supply either "%s".' % exclusive_parameters)
 
+    @classmethod
+    def _find_many_chunked(cls, session, chunks, **kwargs):
+        '''
+        Fetches each chunk of ``ids`` concurrently and merges results following ``ids`` order.
+
+        A private executor is used (instead of :func:`.bulk_map`) because lazy information is often
+        loaded by functions already running under the :class:`.AdaptiveLimiter` of ``session``.
+        '''
+        ids = kwargs.pop('ids')
+
+        def fetch(chunk):
+            return cls._find_many(session, ids=chunk, **kwargs)
+
+        workers = max(1, min(len(chunks), session.concurrency.limit))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(session.propagate(fetch), chunks))
+
+        positions = {}
+        for i, entity_id in enumerate(ids):
+            positions.setdefault(str(entity_id), i)
+        result = [entity for chunk in results for entity in chunk]
+        result.sort(key=lambda entity: positions.get(str(entity.id), len(positions)))
+        return result
+
+    @classmethod
+    def _find_many(cls, session, **kwargs):
+        from travispy.entities import COMMAND_TO_ENTITY
+
         command = cls.many()
         response = session.get(session.uri + '/%s' % command, params=kwargs)
 
         dependencies_result = {}
         contents = get_response_contents(response)
+        start = timer()
 
         # Retrieving information from Travis and loading into respective classes.
         infos = contents.pop(command, [])
@@ -157,10 +289,27 @@ class Entity(object):
         # Injecting dependencies into main objects.
         for i, entity in enumerate(result):
             for dependency_name, dependencies in dependencies_result.items():
-                setattr(entity, dependency_name, dependencies[i])
+                try:
+                    setattr(entity, dependency_name, dependencies[i])
+                except AttributeError:
+                    log.debug('Unknown {0} dependency {1}'.format(cls.__name__, dependency_name))
 
+        cls._loaded(response, start)
         return result
 
+    @staticmethod
+    def _loaded(response, start):
+        '''
+        Records the ``load`` timing of entities created from given ``response``.
+
+        :param float start:
+            Moment (see :data:`travispy.instrumentation.timer`) when loading has started.
+        '''
+        record = get_record(response)
+        if record is not None:
+            record.add_timing('load', timer() - start)
+            record.loaded()
+
     @classmethod
     def _load(cls, infos, session):
         '''
@@ -181,6 +330,9 @@ class Entity(object):
         if not isinstance(infos, list):
             infos = [infos]
 
+        # Optional structural sharing of repeated values (see travispy.interning).
+        interner = getattr(session, 'interner', None)
+
         result = []
         for info in infos:
             entity = cls(session)
@@ -191,6 +343,8 @@ class Entity(object):
                         continue
                     else:
                         key = '_body'
+                elif interner is not None:
+                    value = interner.intern(value, key)
                 try:
                     setattr(entity, key, value)
                 except AttributeError:
@@ -240,15 +394,25 @@ class Entity(object):
         .. seealso:: :meth:`.find_one`
         .. seealso:: :meth:`.find_many`
         '''
-        cache = self.__cache
+        try:
+            cache = self.__cache
+        except AttributeError:
+            cache = self.__cache = {}
 
         cached_property_name = 'cached_%s' % cache_name
         cached_property_ref_name = 'cached_%s' % lazy_information
 
+        instrumentation = getattr(self._session, 'instrumentation', None)
+
         property_ref = getattr(self, lazy_information)
         if cache.get(cached_property_ref_name) == property_ref:
+            if instrumentation is not None:
+                instrumentation.increment('cache_hits')
             return cache[cached_property_name]
 
+        if instrumentation is not None:
+            instrumentation.increment('cache_misses')
+
         result = load_method(self._session, **{load_kwarg: property_ref})
 
         # If no result was found, current cache will be deleted.
@@ -318,5 +482,138 @@ class Entity(object):
             'ids',
         )
 
+    @classmethod
+    def _fields(cls):
+        '''
+        :rtype: list(str)
+        :returns:
+            Names of all attributes that hold |travisci| information, in a stable order. The
+            session and caches (such as the raw bytes of a :class:`.Log`) are not included.
+        '''
+        fields = cls.__dict__.get('_FIELDS')
+        if fields is None:
+            fields = []
+            for klass in reversed(cls.__mro__):
+                for name in klass.__dict__.get('__slots__', ()):
+                    if name in _NOT_FIELDS or name in fields:
+                        continue
+                    # Skip slots overridden by properties (such as Repo.state).
+                    if isinstance(getattr(cls, name), types.MemberDescriptorType):
+                        fields.append(name)
+            cls._FIELDS = fields
+        return fields
+
+    def to_dict(self):
+        '''
+        :rtype: dict
+        :returns:
+            Information held by this entity, without its session. Related entities (such as
+            :class:`.Commit`) are converted too and tagged with the key ``__entity__``.
+
+        .. seealso:: :meth:`.from_dict`
+        '''
+        result = {}
+        for name in self._fields():
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                continue
+            result[name] = _to_plain(value)
+        return result
+
+    @classmethod
+    def from_dict(cls, session, info):
+        '''
+        Creates an entity from information returned by :meth:`.to_dict`.
+
+        :type session: :class:`.Session` | None
+        :param session:
+            Session bound to the created entity and its related entities.
+
+        :param dict info:
+            Entity information.
+
+        :rtype: :class:`.Entity`
+        '''
+        entity = cls(session)
+        for name, value in info.items():
+            try:
+                setattr(entity, name, _from_plain(session, value))
+            except AttributeError:
+                log.debug('Unknown {0} attribute {1}'.format(cls.__name__, name))
+        return entity
+
     def __getitem__(self, key):
         return getattr(self, key)
+
+
+def _entity_class(name):
+    from travispy.entities import COMMAND_TO_ENTITY
+    for entity_class in COMMAND_TO_ENTITY.values():
+        if entity_class.__name__ == name:
+            return entity_class
+    raise ValueError('unknown entity %s' % name)
+
+
+def _to_plain(value):
+    if isinstance(value, Entity):
+        result = value.to_dict()
+        result['__entity__'] = value.__class__.__name__
+        return result
+
+    if isinstance(value, list) and value and isinstance(value[0], Entity):
+        return [_to_plain(item) for item in value]
+
+    return value
+
+
+def _from_plain(session, value):
+    if isinstance(value, dict) and '__entity__' in value:
+        info = dict(value)
+        entity_class = _entity_class(info.pop('__entity__'))
+        return entity_class.from_dict(session, info)
+
+    if isinstance(value, list) and value and isinstance(value[0], dict) \
+            and '__entity__' in value[0]:
+        return [_from_plain(session, item) for item in value]
+
+    return value
+
+
+def _split_ids(url, params, max_length):
+    '''
+    :param str url:
+        URL without query string.
+
+    :param dict params:
+        Query parameters, possibly containing an ``ids`` list.
+
+    :param int max_length:
+        Maximum length of URLs.
+
+    :rtype: list(list) | None
+    :returns:
+        ``ids`` split into chunks that keep URLs within ``max_length``, ``None`` if it fits in a
+        single URL. Each chunk has at least one id, even when it does not fit.
+    '''
+    ids = params.get('ids')
+    if not isinstance(ids, (list, tuple)):
+        return None
+
+    others = dict((key, value) for key, value in params.items() if key != 'ids')
+    available = max_length - len(url) - len(urlencode(others, doseq=True)) - 2
+
+    chunks = []
+    chunk = []
+    length = 0
+    for entity_id in ids:
+        size = len(urlencode({'ids': entity_id})) + 1
+        if chunk and length + size > available:
+            chunks.append(chunk)
+            chunk = []
+            length = 0
+        chunk.append(entity_id)
+        length += size
+    if chunk:
+        chunks.append(chunk)
+    return chunks if len(chunks) > 1 else None
@@ -6,6 +6,8 @@ class Restartable(Stateful):
     Base class for restartable entities such as :class:`.Build` and :class:`.Job`.
     '''
 
+    __slots__ = []
+
     def cancel(self):
         '''
         Method responsible for canceling current action of this object.
@@ -14,7 +16,11 @@ class Restartable(Stateful):
         :returns:
             ``True`` if cancel request was send successfuly to |travisci|.
         '''
-        response = self._session.post(self._session.uri + '/%s/%d/cancel' % (self.many(), self.id))
+        # Canceling twice has no side effects, so it may be retried.
+        response = self._session.post(
+            self._session.uri + '/%s/%d/cancel' % (self.many(), self.id),
+            idempotent=True,
+        )
         return response.status_code == 204
 
     def restart(self):
@@ -12,6 +12,9 @@ class Build(Restartable):
     :ivar str number:
         Build number.
 
+    :ivar str event_type:
+        Event that triggered the build (``push`` or ``pull_request``).
+
     :ivar bool pull_request:
         Whether or not the build comes from a pull request.
 
@@ -48,6 +51,7 @@ class Build(Restartable):
         'repository_id',
         'commit_id',
         'number',
+        'event_type',
         'pull_request',
         'pull_request_title',
         'pull_request_number',
@@ -71,3 +75,37 @@ class Build(Restartable):
         '''
         from .repo import Repo
         return self._load_one_lazy_information(Repo, 'repository_id')
+
+    def logs(self, concurrency=None, encoding='utf-8', archive=None):
+        '''
+        Downloads logs of all jobs of this build concurrently::
+
+            >>> for line in build.logs(concurrency=8):
+            ...     print(line.job_number, line.line)
+
+        :type concurrency: int | None
+        :param concurrency:
+            Number of logs downloaded simultaneously. Default is the current limit of session
+            concurrency.
+
+        :type encoding: str | None
+        :param encoding:
+            Encoding used to decode lines. ``None`` keeps lines as ``bytes``.
+
+        :type archive: str | file | None
+        :param archive:
+            Path (or binary file object) where a gzip archive with lines of all logs is written.
+
+        :rtype: iterable(:class:`travispy.logmerge.LogLine`)
+        :returns:
+            Lines of all logs, tagged with their job number, as they arrive.
+
+        .. seealso:: :mod:`travispy.logmerge`
+        '''
+        from .job import Job
+        from travispy.logmerge import merge
+
+        jobs = getattr(self, 'jobs', None)
+        if jobs is None:
+            jobs = self._load_many_lazy_information(Job)
+        return merge(self._session, jobs, concurrency, encoding, archive)
@@ -1,4 +1,7 @@
 from ._entity import Entity
+from travispy._helpers import get_response_contents
+import mmap
+import os
 
 
 class Log(Entity):
@@ -11,42 +14,178 @@ class Log(Entity):
 
     __slots__ = [
         'job_id',
+        '_raw',
         '_body',
+        '_lines',
         'type',
     ]
 
     def __init__(self, session):
         super(Log, self).__init__(session)
+        self._raw = None
         self._body = None
+        self._lines = None
 
-    def get_archived_log(self):
-        '''
-        :rtype: str
-        :returns:
-            The archived log.
-        '''
+    def _get_archived_log(self, stream=False):
         header_overrides = {
             'Accept': 'text/plain; version=2'
         }
 
-        r = self._session.get(
+        return self._session.get(
             self._session.uri + ('/jobs/%s/log' % self.job_id),
             headers=header_overrides,
+            stream=stream,
         )
-        return r.content.decode('utf-8')
+
+    def get_archived_log(self):
+        '''
+        :rtype: str
+        :returns:
+            The archived log.
+        '''
+        return self.get_archived_log_bytes().decode('utf-8')
+
+    def get_archived_log_bytes(self):
+        '''
+        :rtype: bytes
+        :returns:
+            The archived log, not decoded.
+        '''
+        return self._get_archived_log().content
+
+    def iter_archived_log(self, chunk_size=64 * 1024):
+        '''
+        Downloads the archived log in chunks. Downloading stops when the iteration is interrupted.
+
+        :param int chunk_size:
+            Maximum number of bytes of each chunk.
+
+        :rtype: iterable(bytes)
+        :returns:
+            The archived log, as it arrives.
+
+        :raises TravisError: when response has status code different than 200.
+        '''
+        response = self._get_archived_log(stream=True)
+        try:
+            if response.status_code != 200:
+                get_response_contents(response)
+            for chunk in response.iter_content(chunk_size):
+                yield chunk
+        finally:
+            response.close()
+
+    @property
+    def raw(self):
+        '''
+        :rtype: bytes | :class:`mmap.mmap`
+        :returns:
+            The log contents fetched on demand, not decoded (so byte patterns may be searched
+            without building a ``str``). A memory-mapped file after :meth:`cache`.
+
+            Logs are held either as bytes or as text: when :attr:`body` is held (received with
+            log information or decoded already), it is encoded on each access and not kept.
+        '''
+        if self._raw is None:
+            if self._body is not None:
+                return self._body.encode('utf-8')
+            self._raw = self.get_archived_log_bytes()
+
+        return self._raw
 
     @property
     def body(self):
         '''
         :rtype: str
         :returns:
-            The raw log text fetched on demand.
+            The log text, decoded from :attr:`raw` on first access. Unless :attr:`raw` is a
+            memory map, it is then dropped (with :attr:`lines`) so the log is not held twice.
         '''
         if self._body is None:
-            self._body = self.get_archived_log()
+            raw = self.raw
+            if isinstance(raw, bytes):
+                self._body = raw.decode('utf-8')
+                self._raw = None
+                self._lines = None
+            else:
+                self._body = raw[:].decode('utf-8')
 
         return self._body
 
+    @property
+    def lines(self):
+        '''
+        :rtype: :class:`travispy.lineindex.LineIndex`
+        :returns:
+            Lines of log (``len(log.lines)``, ``log.lines[a:b]``, ``log.lines.tail(n)``...),
+            indexed on first access. Lines of :attr:`raw` are decoded only when accessed, unless
+            the log is held as text (see :attr:`body`), which is then indexed instead.
+        '''
+        if self._lines is None:
+            from travispy.lineindex import LineIndex
+            if self._raw is None and self._body is not None:
+                self._lines = LineIndex(self._body)
+            else:
+                self._lines = LineIndex(self.raw, encoding='utf-8')
+
+        return self._lines
+
+    def cache(self, path, chunk_size=64 * 1024):
+        '''
+        Keeps the log in a file, downloading it unless the file exists. :attr:`raw` becomes a
+        read-only memory map of the file, so the log is not held in memory.
+
+        :param str path:
+            File holding the log.
+
+        :param int chunk_size:
+            Maximum number of bytes downloaded at once.
+
+        :rtype: bytes | :class:`mmap.mmap`
+        :returns:
+            :attr:`raw`. Empty logs are not mapped (``b''``).
+
+        :raises TravisError: when log could not be downloaded.
+        '''
+        from travispy.lineindex import LineIndex, build_offsets
+
+        offsets = None
+        if not os.path.exists(path):
+            temporary = path + '.tmp'
+            try:
+                with open(temporary, 'wb') as stream:
+                    # Lines are indexed as they are written.
+                    offsets = build_offsets(
+                        _written(self.iter_archived_log(chunk_size), stream))
+                getattr(os, 'replace', os.rename)(temporary, path)
+            except:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                raise
+
+        with open(path, 'rb') as stream:
+            if os.fstat(stream.fileno()).st_size:
+                raw = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                raw = b''
+
+        self._raw = raw
+        self._body = None
+        self._lines = LineIndex(raw, offsets, encoding='utf-8')
+        return raw
+
+    def sections(self):
+        '''
+        :rtype: :class:`travispy.logparser.Section`
+        :returns:
+            Tree of sections delimited by ``travis_fold`` and ``travis_time`` markers.
+        '''
+        from travispy.lineindex import LineIndex
+        from travispy.logparser import parse
+
+        lines = self.lines
+        return parse(LineIndex(lines.data, lines.offsets))
+
     @property
     def job(self):
         '''
@@ -56,3 +195,9 @@ class Log(Entity):
         '''
         from .job import Job
         return self._load_one_lazy_information(Job)
+
+
+def _written(chunks, stream):
+    for chunk in chunks:
+        stream.write(chunk)
+        yield chunk
@@ -1,4 +1,87 @@
+from requests.adapters import HTTPAdapter
+from travispy.concurrency import DEFAULT_MAXIMUM, AdaptiveLimiter
+from travispy.errors import DeadlineExceeded
+from travispy.instrumentation import Instrumentation, endpoint_template, timer
+from travispy.retry import RetryBudget, RetryPolicy
+import contextlib
+import functools
 import requests
+import threading
+
+
+class _SharedAdapter(HTTPAdapter):
+    '''
+    Adapter mounted on many sessions: closing one of them must not close connections used by the
+    others. See :meth:`TransportPool.close`.
+    '''
+
+    def close(self):
+        pass
+
+    def _close(self):
+        HTTPAdapter.close(self)
+
+
+class TransportPool(object):
+    '''
+    Pool of keep-alive connections that may be shared by many :class:`.Session` objects (and so
+    by many :class:`.TravisPy` instances with different tokens) talking to the same hosts. Sessions
+    keep their own headers, so authentication remains separated.
+
+    :param int pool_connections:
+        Number of hosts whose connections are kept.
+
+    :param int pool_maxsize:
+        Maximum number of connections kept for each host. Should be at least the number of threads
+        performing requests simultaneously. Default is the highest limit of bulk operations
+        (:attr:`.AdaptiveLimiter.maximum` by default), so their connections are all reused.
+
+    :param bool pool_block:
+        Whether or not to wait for a free connection when ``pool_maxsize`` connections are in use.
+        Otherwise extra connections are created and discarded after use.
+    '''
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, pool_connections=10, pool_maxsize=DEFAULT_MAXIMUM, pool_block=False):
+        self.adapter = _SharedAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+
+    @classmethod
+    def default(cls):
+        '''
+        :rtype: :class:`TransportPool`
+        :returns:
+            The pool used by sessions created without an explicit one.
+        '''
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def mount(self, session):
+        '''
+        Makes ``session`` send its requests through this pool.
+
+        :type session: :class:`requests.Session`
+        '''
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+
+    def close(self):
+        '''
+        Closes all pooled connections. Sessions using this pool may still be used afterwards, new
+        connections will be opened.
+        '''
+        self.adapter._close()
+
+
+# Default (connect, read) timeouts, in seconds.
+DEFAULT_TIMEOUT = (10.0, 60.0)
 
 
 class Session(requests.Session):
@@ -7,8 +90,245 @@ class Session(requests.Session):
 
     :param str uri:
         URI where session will start.
+
+    :type instrumentation: :class:`.Instrumentation` | None
+    :param instrumentation:
+        Instrumentation that will collect information about requests. When not given a new one
+        is created.
+
+    :type interner: :class:`.Interner` | None
+    :param interner:
+        When given, repeated values (such as configs and states) are shared among loaded entities.
+
+    :type transport: :class:`.TransportPool` | None
+    :param transport:
+        Pool of connections used to send requests. When not given the one returned by
+        :meth:`.TransportPool.default` is used.
+
+    :type retry: :class:`.RetryPolicy` | None
+    :param retry:
+        Policy used to retry requests that failed for transient reasons. When not given requests
+        are retried up to 3 times, limited to 20% of requests.
+
+    :type rate_limiter: :class:`.RateLimiter` | None
+    :param rate_limiter:
+        Limiter consulted before every request. It may be shared among many sessions and threads.
+
+    :type concurrency: :class:`.AdaptiveLimiter` | None
+    :param concurrency:
+        Limiter controlling how many requests bulk operations run simultaneously. It is fed with
+        the outcome of every request of this session. When not given a new one is created. Its
+        limit is reported as the ``concurrency_limit`` gauge of ``instrumentation``, unless both
+        a shared ``instrumentation`` was given and ``concurrency`` was not.
+
+    :type hedge: :class:`.HedgePolicy` | None
+    :param hedge:
+        When given, slow idempotent requests are hedged: a second request is sent and the first
+        response is used.
+
+    :type timeout: float | tuple(float, float) | None
+    :param timeout:
+        Default connect and read timeouts, in seconds, of requests that do not give their own.
+        ``None`` waits forever. See also :meth:`deadline`.
+
+    Besides the arguments accepted by :meth:`requests.Session.request`, requests accept:
+
+    :keyword bool idempotent:
+        Whether or not the request may be safely repeated. See :class:`.RetryPolicy`.
     '''
 
-    def __init__(self, uri):
+    def __init__(
+            self,
+            uri,
+            instrumentation=None,
+            interner=None,
+            transport=None,
+            retry=None,
+            rate_limiter=None,
+            concurrency=None,
+            timeout=DEFAULT_TIMEOUT,
+            hedge=None):
         requests.Session.__init__(self)
         self.uri = uri
+        self.timeout = timeout
+        self.hedge = hedge
+        self._local = threading.local()
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.interner = interner
+        self.transport = transport if transport is not None else TransportPool.default()
+        self.transport.mount(self)
+        self.retry = retry if retry is not None else RetryPolicy(budget=RetryBudget())
+        self.rate_limiter = rate_limiter
+        if rate_limiter is not None:
+            self.instrumentation.register_gauge('rate_limit', lambda: rate_limiter.rate)
+
+        # A shared instrumentation reports the limit of the sessions given the same limiter.
+        if instrumentation is None or concurrency is not None:
+            limiter = concurrency if concurrency is not None else AdaptiveLimiter()
+            self.instrumentation.register_gauge('concurrency_limit', lambda: limiter.limit)
+        else:
+            limiter = AdaptiveLimiter()
+        self.concurrency = limiter
+
+    @contextlib.contextmanager
+    def deadline(self, seconds):
+        '''
+        Context manager limiting the time spent by all requests performed inside it by the current
+        thread, including retries, lazy loads and pagination::
+
+            >>> with session.deadline(5.0):
+            ...     build = Build.find_one(session, build_id)
+            ...     jobs = build.jobs
+
+        Each request timeout is reduced to the remaining time and :class:`.DeadlineExceeded` is
+        raised when no time remains before sending a request (or waiting for a retry). Note that
+        the read timeout applies to each read from the socket, so a response that keeps trickling
+        in may still overrun the deadline slightly.
+
+        Nested deadlines never extend the enclosing one.
+
+        :param float seconds:
+            Time budget.
+        '''
+        previous = getattr(self._local, 'deadline', None)
+        expires = timer() + seconds
+        if previous is None or expires < previous[0]:
+            self._local.deadline = (expires, seconds)
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def remaining(self):
+        '''
+        :rtype: float | None
+        :returns:
+            Seconds left before the current thread deadline expires, ``None`` if there is no
+            deadline.
+        '''
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return None
+        return deadline[0] - timer()
+
+    def propagate(self, function):
+        '''
+        :param callable function:
+            Function that will be called from another thread.
+
+        :rtype: callable
+        :returns:
+            ``function`` wrapped to run under the deadline of the current thread, if any.
+        '''
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            previous = getattr(self._local, 'deadline', None)
+            self._local.deadline = deadline
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._local.deadline = previous
+        return wrapper
+
+    def _check_deadline(self, delay=0.0):
+        '''
+        :raises DeadlineExceeded: when current deadline expires before ``delay`` seconds.
+
+        :rtype: float | None
+        :returns:
+            Remaining seconds, ``None`` if there is no deadline.
+        '''
+        remaining = self.remaining()
+        if remaining is not None and remaining <= delay:
+            raise DeadlineExceeded(self._local.deadline[1])
+        return remaining
+
+    def _timeout(self, timeout):
+        remaining = self._check_deadline()
+        if remaining is None:
+            return timeout
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def request(self, method, url, *args, **kwargs):
+        idempotent = kwargs.pop('idempotent', None)
+        timeout = kwargs.pop('timeout', self.timeout)
+        retry = self.retry
+        if retry.budget is not None:
+            retry.budget.deposit()
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve()
+                if delay > 0:
+                    self._check_deadline(delay)
+                    self.rate_limiter.sleep(delay)
+
+            kwargs['timeout'] = self._timeout(timeout)
+            try:
+                response = self._send(method, url, *args, **kwargs)
+            except requests.RequestException as error:
+                if not retry.is_retryable(method, attempt, error=error, idempotent=idempotent):
+                    raise
+                delay = retry.delay(attempt)
+                remaining = self.remaining()
+                if remaining is not None and delay >= remaining:
+                    raise
+            else:
+                if response.status_code == 429 and self.rate_limiter is not None:
+                    self.rate_limiter.throttled(retry.retry_after(response))
+                if not retry.is_retryable(method, attempt, response, idempotent=idempotent):
+                    return response
+                delay = retry.delay(attempt, response)
+                remaining = self.remaining()
+                if remaining is not None and delay >= remaining:
+                    # No time left to retry: let caller handle this response.
+                    return response
+                response.close()
+
+            self.instrumentation.increment('retries')
+            retry.sleep(delay)
+            attempt += 1
+
+    def _send(self, method, url, *args, **kwargs):
+        hedge = self.hedge
+        if hedge is not None and not kwargs.get('stream', False):
+            method = method.upper()
+            delay = hedge.delay(self.instrumentation, method, endpoint_template(self.uri, url))
+            if delay is not None:
+                send = self.propagate(lambda: self._request_once(method, url, *args, **kwargs))
+                return hedge.send(send, delay, lambda: self.instrumentation.increment('hedges'))
+        return self._request_once(method, url, *args, **kwargs)
+
+    def _request_once(self, method, url, *args, **kwargs):
+        record = self.instrumentation.start(method.upper(), endpoint_template(self.uri, url))
+
+        start = timer()
+        try:
+            response = requests.Session.request(self, method, url, *args, **kwargs)
+        except Exception as error:
+            record.error = error
+            record.timings['total'] = timer() - start
+            self.instrumentation.finish(record)
+            self.concurrency.on_request(record)
+            raise
+
+        total = timer() - start
+        wait = min(response.elapsed.total_seconds(), total)
+        record.status_code = response.status_code
+        record.timings['wait'] = wait
+        record.timings['total'] = total
+        if not kwargs.get('stream', False):
+            record.bytes = len(response.content)
+            record.timings['transfer'] = total - wait
+
+        response.travispy_record = record
+        self.instrumentation.finish(record)
+        self.concurrency.on_request(record)
+        return response
@@ -22,3 +22,19 @@ class TravisError(Exception):
             message = self._contents.get('file')
 
         return '[%d] %s' % (self.status_code, message or 'Unknown error')
+
+
+class DeadlineExceeded(TravisError):
+    '''
+    Raised when an operation does not finish within the time given to :meth:`.Session.deadline`.
+
+    :param float seconds:
+        Time given to the operation.
+    '''
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        TravisError.__init__(self, {
+            'status_code': 408,
+            'error': 'Deadline of %gs exceeded' % seconds,
+        })
@@ -0,0 +1,301 @@
+'''
+Grouping of failed jobs whose logs end with similar errors, to tell a systemic breakage from
+unrelated failures::
+
+    >>> for cluster in travis.cluster_failures(travis.jobs(state='failed')):
+    ...     print(cluster.count, cluster.example[-200:])
+
+Only the end of each log matters: the last lines, starting at the first one that looks like an
+error (see :func:`failure_region`). Volatile tokens (paths, hexadecimal ids, timestamps, numbers)
+are replaced by placeholders (see :func:`normalize`), then regions are compared through
+`MinHash`_ signatures of their 3-word shingles. Locality sensitive hashing (LSH) only compares
+logs sharing a band of their signatures, so clustering takes near-linear time.
+
+.. _MinHash: https://en.wikipedia.org/wiki/MinHash
+'''
+from collections import deque
+from travispy.logparser import strip_ansi
+import random
+import re
+import zlib
+
+
+# Lines that usually start the interesting part of a failed log.
+ERROR_PATTERN = re.compile(
+    r'error|fail|exception|traceback|fatal|panic|assert|denied|not found|killed|abort|stalled|'
+    r'terminated|timed? ?out',
+    re.IGNORECASE,
+)
+
+# Lines that are never part of a failure signature.
+_NOISE = re.compile(r'^\s*$|travis_(fold|time):|^Done\. Your build exited with')
+
+_VOLATILE = [
+    (re.compile(
+        r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'),
+     '<uuid>'),
+    (re.compile(
+        r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'
+        r'|\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b'),
+     '<time>'),
+    # Hexadecimal numbers and ids (such as commit shas) with both letters and digits.
+    (re.compile(r'\b(?:0x[0-9a-fA-F]+|(?=[a-fA-F]*\d)(?=\d*[a-fA-F])[0-9a-fA-F]{7,})\b'),
+     '<hex>'),
+    (re.compile(r'(?:[A-Za-z]:)?(?:[\\/][\w.@+~-]+){2,}[\\/]?'), '<path>'),
+    (re.compile(r'\d+(?:\.\d+)*'), '<n>'),
+]
+
+# Mersenne prime used by MinHash permutations.
+_PRIME = (1 << 61) - 1
+
+
+def failure_region(lines, tail_lines=100):
+    '''
+    :type lines: iterable(str) | iterable(bytes)
+    :param lines:
+        Lines of a log. Only the last ``tail_lines`` are kept in memory.
+
+    :param int tail_lines:
+        Number of lines at the end of the log where the failure is searched.
+
+    :rtype: list(str)
+    :returns:
+        Lines of the tail starting at the first one that looks like an error (the whole tail if
+        there is none), without ANSI escapes, markers and blank lines.
+
+    .. note::
+        Lines are not processed until the end is reached, so scanning long logs is cheap.
+    '''
+    tail = []
+    for line in deque(lines, maxlen=tail_lines):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        for part in line.split('\r'):
+            part = strip_ansi(part).rstrip()
+            if not _NOISE.search(part):
+                tail.append(part)
+
+    for index, line in enumerate(tail):
+        if ERROR_PATTERN.search(line):
+            return tail[index:]
+    return tail
+
+
+def normalize(line):
+    '''
+    :param str line:
+        Line of a log.
+
+    :rtype: str
+    :returns:
+        ``line`` with volatile tokens replaced by placeholders such as ``<path>`` or ``<n>``.
+    '''
+    for pattern, placeholder in _VOLATILE:
+        line = pattern.sub(placeholder, line)
+    return line
+
+
+def shingles(lines, size=3):
+    '''
+    :param list(str) lines:
+        Normalized lines.
+
+    :rtype: set(int)
+    :returns:
+        Hashes of every sequence of ``size`` consecutive words.
+    '''
+    words = ' '.join(lines).split()
+    if len(words) < size:
+        return set([zlib.crc32(' '.join(words).encode('utf-8'))]) if words else set()
+    return set(
+        zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+        for i in range(len(words) - size + 1)
+    )
+
+
+class Cluster(object):
+    '''
+    Group of similar failures.
+
+    :ivar list keys:
+        Keys (such as job ids) of failures in this cluster, in the order they were added.
+
+    :ivar str example:
+        Normalized failure region of the first failure.
+    '''
+
+    __slots__ = ['keys', 'example']
+
+    def __init__(self, example):
+        self.keys = []
+        self.example = example
+
+    @property
+    def count(self):
+        '''
+        :rtype: int
+        '''
+        return len(self.keys)
+
+    def __repr__(self):
+        return '<Cluster of %d failures>' % self.count
+
+
+class FailureClusterer(object):
+    '''
+    Incremental clustering of failures::
+
+        >>> clusterer = FailureClusterer()
+        >>> for job_id, lines in logs:
+        ...     clusterer.add(job_id, lines)
+        >>> clusters = clusterer.clusters()
+
+    :param float threshold:
+        Minimum estimated Jaccard similarity of shingles of two failures in the same cluster.
+
+    :param int num_perm:
+        Number of MinHash permutations. More permutations are slower, but more precise.
+
+    :param int bands:
+        Number of LSH bands (``num_perm`` must be a multiple). Failures are only compared when at
+        least one band of their signatures is equal. By default the number that makes pairs with
+        ``threshold`` similarity likely to share a band.
+
+    :param int tail_lines:
+        See :func:`failure_region`.
+
+    :param int seed:
+        Seed of permutations, so signatures may be compared among runs.
+    '''
+
+    def __init__(self, threshold=0.6, num_perm=64, bands=None, tail_lines=100, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands if bands is not None else self._bands(threshold, num_perm)
+        if num_perm % self.bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.tail_lines = tail_lines
+
+        generator = random.Random(seed)
+        self._permutations = [
+            (generator.randrange(1, _PRIME), generator.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+        self._keys = []
+        self._parents = []
+        self._examples = {}
+        self._signatures = {}
+        self._buckets = [{} for _ in range(self.bands)]
+
+    @staticmethod
+    def _bands(threshold, num_perm):
+        # The LSH "S curve" of b bands of r rows is steepest around (1 / b) ** (1 / r): pick the
+        # divisor of num_perm whose value is closest to (slightly below) threshold.
+        candidates = [b for b in range(1, num_perm + 1) if num_perm % b == 0]
+        return min(
+            candidates,
+            key=lambda b: abs((1.0 / b) ** (float(b) / num_perm) - threshold * 0.9),
+        )
+
+    def signature(self, hashes):
+        '''
+        :param set(int) hashes:
+            Shingle hashes (see :func:`shingles`).
+
+        :rtype: tuple(int)
+        :returns:
+            MinHash signature.
+        '''
+        if not hashes:
+            return (_PRIME,) * self.num_perm
+        return tuple(
+            min((a * value + b) % _PRIME for value in hashes)
+            for a, b in self._permutations
+        )
+
+    @staticmethod
+    def similarity(first, second):
+        '''
+        :rtype: float
+        :returns:
+            Estimated Jaccard similarity of the shingles behind two signatures.
+        '''
+        return sum(1 for a, b in zip(first, second) if a == b) / float(len(first))
+
+    def fingerprint(self, lines):
+        '''
+        Computes what is needed to cluster a failure. It may be called from many threads.
+
+        :type lines: iterable(str) | iterable(bytes)
+        :param lines:
+            Lines of log.
+
+        :rtype: tuple(str, tuple(int))
+        :returns:
+            Normalized failure region and its MinHash signature.
+        '''
+        region = [normalize(line) for line in failure_region(lines, self.tail_lines)]
+        return '\n'.join(region), self.signature(shingles(region))
+
+    def add(self, key, lines):
+        '''
+        :param key:
+            Identification of failure, such as a job id.
+
+        :type lines: iterable(str) | iterable(bytes)
+        :param lines:
+            Lines of log.
+        '''
+        self.add_fingerprint(key, *self.fingerprint(lines))
+
+    def add_fingerprint(self, key, example, signature):
+        '''
+        Same as :meth:`add`, receiving the result of :meth:`fingerprint`.
+        '''
+        index = len(self._keys)
+        self._keys.append(key)
+        self._parents.append(index)
+        # Clusters are identified by their first failure, so only its example is kept.
+        self._examples[index] = example
+
+        rows = self.num_perm // self.bands
+        for band, buckets in enumerate(self._buckets):
+            bucket = signature[band * rows:(band + 1) * rows]
+            other = buckets.setdefault(bucket, index)
+            if other == index:
+                # Signatures are only needed to compare failures with bucket representatives.
+                self._signatures[index] = signature
+            elif self._find(other) != self._find(index) and \
+                    self.similarity(signature, self._signatures[other]) >= self.threshold:
+                self._union(other, index)
+
+    def _find(self, index):
+        parents = self._parents
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    def _union(self, first, second):
+        first = self._find(first)
+        second = self._find(second)
+        if first != second:
+            first, second = min(first, second), max(first, second)
+            self._parents[second] = first
+            del self._examples[second]
+
+    def clusters(self):
+        '''
+        :rtype: list(:class:`Cluster`)
+        :returns:
+            Clusters, biggest first.
+        '''
+        clusters = {}
+        for index, key in enumerate(self._keys):
+            root = self._find(index)
+            cluster = clusters.get(root)
+            if cluster is None:
+                cluster = clusters[root] = Cluster(self._examples[root])
+            cluster.keys.append(key)
+        return sorted(clusters.values(), key=lambda cluster: -cluster.count)
@@ -0,0 +1,300 @@
+'''
+Detection of flaky jobs and tests: the ones that both passed and failed on the same commit, either
+because the commit was built many times (such as a push and a pull request build) or because jobs
+were restarted::
+
+    >>> from travispy.flaky import FlakyDetector
+    >>> detector = FlakyDetector.load('flaky.json')  # Or FlakyDetector() the first time.
+    >>> detector.update(travis, 'jayvdb/travispy')   # Only builds since last update are fetched.
+    >>> for flake in detector.flakes():
+    ...     print(flake.job, flake.test, flake.score)
+    >>> detector.save('flaky.json')
+
+Jobs are identified by their position in the build matrix (``3`` for job ``123.3``). Tests are
+known through the names of failed tests extracted from logs of failed jobs (see
+:mod:`travispy.testresults`): a test that failed in a run of a job is considered passed in runs of
+the same job (and commit) that passed, or that failed without it.
+
+Only the last ``window`` commits are kept, so scores reflect recent history. Runs are identified
+by job id and finish time, so adding a job again does nothing and a restarted job is a new run.
+'''
+from collections import OrderedDict, namedtuple
+import json
+import os
+
+
+class Flake(namedtuple('Flake', ['job', 'test', 'flips', 'commits', 'score'])):
+    '''
+    :ivar str job:
+        Position of job in build matrix.
+
+    :ivar str test:
+        Name of test, ``None`` when the job itself is flaky.
+
+    :ivar int flips:
+        Number of commits in which it both passed and failed.
+
+    :ivar int commits:
+        Number of commits in which it ran (tests: in which it failed at least once).
+
+    :ivar float score:
+        ``flips / commits``.
+    '''
+
+    __slots__ = ()
+
+
+def job_key(job):
+    '''
+    :type job: :class:`.Job`
+
+    :rtype: str
+    :returns:
+        Position of job in build matrix.
+    '''
+    return str(job.number).rpartition('.')[2]
+
+
+def _run(job):
+    # Restarted jobs keep their id, but finish again.
+    return '%s:%s' % (job.id, getattr(job, 'finished_at', None))
+
+
+class FlakyDetector(object):
+    '''
+    :param int window:
+        Number of most recent commits considered.
+
+    :param int rescan:
+        Number of builds before the last one seen that are fetched again by :meth:`update`, so
+        jobs restarted (or finished) since then are added.
+    '''
+
+    # States of jobs whose outcome is known.
+    OUTCOMES = {'passed': True, 'failed': False, 'errored': False}
+
+    def __init__(self, window=100, rescan=25):
+        self.window = window
+        self.rescan = rescan
+        # Last build number seen by update(), for each repository slug.
+        self.checkpoints = {}
+        # Runs of each job of each commit: {sha: {job: {run: [passed, failed tests, checked]}}}.
+        # Failed tests are None when unknown, and checked tells whether the log was read anyway.
+        self._commits = OrderedDict()
+
+    def __len__(self):
+        return len(self._commits)
+
+    def add(self, sha, job, run, passed, failed_tests=None, checked=False):
+        '''
+        Records a run of a job.
+
+        :param str sha:
+            Commit built.
+
+        :param str job:
+            Job identification (see :func:`job_key`).
+
+        :param str run:
+            Run identification. Runs already recorded are ignored.
+
+        :param bool passed:
+            Whether or not the job passed.
+
+        :type failed_tests: iterable(str) | None
+        :param failed_tests:
+            Names of failed tests, ``None`` when unknown. Tests of passed jobs are known to have
+            passed.
+
+        :param bool checked:
+            Whether or not the log was read, even if failed tests are still unknown (so it is not
+            needed again, see :meth:`needs_log`).
+
+        :rtype: bool
+        :returns:
+            ``True`` if run was not recorded yet (or its failed tests were unknown).
+        '''
+        if passed:
+            failed_tests = []
+        elif failed_tests is not None:
+            failed_tests = sorted(set(failed_tests))
+
+        jobs = self._commits.get(sha)
+        if jobs is None:
+            jobs = self._commits[sha] = {}
+            while len(self._commits) > self.window:
+                self._commits.popitem(last=False)
+        runs = jobs.setdefault(job, {})
+        if run not in runs:
+            runs[run] = [passed, failed_tests, checked]
+            return True
+        runs[run][2] = runs[run][2] or checked
+        if runs[run][1] is None and failed_tests is not None:
+            runs[run][1] = failed_tests
+            return True
+        return False
+
+    def add_job(self, job, sha, results=None):
+        '''
+        Records a finished :class:`.Job`. Jobs still running or canceled are ignored.
+
+        :param str sha:
+            Commit built by the job (``build.commit.sha``).
+
+        :type results: list(:class:`.TestResult`) | None
+        :param results:
+            Test results extracted from log of the job, if known. Failed tests of a job that did
+            not pass are unknown when no results were extracted (tests may not even have run), or
+            when results do not name all failed tests (such as quiet pytest output).
+
+        :rtype: bool
+        :returns:
+            ``True`` if job was recorded (see :meth:`add`).
+        '''
+        passed = self.OUTCOMES.get(job.state)
+        if passed is None:
+            return False
+
+        failed_tests = None
+        if results and all(
+                len(result.failed_tests) >= result.failed + result.errors for result in results):
+            failed_tests = [name for result in results for name in result.failed_tests]
+        return self.add(sha, job_key(job), _run(job), passed, failed_tests, results is not None)
+
+    def needs_log(self, job, sha):
+        '''
+        :rtype: bool
+        :returns:
+            Whether or not test results of given job would be used by :meth:`add_job`: it failed,
+            its failed tests are not known yet and its log was not read already.
+        '''
+        if self.OUTCOMES.get(job.state) is not False:
+            return False
+        runs = self._commits.get(sha, {}).get(job_key(job), {})
+        run = runs.get(_run(job))
+        return run is None or (run[1] is None and not run[2])
+
+    def update(self, travis, slug, concurrency=None):
+        '''
+        Fetches builds of a repository since the last update (see :attr:`rescan`), adding their
+        jobs. Logs of failed jobs are downloaded to find their failed tests.
+
+        :type travis: :class:`.TravisPy`
+
+        :param str slug:
+            Repository slug.
+
+        :type concurrency: int | None
+        :param concurrency:
+            Number of logs downloaded simultaneously.
+
+        :rtype: int
+        :returns:
+            Number of runs of jobs added.
+        '''
+        checkpoint = self.checkpoints.get(slug)
+        oldest = None if checkpoint is None else checkpoint - self.rescan
+
+        builds = []
+        for build in travis.iter_builds(slug=slug):
+            number = int(build.number)
+            if oldest is not None and number <= oldest:
+                break
+            builds.append(build)
+            if checkpoint is None and len(builds) >= self.window:
+                break
+        if not builds:
+            return 0
+
+        # Oldest first, so most recent commits stay in window.
+        builds.reverse()
+        shas = OrderedDict()
+        for build in builds:
+            commit = getattr(build, 'commit', None)
+            sha = commit.sha if commit is not None else str(build.commit_id)
+            for job_id in build.job_ids or []:
+                shas[job_id] = sha
+
+        order = dict((job_id, index) for index, job_id in enumerate(shas))
+        jobs = travis.jobs(ids=list(shas)) if shas else []
+        jobs.sort(key=lambda job: order[job.id])
+        failed = [job for job in jobs if self.needs_log(job, shas[job.id])]
+        results = travis.test_results(failed, concurrency) if failed else {}
+
+        count = 0
+        for job in jobs:
+            if self.add_job(job, shas[job.id], results.get(job.id)):
+                count += 1
+
+        newest = int(builds[-1].number)
+        self.checkpoints[slug] = newest if checkpoint is None else max(checkpoint, newest)
+        return count
+
+    def flakes(self, min_score=0.0):
+        '''
+        :param float min_score:
+            Minimum score of results.
+
+        :rtype: list(:class:`Flake`)
+        :returns:
+            Jobs and tests that both passed and failed on a commit in window, highest scores
+            first.
+        '''
+        flips = {}
+        commits = {}
+        for jobs in self._commits.values():
+            for job, runs in jobs.items():
+                runs = list(runs.values())
+
+                commits[job, None] = commits.get((job, None), 0) + 1
+                if len(set(run[0] for run in runs)) == 2:
+                    flips[job, None] = flips.get((job, None), 0) + 1
+
+                known = [set(run[1]) for run in runs if run[1] is not None]
+                if not known:
+                    continue
+                always = set.intersection(*known)
+                for test in set.union(*known):
+                    commits[job, test] = commits.get((job, test), 0) + 1
+                    if test not in always:
+                        flips[job, test] = flips.get((job, test), 0) + 1
+
+        result = [
+            Flake(job, test, count, commits[job, test], count / float(commits[job, test]))
+            for (job, test), count in flips.items()
+        ]
+        result = [flake for flake in result if flake.score >= min_score]
+        result.sort(key=lambda flake: (-flake.score, -flake.flips, flake.job, flake.test or ''))
+        return result
+
+    def save(self, path):
+        '''
+        Writes window and checkpoints as JSON, so detection may continue later.
+        '''
+        state = {
+            'window': self.window,
+            'rescan': self.rescan,
+            'checkpoints': self.checkpoints,
+            'commits': list(self._commits.items()),
+        }
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as stream:
+            json.dump(state, stream)
+        getattr(os, 'replace', os.rename)(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        :rtype: :class:`FlakyDetector`
+        :returns:
+            Detector saved in ``path``, or a new one if it does not exist.
+        '''
+        if not os.path.exists(path):
+            return cls()
+
+        with open(path) as stream:
+            state = json.load(stream)
+        detector = cls(state['window'], state['rescan'])
+        detector.checkpoints = state['checkpoints']
+        detector._commits = OrderedDict(state['commits'])
+        return detector
@@ -0,0 +1,180 @@
+'''
+Hedged requests, cutting tail latency of idempotent ``GET`` requests.
+
+When a request takes longer than most recent requests to the same endpoint, a second identical
+request is sent and whichever answers first is used::
+
+    >>> from travispy.hedging import HedgePolicy
+    >>> t = TravisPy(hedge=HedgePolicy(quantile=0.95))
+    >>> build = t.build(build_id)  # Hedged if slower than 95% of recent "GET /builds/{id}".
+
+Hedging is disabled by default. A budget keeps the extra load small (about 5% of requests by
+default). The number of hedges sent is reported as the ``hedges`` counter in
+:meth:`.TravisPy.stats`.
+'''
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from travispy.retry import RetryBudget
+import threading
+
+
+class HedgePolicy(object):
+    '''
+    :param float quantile:
+        Quantile of recent latency of an endpoint after which a request is hedged.
+
+    :param float min_delay:
+        Minimum time, in seconds, to wait before hedging.
+
+    :param int min_samples:
+        Number of recent requests to an endpoint needed before hedging its requests.
+
+    :type budget: :class:`.RetryBudget` | None
+    :param budget:
+        Budget limiting hedges. Every eligible request deposits tokens and every hedge withdraws
+        one. When not given at most 5% of requests are hedged. ``None`` means unlimited.
+
+    :param tuple(str) methods:
+        Methods that may be hedged. They must be idempotent.
+
+    :param int max_workers:
+        Maximum number of threads sending hedges. Requests are not hedged while all of them are
+        busy. The policy may be shared among many sessions.
+    '''
+
+    _DEFAULT_BUDGET = object()
+
+    def __init__(
+            self,
+            quantile=0.95,
+            min_delay=0.01,
+            min_samples=20,
+            budget=_DEFAULT_BUDGET,
+            methods=('GET',),
+            max_workers=32):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        if budget is self._DEFAULT_BUDGET:
+            budget = RetryBudget(ratio=0.05, min_retries=5)
+        self.budget = budget
+        self.methods = frozenset(method.upper() for method in methods)
+        self.max_workers = max_workers
+
+        self._executor = None
+        self._hedging = 0
+        self._lock = threading.Lock()
+
+    def delay(self, instrumentation, method, endpoint):
+        '''
+        :type instrumentation: :class:`.Instrumentation`
+        :param instrumentation:
+            Instrumentation holding recent latency of ``endpoint``.
+
+        :rtype: float | None
+        :returns:
+            Seconds to wait before hedging a request, ``None`` if it must not be hedged.
+        '''
+        if method not in self.methods:
+            return None
+        delay = instrumentation.quantile(
+            method, endpoint, self.quantile, min_samples=self.min_samples)
+        if delay is None:
+            return None
+        return max(self.min_delay, delay)
+
+    def executor(self):
+        '''
+        :rtype: :class:`concurrent.futures.ThreadPoolExecutor`
+        :returns:
+            Executor sending hedges, created on first use.
+        '''
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def close(self):
+        '''
+        Stops threads used to send hedged requests. They are created again if needed.
+        '''
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def send(self, send, delay, on_hedge=None):
+        '''
+        Calls ``send`` and, if it does not return within ``delay`` seconds and budget allows it,
+        calls it again concurrently.
+
+        The original request is sent right away from a thread of its own (so the calling thread
+        may return the hedge response first), and the hedge is sent by :meth:`executor`.
+
+        :param callable send:
+            Function sending the request and returning its response.
+
+        :param float delay:
+            Seconds to wait before hedging.
+
+        :type on_hedge: callable | None
+        :param on_hedge:
+            Called without arguments when the request is hedged.
+
+        :rtype: :class:`requests.Response`
+        :returns:
+            The first successful response. The other one is closed when it arrives.
+
+        :raises Exception: the error raised by the original request when all attempts fail.
+        '''
+        if self.budget is not None:
+            self.budget.deposit()
+
+        primary = Future()
+        thread = threading.Thread(target=_run, args=(primary, send), name='travispy-request')
+        thread.daemon = True
+        thread.start()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._start_hedge():
+            return primary.result()
+
+        if on_hedge is not None:
+            on_hedge()
+        hedge = self.executor().submit(send)
+        hedge.add_done_callback(self._finish_hedge)
+        pending = set([primary, hedge])
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            succeeded = [future for future in done if future.exception() is None]
+            if succeeded:
+                for other in pending | done:
+                    if other is not succeeded[0]:
+                        other.add_done_callback(_close_response)
+                return succeeded[0].result()
+            if not pending:
+                return primary.result()
+
+    def _start_hedge(self):
+        # Hedges waiting for a busy executor would only add load.
+        with self._lock:
+            if self._hedging >= self.max_workers:
+                return False
+            if self.budget is not None and not self.budget.withdraw():
+                return False
+            self._hedging += 1
+            return True
+
+    def _finish_hedge(self, future):
+        with self._lock:
+            self._hedging -= 1
+
+
+def _run(future, function):
+    try:
+        future.set_result(function())
+    except Exception as error:
+        future.set_exception(error)
+
+
+def _close_response(future):
+    if future.exception() is None:
+        future.result().close()
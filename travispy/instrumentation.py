@@ -0,0 +1,438 @@
+'''
+Client side instrumentation.
+
+Every request performed through a :class:`.Session` produces a :class:`RequestRecord` holding the
+endpoint template, status code, number of bytes received and the time spent on each phase:
+
+    - ``wait``: from sending the request until response headers arrive. It includes DNS lookup,
+      TCP and TLS handshakes whenever a new connection had to be opened, plus server time.
+    - ``transfer``: reading the response body.
+    - ``decode``: JSON decoding (see :func:`travispy._helpers.get_response_contents`).
+    - ``load``: creating entities from decoded contents (see :meth:`.Entity._load`).
+    - ``total``: ``wait`` + ``transfer``.
+
+Records are aggregated per endpoint into rolling histograms that may be queried through
+:meth:`Instrumentation.stats` (or :meth:`.TravisPy.stats`).
+'''
+from collections import deque
+import copy
+import threading
+import time
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:  # Python 2
+    from urlparse import urlsplit
+
+
+# Most precise clock available.
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def endpoint_template(uri, url):
+    '''
+    :param str uri:
+        Session URI (see :class:`.Session`).
+
+    :param str url:
+        Requested URL.
+
+    :rtype: str
+    :returns:
+        ``url`` path relative to ``uri`` with variable segments replaced by placeholders, so
+        ``/builds/123`` becomes ``/builds/{id}`` and ``/repos/owner/name`` becomes
+        ``/repos/{slug}``.
+    '''
+    if url.startswith(uri):
+        url = url[len(uri):]
+    path = urlsplit(url).path or '/'
+
+    segments = path.split('/')
+    if len(segments) > 3 and segments[1] == 'repos' and not segments[2].isdigit():
+        segments[2:4] = ['{slug}']
+
+    for i, segment in enumerate(segments):
+        if segment.isdigit() or (segment.startswith('-') and segment[1:].isdigit()):
+            segments[i] = '{id}'
+        elif i > 0 and segments[i - 1] == 'branches' and segment:
+            segments[i] = '{name}'
+
+    return '/'.join(segments)
+
+
+class RequestRecord(object):
+    '''
+    Information about a single request.
+
+    :ivar str method:
+        HTTP method.
+
+    :ivar str endpoint:
+        Endpoint template. See :func:`endpoint_template`.
+
+    :ivar int status_code:
+        Response status code. ``None`` when no response was received.
+
+    :ivar int bytes:
+        Number of bytes received. ``None`` for streamed responses.
+
+    :ivar dict timings:
+        Seconds spent on each phase.
+
+    :ivar Exception error:
+        Error raised while performing the request, if any.
+    '''
+
+    __slots__ = [
+        'method',
+        'endpoint',
+        'status_code',
+        'bytes',
+        'timings',
+        'error',
+        '_instrumentation',
+    ]
+
+    def __init__(self, instrumentation, method, endpoint):
+        self._instrumentation = instrumentation
+        self.method = method
+        self.endpoint = endpoint
+        self.status_code = None
+        self.bytes = None
+        self.timings = {}
+        self.error = None
+
+    def add_timing(self, phase, seconds):
+        '''
+        Adds a timing obtained after request was finished (such as ``decode``).
+
+        :param str phase:
+            Phase name.
+
+        :param float seconds:
+            Time spent on ``phase``.
+        '''
+        self.timings[phase] = seconds
+        self._instrumentation._add_timing(self, phase, seconds)
+
+    def loaded(self):
+        '''
+        Must be called once entities have been loaded from the response.
+        '''
+        for callback in self._instrumentation.after_load:
+            callback(self)
+
+
+class Histogram(object):
+    '''
+    Histogram with fixed cumulative buckets (suitable for exporting) and a rolling window of recent
+    samples used to compute quantiles.
+
+    :param tuple(float) buckets:
+        Upper bounds of buckets.
+
+    :param int window:
+        Number of recent samples kept to compute quantiles.
+    '''
+
+    DEFAULT_BUCKETS = (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+    )
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=1024):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def add(self, value):
+        '''
+        :param float value:
+            Sample to be added.
+        '''
+        i = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        self._recent.append(value)
+
+    def cumulative(self):
+        '''
+        :rtype: list(tuple(float, int))
+        :returns:
+            Pairs of bucket upper bound and cumulative count, last bound being ``float('inf')``.
+        '''
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        '''
+        :param float q:
+            Quantile between 0 and 1.
+
+        :rtype: float | None
+        :returns:
+            The ``q`` quantile of recent samples or ``None`` if there are no samples.
+        '''
+        recent = sorted(self._recent)
+        if not recent:
+            return None
+        index = min(len(recent) - 1, int(q * len(recent)))
+        return recent[index]
+
+    def summary(self):
+        '''
+        :rtype: dict
+        :returns:
+            Count, mean, max and main quantiles of samples.
+        '''
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+        }
+
+
+class EndpointStats(object):
+    '''
+    Aggregated information of all requests sent to a single endpoint.
+    '''
+
+    def __init__(self, window):
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.status = {}
+        self.timings = {}
+        self._window = window
+
+    def histogram(self, phase):
+        '''
+        :param str phase:
+            Phase name.
+
+        :rtype: :class:`Histogram`
+        '''
+        histogram = self.timings.get(phase)
+        if histogram is None:
+            histogram = self.timings[phase] = Histogram(window=self._window)
+        return histogram
+
+
+class Instrumentation(object):
+    '''
+    Collects :class:`RequestRecord` objects of a :class:`.Session` and dispatches them to
+    registered callbacks.
+
+    Callbacks receive a :class:`RequestRecord` and are registered by appending them to:
+
+        - :attr:`before_request`: called before a request is sent. Only ``method`` and
+          ``endpoint`` are available.
+        - :attr:`after_request`: called once a response is received (or the request failed) with
+          ``wait``, ``transfer`` and ``total`` timings.
+        - :attr:`after_load`: called once entities are created from the response, with ``decode``
+          and ``load`` timings too.
+
+    :param int window:
+        Number of recent samples kept per histogram.
+    '''
+
+    def __init__(self, window=1024):
+        self.before_request = []
+        self.after_request = []
+        self.after_load = []
+        self._window = window
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def _endpoint_stats(self, record):
+        key = (record.method, record.endpoint)
+        stats = self._endpoints.get(key)
+        if stats is None:
+            stats = self._endpoints[key] = EndpointStats(self._window)
+        return stats
+
+    def start(self, method, endpoint):
+        '''
+        Must be called right before a request is sent.
+
+        :rtype: :class:`RequestRecord`
+        '''
+        record = RequestRecord(self, method, endpoint)
+        for callback in self.before_request:
+            callback(record)
+        return record
+
+    def finish(self, record):
+        '''
+        Must be called once ``record`` request has finished, either successfully or not.
+        '''
+        with self._lock:
+            stats = self._endpoint_stats(record)
+            stats.count += 1
+            if record.error is not None:
+                stats.errors += 1
+            if record.status_code is not None:
+                stats.status[record.status_code] = stats.status.get(record.status_code, 0) + 1
+            if record.bytes:
+                stats.bytes += record.bytes
+            for phase, seconds in record.timings.items():
+                stats.histogram(phase).add(seconds)
+
+        for callback in self.after_request:
+            callback(record)
+
+    def _add_timing(self, record, phase, seconds):
+        with self._lock:
+            self._endpoint_stats(record).histogram(phase).add(seconds)
+
+    def increment(self, name, amount=1):
+        '''
+        Increments a counter not related to any endpoint, such as ``cache_hits``.
+
+        :param str name:
+            Counter name.
+
+        :param int amount:
+            Value added to counter.
+        '''
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counters(self):
+        '''
+        :rtype: dict(str, int)
+        :returns:
+            Current value of all counters.
+        '''
+        with self._lock:
+            return dict(self._counters)
+
+    def register_gauge(self, name, function):
+        '''
+        Registers a value that is read whenever statistics are requested, such as the current rate
+        of a :class:`.RateLimiter`.
+
+        :param str name:
+            Gauge name.
+
+        :param callable function:
+            Function without arguments returning current value.
+        '''
+        with self._lock:
+            self._gauges[name] = function
+
+    def gauges(self):
+        '''
+        :rtype: dict(str, float)
+        :returns:
+            Current value of all gauges.
+        '''
+        with self._lock:
+            gauges = list(self._gauges.items())
+        return dict((name, function()) for name, function in gauges)
+
+    def endpoints(self):
+        '''
+        :rtype: list(tuple(str, str, :class:`EndpointStats`))
+        :returns:
+            Method, endpoint template and a copy of aggregated information of each requested
+            endpoint.
+        '''
+        with self._lock:
+            return [
+                (method, endpoint, copy.deepcopy(stats))
+                for (method, endpoint), stats in sorted(self._endpoints.items())
+            ]
+
+    def quantile(self, method, endpoint, q, phase='total', min_samples=1):
+        '''
+        :param int min_samples:
+            Minimum number of recent samples needed to compute the quantile.
+
+        :rtype: float | None
+        :returns:
+            The ``q`` quantile of recent ``phase`` timings of given endpoint, ``None`` when there
+            are not enough samples.
+        '''
+        with self._lock:
+            stats = self._endpoints.get((method, endpoint))
+            histogram = stats and stats.timings.get(phase)
+            if not histogram or len(histogram._recent) < min_samples:
+                return None
+            return histogram.quantile(q)
+
+    def stats(self):
+        '''
+        :rtype: dict
+        :returns:
+            Information of all requests performed so far, with endpoints keyed by
+            ``"<method> <endpoint>"``::
+
+                {
+                    'endpoints': {
+                        'GET /builds/{id}': {
+                            'count': 10,
+                            'errors': 0,
+                            'bytes': 40960,
+                            'status': {200: 10},
+                            'timings': {'wait': {'count': 10, 'mean': 0.2, 'p50': ...}, ...},
+                        },
+                    },
+                    'counters': {'cache_hits': 3, 'cache_misses': 1},
+                    'gauges': {'rate_limit': 10.0},
+                }
+        '''
+        gauges = self.gauges()
+        with self._lock:
+            endpoints = {}
+            for (method, endpoint), stats in self._endpoints.items():
+                endpoints['%s %s' % (method, endpoint)] = {
+                    'count': stats.count,
+                    'errors': stats.errors,
+                    'bytes': stats.bytes,
+                    'status': dict(stats.status),
+                    'timings': dict(
+                        (phase, histogram.summary())
+                        for phase, histogram in stats.timings.items()
+                    ),
+                }
+            return {
+                'endpoints': endpoints,
+                'counters': dict(self._counters),
+                'gauges': gauges,
+            }
+
+    def reset(self):
+        '''
+        Discards all collected information.
+        '''
+        with self._lock:
+            self._endpoints.clear()
+            self._counters.clear()
+
+
+def get_record(response):
+    '''
+    :rtype: :class:`RequestRecord` | None
+    :returns:
+        The record related to given ``response`` when it was obtained through a :class:`.Session`.
+    '''
+    return getattr(response, 'travispy_record', None)
@@ -0,0 +1,170 @@
+'''
+Structural sharing of values repeated across entities.
+
+Entities such as :class:`.Build`, :class:`.Job` and :class:`.Branch` hold near identical
+``.travis.yml`` configs and fields like ``state``, ``queue`` or ``author_name`` repeat endlessly.
+When a :class:`.Session` has an :class:`Interner`, configs and values of those fields (see
+:attr:`Interner.FIELDS`) are deduplicated while entities are loaded::
+
+    >>> from travispy import TravisPy
+    >>> from travispy.interning import Interner
+    >>> t = TravisPy(interner=Interner())
+    >>> jobs = t.jobs(ids=build.job_ids)
+    >>> jobs[0].config is jobs[1].config  # When both configs are equal.
+    True
+
+Shared configs are read-only: trying to change them raises :class:`TypeError`.
+'''
+import hashlib
+import json
+
+
+class FrozenDict(dict):
+    '''
+    Read-only ``dict``. It still compares equal to (and serializes as) a regular ``dict``.
+    '''
+
+    __slots__ = []
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('%s is read-only' % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        import copy
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+class FrozenList(list):
+    '''
+    Read-only ``list``. It still compares equal to (and serializes as) a regular ``list``.
+    '''
+
+    __slots__ = []
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('%s is read-only' % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = reverse = sort = clear = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        import copy
+        return copy.deepcopy(list(self), memo)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+
+class Interner(object):
+    '''
+    Deduplicates equal values. It may be shared among many sessions.
+
+    :param int max_string_length:
+        Strings longer than this are kept as they are, since long values (like commit messages)
+        are rarely repeated.
+
+    :param iterable(str) fields:
+        Attributes whose strings are shared. Default is :attr:`FIELDS`.
+    '''
+
+    # Attributes with few distinct values. Others (such as timestamps, shas and messages) are
+    # mostly unique, so sharing them would only grow the table of known strings.
+    FIELDS = frozenset([
+        'state', 'last_build_state', 'event_type', 'queue', 'type', 'branch', 'locale',
+        'last_build_language', 'github_language', 'owner_name', 'author_name', 'author_email',
+        'committer_name', 'committer_email',
+    ])
+
+    def __init__(self, max_string_length=256, fields=FIELDS):
+        self.max_string_length = max_string_length
+        self.fields = frozenset(fields)
+        self._strings = {}
+        self._mappings = {}
+
+    def __len__(self):
+        return len(self._strings) + len(self._mappings)
+
+    def clear(self):
+        '''
+        Forgets all known values. Values already shared by entities are kept untouched.
+        '''
+        self._strings.clear()
+        self._mappings.clear()
+
+    def intern(self, value, field=None):
+        '''
+        :param value:
+            Attribute value as decoded from JSON.
+
+        :type field: str | None
+        :param field:
+            Name of attribute holding ``value``. Strings are only shared when it is in
+            :attr:`fields` (or not given).
+
+        :returns:
+            A shared read-only :class:`FrozenDict` for mappings, a shared string for short strings
+            and ``value`` itself otherwise.
+        '''
+        if isinstance(value, dict):
+            return self.mapping(value)
+
+        if isinstance(value, type(u'')) or isinstance(value, str):
+            if field is not None and field not in self.fields:
+                return value
+            return self.string(value)
+
+        return value
+
+    def string(self, value):
+        '''
+        :param str value:
+            String to be shared.
+
+        :rtype: str
+        '''
+        if len(value) > self.max_string_length:
+            return value
+        return self._strings.setdefault(value, value)
+
+    def mapping(self, value):
+        '''
+        :param dict value:
+            Mapping to be shared.
+
+        :rtype: :class:`FrozenDict`
+        :returns:
+            The read-only mapping shared by all values with the same contents.
+        '''
+        key = hashlib.sha1(
+            json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        ).digest()
+
+        result = self._mappings.get(key)
+        if result is None:
+            result = self._mappings.setdefault(key, self._freeze(value))
+        return result
+
+    def _freeze(self, value):
+        if isinstance(value, dict):
+            return FrozenDict(
+                (self._freeze(key), self._freeze(item)) for key, item in value.items()
+            )
+
+        if isinstance(value, list):
+            return FrozenList(self._freeze(item) for item in value)
+
+        if isinstance(value, type(u'')) or isinstance(value, str):
+            return self.string(value)
+
+        return value
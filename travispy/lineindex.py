@@ -0,0 +1,150 @@
+'''
+Random access to lines of big texts (such as job logs) without splitting them::
+
+    >>> lines = LineIndex(log.raw, encoding='utf-8')
+    >>> len(lines)
+    120000
+    >>> lines[-20:]  # Last 20 lines.
+
+The index is an :class:`array.array` of 64 bit offsets (8 bytes per line) built in a single pass.
+Texts may be ``str``, ``bytes`` or :class:`mmap.mmap` objects; offsets are counted in their items
+(characters or bytes).
+'''
+from array import array
+import re
+
+
+try:
+    array('Q')
+    _TYPECODE = 'Q'
+except ValueError:  # Python 2 has no 'Q' arrays, but its 'L' ones are 64 bit on most platforms.
+    _TYPECODE = 'L'
+
+
+def build_offsets(chunks, newline=b'\n'):
+    '''
+    Computes offsets of lines of a text received in chunks, such as the ones written to a cache
+    file.
+
+    :type chunks: iterable(bytes) | iterable(str)
+    :param chunks:
+        Text split anywhere.
+
+    :rtype: :class:`array.array`
+    :returns:
+        Offset of the start of each line, followed by the length of the text.
+    '''
+    # Iterating regular expression matches is faster than calling find() for each line.
+    pattern = re.compile(re.escape(newline))
+    offsets = array(_TYPECODE)
+    offsets.append(0)
+    position = 0
+    last = None
+    for chunk in chunks:
+        offsets.extend(position + match.end() for match in pattern.finditer(chunk))
+        position += len(chunk)
+        if chunk:
+            last = chunk[-1:]
+
+    # Text not ending with a line break has an extra (incomplete) line.
+    if last is not None and last != newline:
+        offsets.append(position)
+    return offsets
+
+
+class LineIndex(object):
+    '''
+    Sequence of lines (without line breaks) of a text.
+
+    :type data: str | bytes | :class:`mmap.mmap`
+    :param data:
+        Text whose lines are indexed.
+
+    :type offsets: :class:`array.array` | None
+    :param offsets:
+        Offsets returned by :func:`build_offsets` for ``data``, if already known. Otherwise they
+        are computed.
+
+    :type encoding: str | None
+    :param encoding:
+        Encoding used to decode lines of ``bytes`` texts when they are accessed. By default lines
+        are returned as ``bytes``.
+    '''
+
+    def __init__(self, data, offsets=None, encoding=None):
+        self.data = data
+        self.encoding = encoding
+        if offsets is None:
+            newline = '\n' if isinstance(data, type(u'')) else b'\n'
+            offsets = build_offsets([data], newline)
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _line(self, index):
+        offsets = self.offsets
+        start = offsets[index]
+        end = offsets[index + 1]
+        line = self.data[start:end]
+        if line[-1:] in (b'\n', u'\n'):
+            line = line[:-1]
+        if self.encoding is not None and isinstance(line, bytes):
+            line = line.decode(self.encoding)
+        return line
+
+    def __getitem__(self, index):
+        '''
+        :type index: int | slice
+        :param index:
+            Line index (negative values count from the end) or slice of lines.
+
+        :rtype: str | bytes | list(str) | list(bytes)
+        :returns:
+            Line (or list of lines) without line break, decoded if :attr:`encoding` is set.
+        '''
+        count = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(count)
+            if step == 1 and start < stop:
+                return self._lines(start, stop)
+            return [self._line(i) for i in range(start, stop, step)]
+
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError('line index out of range')
+        return self._line(index)
+
+    def _lines(self, start, stop):
+        # Slicing once is cheaper than slicing each line.
+        offsets = self.offsets
+        base = offsets[start]
+        block = self.data[base:offsets[stop]]
+        if self.encoding is not None and isinstance(block, bytes):
+            block = block.decode(self.encoding)
+        newline = block[-1:] in (b'\n', u'\n')
+        result = block.split(b'\n' if isinstance(block, bytes) else u'\n')
+        return result[:-1] if newline else result
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tail(self, count):
+        '''
+        :rtype: list(str) | list(bytes)
+        :returns:
+            Last ``count`` lines.
+        '''
+        return self[-count:] if count > 0 else []
+
+    def offset(self, index):
+        '''
+        :rtype: int
+        :returns:
+            Position of the start of given line.
+        '''
+        if index < 0:
+            index += len(self)
+        return self.offsets[index]
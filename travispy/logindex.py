@@ -0,0 +1,439 @@
+'''
+Trigram index of logs kept in a :class:`.LogStore`, so searches only read logs that may match::
+
+    >>> from travispy.logindex import TrigramIndex
+    >>> index = TrigramIndex.load(store)  # Or TrigramIndex(store) the first time.
+    >>> index.update()                    # Indexes logs stored since last update.
+    >>> for match in index.search(b'Segmentation fault'):
+    ...     print(match.job_id, match.line)
+    >>> index.save()
+
+For every trigram (sequence of 3 bytes) found in any line of a log, the index keeps the logs
+containing it. A query is split into trigrams and only logs containing all of them are read and
+searched line by line. Regular expressions are supported too: literal parts that every match must
+contain are used to select logs (see :func:`required_literals`).
+
+Indexes are not thread-safe.
+'''
+from array import array
+from travispy.logsearch import Match, search_block
+import os
+import re
+import struct
+import zlib
+
+
+_MAGIC = b'TPTI'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sBII')
+_DOCUMENT = struct.Struct('<qd')
+_POSTING = struct.Struct('<3sI')
+
+_TRIGRAM = re.compile(b'...', re.DOTALL)
+
+# Flags of compiled patterns that do not change which literals are required.
+_LITERAL_FLAGS = re.MULTILINE | re.DOTALL
+
+# Characters with special meaning in regular expressions.
+_META = set('.^$*+?{}[]()|\\')
+
+
+def trigrams(data):
+    '''
+    :param bytes data:
+        Log contents.
+
+    :rtype: set(bytes)
+    :returns:
+        Distinct trigrams of lines of ``data``. Trigrams spanning many lines are not included.
+    '''
+    # Repeated lines are common in logs. Trigrams are extracted by a regular expression (at each
+    # of the 3 possible alignments) because it is faster than slicing in a loop.
+    lines = b'\n'.join(set(data.split(b'\n')))
+    result = set()
+    for start in range(3):
+        result.update(_TRIGRAM.findall(lines, start))
+    return set(trigram for trigram in result if b'\n' not in trigram)
+
+
+# Escapes of single characters, other than the escaped character itself.
+_ESCAPES = {'a': '\a', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v'}
+_HEX = set('0123456789abcdefABCDEF')
+_OCTAL = set('01234567')
+
+
+def _escape(text, i):
+    '''
+    :param str text:
+        Regular expression.
+
+    :param int i:
+        Position of a backslash in ``text``.
+
+    :rtype: tuple(str | None, int)
+    :returns:
+        Character matched by escape sequence (``None`` if it is not a literal, as ``\\d`` or a
+        back reference) and position following it.
+    '''
+    following = text[i + 1:i + 2]
+    i += 2
+    if not following.isalnum():
+        return following or None, i
+    if following in _ESCAPES:
+        return _ESCAPES[following], i
+
+    if following == 'x':
+        end = i
+        while end < i + 2 and text[end:end + 1] in _HEX:
+            end += 1
+        return (chr(int(text[i:end], 16)) if end > i else None), end
+    digits = text[i - 1:i + 2]
+    if following == '0' or (len(digits) == 3 and set(digits) <= _OCTAL):
+        # Octal: "\\0" followed by up to 2 digits, or 3 digits.
+        end = i
+        while end < i + 2 and text[end:end + 1] in _OCTAL:
+            end += 1
+        return chr(int(text[i - 1:end], 8) & 0xff), end
+    if following.isdigit():
+        # Back reference to group 1 to 99.
+        return None, i + 1 if text[i:i + 1].isdigit() else i
+    if following == 'N' and text[i:i + 1] == '{':
+        end = text.find('}', i)
+        return None, end + 1 if end != -1 else len(text)
+    if following in 'uU':
+        size = 4 if following == 'u' else 8
+        end = i
+        while end < i + size and text[end:end + 1] in _HEX:
+            end += 1
+        return None, end
+    return None, i
+
+
+def _class_end(text, i):
+    '''
+    :param str text:
+        Regular expression.
+
+    :param int i:
+        Position of the ``[`` starting a character class in ``text``.
+
+    :rtype: int
+    :returns:
+        Position of the ``]`` ending it, ``-1`` when not found.
+    '''
+    i += 1
+    if text[i:i + 1] == '^':
+        i += 1
+    # A "]" right after "[" (or "[^") is part of the class.
+    if text[i:i + 1] == ']':
+        i += 1
+    while i < len(text):
+        if text[i] == '\\':
+            i += 2
+        elif text[i] == ']':
+            return i
+        else:
+            i += 1
+    return -1
+
+
+def required_literals(pattern):
+    '''
+    Conservative extraction of literal parts of a regular expression that every match contains.
+
+    :param bytes pattern:
+        Regular expression.
+
+    :rtype: list(bytes)
+    :returns:
+        Literal parts. Empty when none could be determined (for instance when pattern has
+        alternatives).
+    '''
+    if isinstance(pattern, str) and not isinstance(pattern, bytes):
+        pattern = pattern.encode('utf-8')
+    text = pattern.decode('latin-1')
+    if '|' in text or '(?' in text:
+        return []
+
+    result = []
+    run = []
+    depth = 0
+    i = 0
+
+    def flush():
+        if depth == 0 and run:
+            result.append(''.join(run).encode('latin-1'))
+        del run[:]
+
+    while i < len(text):
+        character = text[i]
+        if character == '\\':
+            literal, i = _escape(text, i)
+            if literal is not None:
+                run.append(literal)
+            else:
+                flush()
+            continue
+
+        if character not in _META:
+            run.append(character)
+        elif character in '*?{':
+            # Previous character is optional.
+            if run:
+                run.pop()
+            flush()
+            if character == '{':
+                i = text.find('}', i) if '}' in text[i:] else len(text)
+        elif character == '+':
+            flush()
+        else:
+            flush()
+            if character == '[':
+                i = _class_end(text, i)
+                if i == -1:
+                    return []
+            elif character == '(':
+                depth += 1
+            elif character == ')':
+                depth -= 1
+                # Group may be optional.
+                following = text[i + 1:i + 2]
+                if following and following in '*?{':
+                    i += 1
+                    if following == '{':
+                        i = text.find('}', i) if '}' in text[i:] else len(text)
+        i += 1
+    flush()
+    return result
+
+
+class TrigramIndex(object):
+    '''
+    :type store: :class:`.LogStore`
+    :param store:
+        Store holding logs.
+
+    :type path: str | None
+    :param path:
+        File where index is saved. Default is ``trigrams.idx`` inside store directory.
+    '''
+
+    def __init__(self, store, path=None):
+        self.store = store
+        self.path = path if path is not None else os.path.join(store.directory, 'trigrams.idx')
+        # Indexed versions of logs: job id and modification time of each document number.
+        self._documents = []
+        # Current document of each job id.
+        self._live = {}
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, job_id):
+        return job_id in self._live
+
+    def add(self, job_id):
+        '''
+        Indexes (or indexes again) a stored log.
+        '''
+        path = self.store.path(job_id)
+        mtime = os.path.getmtime(path)
+        data = self.store.read(job_id)
+
+        document = len(self._documents)
+        self._documents.append((job_id, mtime))
+        self._live[job_id] = document
+
+        postings = self._postings
+        for trigram in trigrams(data):
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = array('I')
+            posting.append(document)
+
+    def remove(self, job_id):
+        '''
+        Removes a log from index. Its entries are discarded on next :meth:`save`.
+        '''
+        self._live.pop(job_id, None)
+
+    def update(self):
+        '''
+        Indexes logs stored (or replaced) since last update and removes deleted ones.
+
+        :rtype: int
+        :returns:
+            Number of logs indexed.
+        '''
+        stored = set()
+        count = 0
+        for job_id in self.store.job_ids():
+            stored.add(job_id)
+            document = self._live.get(job_id)
+            if document is not None:
+                mtime = os.path.getmtime(self.store.path(job_id))
+                if self._documents[document][1] == mtime:
+                    continue
+            self.add(job_id)
+            count += 1
+
+        for job_id in list(self._live):
+            if job_id not in stored:
+                self.remove(job_id)
+        return count
+
+    def candidates(self, literals):
+        '''
+        :param list(bytes) literals:
+            Strings that must be found in logs.
+
+        :rtype: list(int)
+        :returns:
+            Sorted ids of jobs whose logs may contain all ``literals`` (on any line). All indexed
+            jobs when no trigram could be extracted from ``literals``.
+        '''
+        query = set()
+        for literal in literals:
+            query.update(trigrams(literal))
+
+        if not query:
+            return sorted(self._live)
+
+        postings = sorted(
+            (self._postings.get(trigram, ()) for trigram in query),
+            key=len,
+        )
+        documents = set(postings[0])
+        for posting in postings[1:]:
+            if not documents:
+                break
+            documents.intersection_update(posting)
+
+        indexed = self._documents
+        live = self._live
+        return sorted(
+            indexed[document][0] for document in documents
+            if live.get(indexed[document][0]) == document
+        )
+
+    def search(self, pattern, max_count=None):
+        '''
+        :type pattern: bytes | str | compiled pattern
+        :param pattern:
+            Regular expression matched against each line.
+
+        :type max_count: int | None
+        :param max_count:
+            Maximum number of matching lines of each log.
+
+        :rtype: iterable(:class:`.Match`)
+        :returns:
+            Matches, following job ids order.
+        '''
+        if hasattr(pattern, 'search'):
+            compiled = pattern
+            # Other flags (such as re.IGNORECASE or re.VERBOSE) change what literals match.
+            if pattern.flags & ~_LITERAL_FLAGS:
+                literals = []
+            else:
+                literals = required_literals(pattern.pattern)
+        else:
+            if not isinstance(pattern, bytes):
+                pattern = pattern.encode('utf-8')
+            compiled = re.compile(pattern)
+            literals = required_literals(pattern)
+
+        for job_id in self.candidates(literals):
+            matches = search_block(compiled, self.store.read(job_id))
+            for line_number, offset, line in matches[:max_count]:
+                yield Match(job_id, line_number, offset, line.decode('utf-8', 'replace'))
+
+    def save(self, path=None):
+        '''
+        Writes index, discarding entries of removed logs.
+
+        :type path: str | None
+        :param path:
+            File where index is written. Default is :attr:`path`.
+        '''
+        path = path if path is not None else self.path
+
+        # Renumbering documents, so only live ones are kept.
+        numbers = {}
+        documents = []
+        for job_id, document in sorted(self._live.items(), key=lambda item: item[1]):
+            numbers[document] = len(documents)
+            documents.append(self._documents[document])
+
+        chunks = [_HEADER.pack(_MAGIC, VERSION, len(documents), 0)]
+        chunks.extend(_DOCUMENT.pack(job_id, mtime) for job_id, mtime in documents)
+        postings = {}
+        for trigram, posting in self._postings.items():
+            posting = array('I', (numbers[d] for d in posting if d in numbers))
+            if posting:
+                postings[trigram] = posting
+                chunks.append(_POSTING.pack(trigram, len(posting)))
+                chunks.append(_to_bytes(posting))
+        chunks[0] = _HEADER.pack(_MAGIC, VERSION, len(documents), len(postings))
+
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as stream:
+            stream.write(zlib.compress(b''.join(chunks)))
+        getattr(os, 'replace', os.rename)(temporary, path)
+
+        self._documents = documents
+        self._live = dict((job_id, i) for i, (job_id, _) in enumerate(documents))
+        self._postings = postings
+
+    @classmethod
+    def load(cls, store, path=None):
+        '''
+        :type store: :class:`.LogStore`
+
+        :type path: str | None
+        :param path:
+            File where index was saved. Default is ``trigrams.idx`` inside store directory.
+
+        :rtype: :class:`TrigramIndex`
+        :returns:
+            Saved index, or an empty one if ``path`` does not exist.
+        '''
+        index = cls(store, path)
+        if not os.path.exists(index.path):
+            return index
+
+        with open(index.path, 'rb') as stream:
+            data = zlib.decompress(stream.read())
+
+        magic, version, document_count, posting_count = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != VERSION:
+            raise ValueError('Invalid trigram index: %s' % index.path)
+
+        offset = _HEADER.size
+        for i in range(document_count):
+            job_id, mtime = _DOCUMENT.unpack_from(data, offset)
+            offset += _DOCUMENT.size
+            index._documents.append((job_id, mtime))
+            index._live[job_id] = i
+
+        for _ in range(posting_count):
+            trigram, count = _POSTING.unpack_from(data, offset)
+            offset += _POSTING.size
+            posting = array('I')
+            _from_bytes(posting, data[offset:offset + count * posting.itemsize])
+            offset += count * posting.itemsize
+            index._postings[trigram] = posting
+        return index
+
+
+def _to_bytes(values):
+    return values.tobytes() if hasattr(values, 'tobytes') else values.tostring()
+
+
+def _from_bytes(values, data):
+    if hasattr(values, 'frombytes'):
+        values.frombytes(data)
+    else:  # Python 2
+        values.fromstring(data)
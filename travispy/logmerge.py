@@ -0,0 +1,129 @@
+'''
+Downloading logs of many jobs (such as all jobs of a build) at once::
+
+    >>> for line in build.logs(archive='build.log.gz'):
+    ...     if 'Error' in line.line:
+    ...         print(line.job_number, line.line)
+
+Logs are downloaded concurrently and their lines are generated as they arrive, so the time to get
+all logs is roughly the time to get the slowest one. Lines of each log are generated in order, but
+lines of different logs are interleaved.
+
+Lines may also be written to a combined archive: a gzip file where each line is prefixed with its
+job number and a tab (``3.1\\t$ pytest``).
+'''
+from collections import namedtuple
+from travispy._helpers import iter_blocks, split_lines
+from travispy.concurrency import FanOut
+import gzip
+
+
+class LogLine(namedtuple('LogLine', ['job_number', 'job_id', 'line_number', 'line'])):
+    '''
+    :ivar str job_number:
+        Number of job (such as ``3.1``), ``None`` when unknown.
+
+    :ivar int job_id:
+        Job whose log has this line.
+
+    :ivar int line_number:
+        Index of line in log, starting at 0.
+
+    :ivar line:
+        Line without line ending: ``str`` (or ``bytes`` when no encoding was given).
+    '''
+
+    __slots__ = ()
+
+
+class _Worker(object):
+    '''
+    Downloads logs, putting blocks of lines on a :class:`.FanOut` queue shared with the consumer.
+    '''
+
+    def __init__(self, session, chunk_size, fan_out):
+        self.session = session
+        self.chunk_size = chunk_size
+        self.fan_out = fan_out
+
+    def download(self, job):
+        from travispy.entities import Log
+
+        log = Log(self.session)
+        log.job_id = job.id
+
+        line_number = 0
+        chunks = log.iter_archived_log(self.chunk_size)
+        try:
+            for block in iter_blocks(chunks):
+                lines = split_lines(block)
+                if not self.fan_out.put((job, line_number, lines)):
+                    return
+                line_number += len(lines)
+        finally:
+            chunks.close()
+
+
+def merge(session, jobs, concurrency=None, encoding='utf-8', archive=None, chunk_size=64 * 1024):
+    '''
+    :type session: :class:`.Session`
+
+    :param iterable(:class:`.Job`) jobs:
+        Jobs whose logs must be downloaded.
+
+    :type concurrency: int | None
+    :param concurrency:
+        Number of logs downloaded simultaneously. Default is the current limit of
+        ``session.concurrency``.
+
+    :type encoding: str | None
+    :param encoding:
+        Encoding used to decode lines (invalid sequences are replaced). ``None`` keeps lines as
+        ``bytes``.
+
+    :type archive: str | file | None
+    :param archive:
+        Path (or binary file object) where a combined gzip archive is written. It is complete
+        only when all lines were iterated.
+
+    :param int chunk_size:
+        Number of bytes read at once from each log.
+
+    :rtype: iterable(:class:`LogLine`)
+    :returns:
+        Lines, as they arrive. Pending downloads are stopped when iteration is interrupted.
+
+    :raises TravisError: when a log could not be downloaded.
+    '''
+    jobs = list(jobs)
+    if not jobs:
+        return
+    if concurrency is None:
+        concurrency = session.concurrency.limit
+    concurrency = max(1, min(concurrency, len(jobs)))
+
+    if archive is None:
+        writer = None
+    elif hasattr(archive, 'write'):
+        writer = gzip.GzipFile(fileobj=archive, mode='wb')
+    else:
+        writer = gzip.open(archive, 'wb')
+
+    fan_out = FanOut()
+    worker = _Worker(session, chunk_size, fan_out)
+    blocks = fan_out.run(session.propagate(worker.download), jobs, concurrency)
+    try:
+        for job, line_number, lines in blocks:
+            job_number = getattr(job, 'number', None)
+            if writer is not None:
+                prefix = (job_number or str(job.id)).encode('utf-8') + b'\t'
+                writer.write(b''.join(prefix + line + b'\n' for line in lines))
+            for line in lines:
+                if encoding is not None:
+                    line = line.decode(encoding, 'replace')
+                yield LogLine(job_number, job.id, line_number, line)
+                line_number += 1
+    finally:
+        blocks.close()
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,246 @@
+'''
+Structure of job logs, as delimited by markers written by |travisci|::
+
+    travis_fold:start:install.1
+    travis_time:start:0a6e1b4c
+    $ pip install -r requirements.txt
+    ...
+    travis_time:end:0a6e1b4c:start=1500000000000000000,finish=1500000012000000000,duration=...
+    travis_fold:end:install.1
+
+:func:`parse` reads lines in a single pass, keeping only open sections in memory, and returns a
+tree of :class:`Section` objects::
+
+    >>> from travispy.logparser import parse
+    >>> root = parse(log.lines)
+    >>> for section, depth in root.walk():
+    ...     print('  ' * depth, section.name, section.duration)
+
+Lines may be ``str`` or ``bytes`` (such as the ones from ``response.iter_lines()``). ANSI escape
+sequences are ignored.
+'''
+import re
+
+
+_ANSI = r'\x1b\[[0-9;?]*[A-Za-z]'
+_MARKER = r'travis_(fold|time):(start|end):([^:\s]+)(?::(\S*))?'
+
+
+class _Patterns(object):
+    '''
+    Patterns and literals for either ``str`` or ``bytes`` lines.
+    '''
+
+    def __init__(self, convert):
+        self.ansi = re.compile(convert(_ANSI))
+        self.marker = re.compile(convert(_MARKER))
+        self.prefix = convert('travis_')
+        self.escape = convert('\x1b')
+        self.carriage_return = convert('\r')
+        self.convert = convert
+
+
+_TEXT = _Patterns(lambda value: value)
+_BYTES = _Patterns(lambda value: value.encode('ascii'))
+
+
+def strip_ansi(line):
+    '''
+    :type line: str | bytes
+    :rtype: str | bytes
+    :returns:
+        ``line`` without ANSI escape sequences (colors, cursor movements...).
+    '''
+    patterns = _BYTES if isinstance(line, bytes) else _TEXT
+    if patterns.escape not in line:
+        return line
+    return patterns.ansi.sub(patterns.convert(''), line)
+
+
+class Section(object):
+    '''
+    Part of a log.
+
+    :ivar str kind:
+        ``'root'`` for the whole log, ``'fold'`` for ``travis_fold`` sections and ``'time'`` for
+        ``travis_time`` sections (usually a single command).
+
+    :ivar str name:
+        Fold name (such as ``install.1``), command of timed sections (the first line after the
+        marker, such as ``$ pytest``) or ``None``.
+
+    :ivar int start_line:
+        Index of first line.
+
+    :ivar int end_line:
+        Index of line after the last one (so lines are ``lines[start_line:end_line]``).
+
+    :ivar start:
+        Moment, in nanoseconds since epoch, when section started or ``None`` if unknown. Folds
+        take it from their first timed section.
+
+    :ivar finish:
+        Moment, in nanoseconds since epoch, when section finished or ``None`` if unknown. Folds
+        take it from their last timed section.
+
+    :ivar list(Section) children:
+        Nested sections.
+    '''
+
+    __slots__ = ['kind', 'name', 'start_line', 'end_line', 'start', 'finish', 'children']
+
+    def __init__(self, kind, name, start_line):
+        self.kind = kind
+        self.name = name
+        self.start_line = start_line
+        self.end_line = None
+        self.start = None
+        self.finish = None
+        self.children = []
+
+    def __repr__(self):
+        return '<Section %s %r lines %s-%s>' % (
+            self.kind, self.name, self.start_line, self.end_line)
+
+    @property
+    def duration(self):
+        '''
+        :rtype: int | None
+        :returns:
+            Wall-clock duration in nanoseconds, ``None`` if unknown.
+        '''
+        if self.start is None or self.finish is None:
+            return None
+        return self.finish - self.start
+
+    def walk(self, depth=0):
+        '''
+        :rtype: iterable(tuple(Section, int))
+        :returns:
+            This section and all nested ones (depth first) with their depth.
+        '''
+        yield self, depth
+        for child in self.children:
+            for item in child.walk(depth + 1):
+                yield item
+
+    def _extend(self, start, finish):
+        if start is not None and (self.start is None or start < self.start):
+            self.start = start
+        if finish is not None and (self.finish is None or finish > self.finish):
+            self.finish = finish
+
+
+class LogParser(object):
+    '''
+    Incremental parser: call :meth:`feed` with each line then :meth:`close`. See :func:`parse`.
+    '''
+
+    def __init__(self):
+        self.root = Section('root', None, 0)
+        self._stack = [self.root]
+        self._line = 0
+        self._unnamed = None
+        self._patterns = None
+
+    def feed(self, line):
+        '''
+        :type line: str | bytes
+        :param line:
+            Next line of log.
+        '''
+        patterns = self._patterns
+        if patterns is None:
+            patterns = self._patterns = _BYTES if isinstance(line, bytes) else _TEXT
+
+        # Fast path: most lines have no markers and do not name a timed section.
+        if patterns.prefix in line:
+            for part in line.split(patterns.carriage_return):
+                self._part(strip_ansi(part))
+        elif self._unnamed is not None:
+            self._name(strip_ansi(line))
+        self._line += 1
+
+    def _part(self, part):
+        match = self._patterns.marker.match(part)
+        if match is None:
+            if self._unnamed is not None:
+                self._name(part)
+            return
+
+        kind, event, name, data = match.groups()
+        if isinstance(kind, bytes):
+            kind, event, name = (value.decode('utf-8', 'replace') for value in (kind, event, name))
+            data = data.decode('ascii', 'replace') if data is not None else None
+
+        line = self._line
+        if event == 'start':
+            section = Section(kind, None if kind == 'time' else name, line)
+            self._stack[-1].children.append(section)
+            self._stack.append(section)
+            if kind == 'time':
+                self._unnamed = section
+        else:
+            self._end(kind, name, data, line)
+
+    def _name(self, text):
+        text = text.strip()
+        if text:
+            self._unnamed.name = text.decode('utf-8', 'replace') \
+                if isinstance(text, bytes) else text
+            self._unnamed = None
+
+    def _end(self, kind, name, data, line):
+        stack = self._stack
+        for index in range(len(stack) - 1, 0, -1):
+            if stack[index].kind == kind and (kind == 'time' or stack[index].name == name):
+                break
+        else:
+            return  # End without start.
+
+        section = stack[index]
+        if kind == 'time' and data:
+            values = dict(item.split('=', 1) for item in data.split(',') if '=' in item)
+            try:
+                section._extend(int(values['start']), int(values['finish']))
+            except (KeyError, ValueError):
+                pass
+
+        # Sections opened inside this one and never closed end with it.
+        while len(stack) > index:
+            self._close(stack.pop(), line + 1)
+
+    def _close(self, section, end_line):
+        section.end_line = end_line
+        if section is self._unnamed:
+            self._unnamed = None
+        self._stack[-1]._extend(section.start, section.finish)
+
+    def close(self):
+        '''
+        Closes sections still open.
+
+        :rtype: :class:`Section`
+        :returns:
+            Root section.
+        '''
+        while len(self._stack) > 1:
+            self._close(self._stack.pop(), self._line)
+        self.root.end_line = self._line
+        return self.root
+
+
+def parse(lines):
+    '''
+    :type lines: iterable(str) | iterable(bytes)
+    :param lines:
+        Log lines.
+
+    :rtype: :class:`Section`
+    :returns:
+        Root section, spanning the whole log.
+    '''
+    parser = LogParser()
+    for line in lines:
+        parser.feed(line)
+    return parser.close()
@@ -0,0 +1,210 @@
+'''
+Searching job logs with regular expressions, without downloading them first::
+
+    >>> jobs = travis.jobs(state='failed')
+    >>> for match in travis.search_logs(jobs, br'MemoryError', max_count=1):
+    ...     print(match.job_id, match.line_number, match.line)
+
+Logs are downloaded concurrently and matched as their chunks arrive. Matches of each log are
+generated in order, but matches of different logs are interleaved. Patterns are matched against
+single lines (``bytes``, without the line ending).
+
+Matching runs on the downloading threads, unless ``processes`` is given: blocks of lines are then
+matched by a :class:`concurrent.futures.ProcessPoolExecutor`, which is worth it for expensive
+patterns only.
+'''
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from travispy._helpers import iter_blocks
+from travispy.concurrency import FanOut
+import re
+
+
+class Match(namedtuple('Match', ['job_id', 'line_number', 'offset', 'line'])):
+    '''
+    :ivar int job_id:
+        Job whose log matched.
+
+    :ivar int line_number:
+        Index of matching line, starting at 0 (as in :meth:`.LogStore.lines`).
+
+    :ivar int offset:
+        Position, in bytes, of match in log.
+
+    :ivar str line:
+        Matching line, decoded as UTF-8.
+    '''
+
+    __slots__ = ()
+
+
+def line_pattern(pattern):
+    '''
+    :param pattern:
+        Compiled pattern.
+
+    :returns:
+        ``pattern`` with :data:`re.MULTILINE`, so ``^`` and ``$`` match at the start and end of
+        each line of a block.
+    '''
+    if pattern.flags & re.MULTILINE:
+        return pattern
+    return re.compile(pattern.pattern, pattern.flags | re.MULTILINE)
+
+
+def search_block(pattern, block):
+    '''
+    :param pattern:
+        Compiled ``bytes`` pattern. It is matched against each line on its own.
+
+    :param bytes block:
+        Complete lines, each one ending with ``\\n``.
+
+    :rtype: list(tuple(int, int, bytes))
+    :returns:
+        For each matching line, its index and the match position (both relative to ``block``) and
+        the line itself.
+    '''
+    pattern = line_pattern(pattern)
+    result = []
+    line_number = 0
+    counted = 0
+    position = 0
+    search = pattern.search
+    while position <= len(block):
+        # Searching the whole block is faster than searching each line, but matches spanning
+        # many lines (such as "\\s+" matching "\\n") are searched again within their first line.
+        match = search(block, position)
+        if match is None:
+            break
+        start = block.rfind(b'\n', 0, match.start()) + 1
+        end = block.find(b'\n', match.start())
+        if end == -1:
+            end = len(block)
+        if match.end() > end:
+            match = search(block, match.start(), end)
+
+        if match is not None:
+            line_number += block.count(b'\n', counted, start)
+            counted = start
+            result.append((line_number, match.start(), block[start:end]))
+        position = end + 1
+    return result
+
+
+class _Worker(object):
+    '''
+    Searches logs, putting matches on a :class:`.FanOut` queue shared with the consumer.
+    '''
+
+    def __init__(self, session, pattern, max_count, processes, chunk_size, fan_out):
+        self.session = session
+        self.pattern = pattern
+        self.max_count = max_count
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.fan_out = fan_out
+
+    def search(self, job_id):
+        from travispy.entities import Log
+
+        log = Log(self.session)
+        log.job_id = job_id
+
+        count = 0
+        line_number = 0
+        offset = 0
+        chunks = log.iter_archived_log(self.chunk_size)
+        try:
+            for block in iter_blocks(chunks):
+                if self.fan_out.stopped.is_set():
+                    return
+                count = self.block(job_id, block, line_number, offset, count)
+                if count is None:
+                    return
+                line_number += block.count(b'\n')
+                offset += len(block)
+        finally:
+            chunks.close()
+
+    def block(self, job_id, block, line_number, offset, count):
+        '''
+        :rtype: int | None
+        :returns:
+            Number of matches found so far in log, ``None`` when searching it must stop.
+        '''
+        if self.processes is None:
+            matches = search_block(self.pattern, block)
+        else:
+            matches = self.processes.submit(search_block, self.pattern, block).result()
+
+        for index, position, line in matches:
+            match = Match(
+                job_id, line_number + index, offset + position, line.decode('utf-8', 'replace'))
+            if not self.fan_out.put(match):
+                return None
+            count += 1
+            if self.max_count is not None and count >= self.max_count:
+                return None
+        return count
+
+
+def search(session, jobs, pattern, concurrency=None, max_count=None, processes=None,
+           chunk_size=64 * 1024):
+    '''
+    :type session: :class:`.Session`
+
+    :type jobs: iterable(:class:`.Job` | int)
+    :param jobs:
+        Jobs (or their ids) whose logs must be searched.
+
+    :type pattern: bytes | str | compiled pattern
+    :param pattern:
+        Regular expression. ``str`` patterns are encoded as UTF-8.
+
+    :type concurrency: int | None
+    :param concurrency:
+        Number of logs downloaded simultaneously. Default is the current limit of
+        ``session.concurrency``.
+
+    :type max_count: int | None
+    :param max_count:
+        Stop downloading a log after this number of matching lines.
+
+    :type processes: int | None
+    :param processes:
+        Number of processes matching lines. By default lines are matched by downloading threads.
+
+    :param int chunk_size:
+        Number of bytes read at once from each log.
+
+    :rtype: iterable(:class:`Match`)
+    :returns:
+        Matches, as they are found. Pending downloads are stopped when iteration is interrupted.
+
+    :raises TravisError: when a log could not be downloaded.
+    '''
+    if not hasattr(pattern, 'search'):
+        if not isinstance(pattern, bytes):
+            pattern = pattern.encode('utf-8')
+        pattern = re.compile(pattern)
+    pattern = line_pattern(pattern)
+
+    job_ids = [getattr(job, 'id', job) for job in jobs]
+    if not job_ids:
+        return
+    if concurrency is None:
+        concurrency = session.concurrency.limit
+    concurrency = max(1, min(concurrency, len(job_ids)))
+
+    process_pool = ProcessPoolExecutor(processes) if processes else None
+    fan_out = FanOut(maxsize=1024)
+    worker = _Worker(session, pattern, max_count, process_pool, chunk_size, fan_out)
+    matches = fan_out.run(session.propagate(worker.search), job_ids, concurrency)
+    try:
+        for match in matches:
+            yield match
+    finally:
+        matches.close()
+        if process_pool is not None:
+            process_pool.shutdown(wait=True)
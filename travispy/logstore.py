@@ -0,0 +1,344 @@
+'''
+Local archive of job logs, compressed in independent frames so any range of lines can be read
+without decompressing the whole log::
+
+    >>> from travispy.logstore import LogStore
+    >>> store = LogStore('/var/cache/travis-logs')
+    >>> store.archive(job.log)
+    >>> store.lines(job.id, -50)  # Last 50 lines.
+
+Each log is kept in a single file named after its job id: frames of whole lines (about
+``frame_size`` bytes each before compression) followed by an index of frames and a fixed size
+footer. Reading a range of lines only reads the footer, the index and the frames holding those
+lines.
+
+Frames are compressed with :mod:`zlib` by default, or with `zstandard`_ when it is installed and
+``codec='zstd'`` is given.
+
+.. _zstandard: https://pypi.org/project/zstandard/
+'''
+from bisect import bisect_right
+import os
+import struct
+import tempfile
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency.
+    zstandard = None
+
+
+_MAGIC = b'TPLS'
+
+# Footer: magic, format version, codec, index offset, number of frames, number of lines.
+_FOOTER = struct.Struct('<4sBBQIQ')
+
+# Index entry: first line, offset, compressed size and size of each frame.
+_FRAME = struct.Struct('<QQII')
+
+VERSION = 1
+
+
+class _ZlibCodec(object):
+
+    id = 1
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data, size):
+        return zlib.decompress(data)
+
+
+class _ZstdCodec(object):
+
+    id = 2
+
+    def __init__(self, level=3):
+        if zstandard is None:
+            raise RuntimeError('zstd codec requires "zstandard" package')
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data, size):
+        return self._decompressor.decompress(data, max_output_size=size)
+
+
+_CODECS = {
+    'zlib': _ZlibCodec,
+    'zstd': _ZstdCodec,
+}
+
+
+class _FrameWriter(object):
+    '''
+    Writes frames of a log file, then its index and footer.
+    '''
+
+    def __init__(self, stream, codec):
+        self.stream = stream
+        self.codec = codec
+        self.frames = []
+        self.offset = 0
+        self.lines = 0
+        self.partial = False
+
+    def frame(self, data):
+        if not data:
+            return
+        compressed = self.codec.compress(data)
+        self.stream.write(compressed)
+        self.frames.append(_FRAME.pack(self.lines, self.offset, len(compressed), len(data)))
+        self.offset += len(compressed)
+        self.lines += data.count(b'\n')
+        self.partial = not data.endswith(b'\n')
+
+    def close(self):
+        '''
+        :rtype: int
+        :returns:
+            Number of lines written.
+        '''
+        lines = self.lines + self.partial
+        self.stream.write(b''.join(self.frames))
+        self.stream.write(_FOOTER.pack(
+            _MAGIC, VERSION, self.codec.id, self.offset, len(self.frames), lines))
+        return lines
+
+
+class LogStore(object):
+    '''
+    :param str directory:
+        Directory where logs are stored. It is created when needed.
+
+    :param str codec:
+        ``'zlib'`` or ``'zstd'``. Only used to write logs, any log may be read.
+
+    :param int frame_size:
+        Approximate number of uncompressed bytes of each frame. Smaller frames make random access
+        faster and compression worse.
+
+    :type level: int | None
+    :param level:
+        Compression level. Default depends on ``codec``.
+    '''
+
+    def __init__(self, directory, codec='zlib', frame_size=256 * 1024, level=None):
+        self.directory = directory
+        self.frame_size = frame_size
+        kwargs = {} if level is None else {'level': level}
+        self._codec = _CODECS[codec](**kwargs)
+        self._codecs = {self._codec.id: self._codec}
+
+    def path(self, job_id):
+        '''
+        :rtype: str
+        :returns:
+            File holding log of given job. Logs are spread among 1000 subdirectories.
+        '''
+        job_id = int(job_id)
+        return os.path.join(self.directory, '%03d' % (job_id % 1000), '%d.log' % job_id)
+
+    def __contains__(self, job_id):
+        return os.path.exists(self.path(job_id))
+
+    def job_ids(self):
+        '''
+        :rtype: iterable(int)
+        :returns:
+            Ids of jobs whose logs are stored, in no particular order.
+        '''
+        if not os.path.isdir(self.directory):
+            return
+        for subdirectory in os.listdir(self.directory):
+            path = os.path.join(self.directory, subdirectory)
+            if not os.path.isdir(path):
+                continue
+            for name in os.listdir(path):
+                if name.endswith('.log'):
+                    yield int(name[:-len('.log')])
+
+    def put(self, job_id, data):
+        '''
+        Stores a log, replacing any previous one.
+
+        :type data: bytes | str | iterable(bytes)
+        :param data:
+            Log contents. ``str`` is encoded as UTF-8. Chunks (such as the ones generated by
+            ``response.iter_content()``) may split lines anywhere.
+
+        :rtype: int
+        :returns:
+            Number of lines stored.
+        '''
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8') if hasattr(data, 'encode') else data
+        chunks = [data] if isinstance(data, bytes) else data
+
+        path = self.path(job_id)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:  # Created concurrently.
+                if not os.path.isdir(directory):
+                    raise
+
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as stream:
+                lines = self._write(stream, chunks)
+            getattr(os, 'replace', os.rename)(temporary, path)
+        except:
+            os.remove(temporary)
+            raise
+        return lines
+
+    def _write(self, stream, chunks):
+        writer = _FrameWriter(stream, self._codec)
+
+        pieces = []
+        size = 0
+        for chunk in chunks:
+            pieces.append(chunk)
+            size += len(chunk)
+            if size < self.frame_size:
+                continue
+
+            pending = b''.join(pieces)
+            start = 0
+            while len(pending) - start >= self.frame_size:
+                # Frames hold whole lines, unless a single line is bigger than frame size.
+                end = pending.rfind(b'\n', start, start + self.frame_size) + 1
+                if end == 0:
+                    end = pending.find(b'\n', start + self.frame_size) + 1
+                    if end == 0:
+                        break
+                writer.frame(pending[start:end])
+                start = end
+            pieces = [pending[start:]]
+            size = len(pieces[0])
+
+        writer.frame(b''.join(pieces))
+        return writer.close()
+
+    def archive(self, log, overwrite=False):
+        '''
+        Stores a :class:`.Log` fetched from |travisci|.
+
+        :type log: :class:`.Log`
+
+        :param bool overwrite:
+            Whether or not to fetch and store the log again if it is already stored.
+
+        :rtype: bool
+        :returns:
+            ``True`` if log was stored.
+        '''
+        if not overwrite and log.job_id in self:
+            return False
+        raw = log.raw
+        data = raw
+        if not isinstance(raw, bytes):
+            # Memory-mapped logs are read in frames, not loaded at once.
+            data = (raw[i:i + self.frame_size] for i in range(0, len(raw), self.frame_size))
+        self.put(log.job_id, data)
+        return True
+
+    def delete(self, job_id):
+        '''
+        Removes a stored log, if any.
+        '''
+        try:
+            os.remove(self.path(job_id))
+        except OSError:
+            pass
+
+    def _read_index(self, stream):
+        stream.seek(-_FOOTER.size, os.SEEK_END)
+        magic, version, codec, index_offset, count, lines = _FOOTER.unpack(
+            stream.read(_FOOTER.size))
+        if magic != _MAGIC or version != VERSION:
+            raise ValueError('Invalid log file: %s' % getattr(stream, 'name', stream))
+
+        stream.seek(index_offset)
+        data = stream.read(count * _FRAME.size)
+        frames = [_FRAME.unpack_from(data, i * _FRAME.size) for i in range(count)]
+
+        if codec not in self._codecs:
+            codec_class = [c for c in _CODECS.values() if c.id == codec][0]
+            self._codecs[codec] = codec_class()
+        return self._codecs[codec], frames, lines
+
+    def line_count(self, job_id):
+        '''
+        :rtype: int
+        :returns:
+            Number of lines of a stored log.
+
+        :raises IOError: when log is not stored.
+        '''
+        with open(self.path(job_id), 'rb') as stream:
+            return self._read_index(stream)[2]
+
+    def read(self, job_id):
+        '''
+        :rtype: bytes
+        :returns:
+            Whole contents of a stored log.
+
+        :raises IOError: when log is not stored.
+        '''
+        with open(self.path(job_id), 'rb') as stream:
+            codec, frames, _ = self._read_index(stream)
+            return b''.join(self._frames(stream, codec, frames))
+
+    def _frames(self, stream, codec, frames):
+        for _, offset, compressed_size, size in frames:
+            stream.seek(offset)
+            yield codec.decompress(stream.read(compressed_size), size)
+
+    def lines(self, job_id, start=0, stop=None, encoding='utf-8'):
+        '''
+        Reads a range of lines, with the same semantics as ``lines[start:stop]``.
+
+        :param int start:
+            First line. Negative values count from the end.
+
+        :type stop: int | None
+        :param stop:
+            Line after the last one. Negative values count from the end.
+
+        :type encoding: str | None
+        :param encoding:
+            Encoding used to decode lines, ``None`` to return ``bytes``.
+
+        :rtype: list(str) | list(bytes)
+        :returns:
+            Lines without line endings.
+
+        :raises IOError: when log is not stored.
+        '''
+        with open(self.path(job_id), 'rb') as stream:
+            codec, frames, count = self._read_index(stream)
+            start, stop, _ = slice(start, stop).indices(count)
+            if start >= stop:
+                return []
+
+            first_lines = [frame[0] for frame in frames]
+            first = bisect_right(first_lines, start) - 1
+            last = bisect_right(first_lines, stop - 1)
+            data = b''.join(self._frames(stream, codec, frames[first:last]))
+
+        skip = start - first_lines[first]
+        result = data.split(b'\n')[skip:skip + stop - start]
+        if encoding is not None:
+            result = [line.decode(encoding, 'replace') for line in result]
+        return result
@@ -0,0 +1,223 @@
+'''
+Exports client activity in `Prometheus`_ text exposition format.
+
+Metrics are read from :class:`.Instrumentation` objects, so any number of :class:`.TravisPy`
+instances (or instances sharing the same instrumentation) may be exported together::
+
+    >>> from travispy import metrics
+    >>> print(metrics.render(travis))
+    # HELP travispy_requests_total Requests performed, by endpoint and status code.
+    # TYPE travispy_requests_total counter
+    travispy_requests_total{method="GET",endpoint="/builds/{id}",status="200"} 3
+    ...
+
+    >>> server = metrics.serve(travis, port=9100)  # Scraped at http://localhost:9100/metrics
+    >>> server.shutdown()
+
+.. _Prometheus: https://prometheus.io/docs/instrumenting/exposition_formats/
+'''
+from bisect import bisect_right
+from collections import OrderedDict
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Counters that are always exported, even when they were never incremented.
+COUNTERS = [
+    ('cache_hits', 'Lazy information served from entity cache.'),
+    ('cache_misses', 'Lazy information that had to be requested.'),
+    ('retries', 'Requests retried after a transient failure.'),
+    ('hedges', 'Slow requests hedged with a second request.'),
+]
+
+
+def _instrumentations(sources):
+    result = []
+    for source in sources:
+        instrumentation = getattr(source, 'instrumentation', source)
+        if instrumentation not in result:
+            result.append(instrumentation)
+    return result
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels):
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, _escape(value)) for name, value in sorted(labels.items())
+    )
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _add(samples, labels, value):
+    samples[labels] = samples.get(labels, 0) + value
+
+
+def _merge(histograms):
+    '''
+    :rtype: tuple(list(tuple(float, int)), float, int)
+    :returns:
+        Cumulative buckets, sum and count of all ``histograms``. When their buckets differ, each
+        one is counted in its largest bucket not above each bound.
+    '''
+    bounds = sorted(set(bound for histogram in histograms for bound in histogram.buckets))
+    bounds.append(float('inf'))
+    counts = [0] * len(bounds)
+    for histogram in histograms:
+        cumulative = histogram.cumulative()
+        own = [bound for bound, _ in cumulative]
+        for i, bound in enumerate(bounds):
+            position = bisect_right(own, bound)
+            if position:
+                counts[i] += cumulative[position - 1][1]
+    return (
+        list(zip(bounds, counts)),
+        sum(histogram.sum for histogram in histograms),
+        sum(histogram.count for histogram in histograms),
+    )
+
+
+def render(*sources):
+    '''
+    :type sources: :class:`.TravisPy` | :class:`.Session` | :class:`.Instrumentation`
+    :param sources:
+        Objects whose activity must be exported.
+
+    :rtype: str
+    :returns:
+        Metrics in Prometheus text exposition format. Counters and histograms of all sources are
+        added together, gauges are labeled with the index of their source.
+    '''
+    requests = OrderedDict()
+    errors = OrderedDict()
+    bytes_received = OrderedDict()
+    durations = OrderedDict()
+    counters = dict((name, 0) for name, _ in COUNTERS)
+    gauges = {}
+
+    for index, instrumentation in enumerate(_instrumentations(sources)):
+        for name, value in instrumentation.counters().items():
+            counters[name] = counters.get(name, 0) + value
+
+        for name, value in instrumentation.gauges().items():
+            gauges.setdefault(name, []).append((_labels(source=index), value))
+
+        for method, endpoint, stats in instrumentation.endpoints():
+            for status, count in sorted(stats.status.items()):
+                _add(requests, _labels(method=method, endpoint=endpoint, status=status), count)
+            labels = _labels(method=method, endpoint=endpoint)
+            _add(errors, labels, stats.errors)
+            _add(bytes_received, labels, stats.bytes)
+            for phase, histogram in sorted(stats.timings.items()):
+                durations.setdefault((method, endpoint, phase), []).append(histogram)
+
+    lines = []
+
+    def metric(name, type_, help_, samples):
+        lines.append('# HELP %s %s' % (name, help_))
+        lines.append('# TYPE %s %s' % (name, type_))
+        for labels, value in samples:
+            lines.append('%s%s %s' % (name, labels, _number(value)))
+
+    metric(
+        'travispy_requests_total', 'counter',
+        'Requests performed, by endpoint and status code.', requests.items(),
+    )
+    metric(
+        'travispy_request_errors_total', 'counter',
+        'Requests that failed without a response.', errors.items(),
+    )
+    metric(
+        'travispy_response_bytes_total', 'counter',
+        'Bytes received in response bodies.', bytes_received.items(),
+    )
+
+    name = 'travispy_request_duration_seconds'
+    lines.append('# HELP %s Time spent on each request phase.' % name)
+    lines.append('# TYPE %s histogram' % name)
+    for (method, endpoint, phase), histograms in durations.items():
+        buckets, total, count = _merge(histograms)
+        for bound, cumulative in buckets:
+            labels = _labels(method=method, endpoint=endpoint, phase=phase, le=_number(bound))
+            lines.append('%s_bucket%s %d' % (name, labels, cumulative))
+        labels = _labels(method=method, endpoint=endpoint, phase=phase)
+        lines.append('%s_sum%s %s' % (name, labels, _number(total)))
+        lines.append('%s_count%s %d' % (name, labels, count))
+
+    descriptions = dict(COUNTERS)
+    for counter, value in sorted(counters.items()):
+        metric(
+            'travispy_%s_total' % counter, 'counter',
+            descriptions.get(counter, counter.replace('_', ' ').capitalize() + '.'),
+            [('', value)],
+        )
+
+    for gauge, samples in sorted(gauges.items()):
+        metric('travispy_%s' % gauge, 'gauge', gauge.replace('_', ' ').capitalize() + '.', samples)
+
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    sources = ()
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+
+        body = render(*self.sources).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(*sources, **kwargs):
+    '''
+    Starts a tiny HTTP server in a daemon thread answering ``/metrics`` with :func:`render`.
+
+    :type sources: :class:`.TravisPy` | :class:`.Session` | :class:`.Instrumentation`
+    :param sources:
+        Objects whose activity must be exported.
+
+    :keyword int port:
+        Port to listen on. Default is ``9100``. Use ``0`` to pick any free port.
+
+    :keyword str addr:
+        Address to bind. Default is ``''`` (all interfaces).
+
+    :rtype: :class:`http.server.HTTPServer`
+    :returns:
+        The running server. Call its ``shutdown()`` method to stop it.
+    '''
+    port = kwargs.pop('port', 9100)
+    addr = kwargs.pop('addr', '')
+    if kwargs:
+        raise TypeError('unexpected keyword arguments: %s' % ', '.join(sorted(kwargs)))
+
+    handler = type('MetricsHandler', (_MetricsHandler, object), {'sources': sources})
+    server = HTTPServer((addr, port), handler)
+
+    thread = threading.Thread(target=server.serve_forever, name='travispy-metrics')
+    thread.daemon = True
+    thread.start()
+    return server
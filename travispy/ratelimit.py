@@ -0,0 +1,119 @@
+'''
+Client side rate limiting.
+
+A :class:`RateLimiter` may be shared by many threads and sessions using the same token::
+
+    >>> from travispy.ratelimit import RateLimiter
+    >>> limiter = RateLimiter(rate=10, burst=20)
+    >>> t1 = TravisPy(token, rate_limiter=limiter)
+    >>> t2 = TravisPy(token, rate_limiter=limiter)
+
+Whenever |travisci| answers ``429`` the allowed rate is cut by half, then it slowly recovers to
+the configured one.
+
+Coroutines must not block the event loop, so they should wait for the delay returned by
+:meth:`RateLimiter.reserve` instead of calling :meth:`RateLimiter.acquire`::
+
+    >>> await asyncio.sleep(limiter.reserve())
+'''
+import threading
+import time
+
+
+class RateLimiter(object):
+    '''
+    Token bucket limiting requests per second.
+
+    :param float rate:
+        Maximum number of requests per second on the long run.
+
+    :type burst: int | None
+    :param burst:
+        Number of requests that may be sent at once after a quiet period. Default is ``rate``
+        (at least 1).
+
+    :param float min_rate:
+        Lowest rate reached when |travisci| keeps throttling requests.
+
+    :param float decrease:
+        Factor applied to current rate on each throttled request.
+
+    :param float recovery_time:
+        Seconds needed to recover from ``min_rate`` to ``rate`` when requests are not throttled.
+    '''
+
+    # Hooks that may be replaced in tests.
+    clock = staticmethod(getattr(time, 'monotonic', time.time))
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, rate, burst=None, min_rate=None, decrease=0.5, recovery_time=60.0):
+        self.max_rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, rate))
+        self.min_rate = float(min_rate if min_rate is not None else rate / 10.0)
+        self.decrease = decrease
+        self.recovery_time = recovery_time
+
+        self._rate = self.max_rate
+        self._tokens = self.burst
+        self._updated = self.clock()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        '''
+        :rtype: float
+        :returns:
+            Requests per second currently allowed.
+        '''
+        with self._lock:
+            self._refill(self.clock())
+            return self._rate
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+
+        if self._rate < self.max_rate:
+            recovered = elapsed * (self.max_rate - self.min_rate) / self.recovery_time
+            self._rate = min(self.max_rate, self._rate + recovered)
+
+        self._tokens = min(self.burst, self._tokens + elapsed * self._rate)
+
+    def reserve(self, tokens=1):
+        '''
+        Reserves ``tokens`` without blocking.
+
+        :rtype: float
+        :returns:
+            Seconds the caller must wait before sending its request.
+        '''
+        with self._lock:
+            self._refill(self.clock())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    def acquire(self, tokens=1):
+        '''
+        Blocks until ``tokens`` are available.
+        '''
+        delay = self.reserve(tokens)
+        if delay > 0:
+            self.sleep(delay)
+
+    def throttled(self, retry_after=None):
+        '''
+        Must be called whenever |travisci| throttles a request. Current rate is decreased and, if
+        ``retry_after`` is given, no request is allowed during that time.
+
+        :type retry_after: float | None
+        :param retry_after:
+            Seconds requested by |travisci| through ``Retry-After`` header.
+        '''
+        with self._lock:
+            self._refill(self.clock())
+            self._rate = max(self.min_rate, self._rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._tokens = min(self._tokens, -retry_after * self._rate)
@@ -0,0 +1,225 @@
+'''
+Automatic retry of requests that failed for transient reasons (such as ``502``, ``503`` and
+``429`` responses or connection errors).
+
+Every :class:`.Session` has a :class:`RetryPolicy` (see :attr:`.Session.retry`)::
+
+    >>> from travispy.retry import RetryBudget, RetryPolicy
+    >>> t = TravisPy(retry=RetryPolicy(total=5, budget=RetryBudget(ratio=0.1)))
+    >>> t = TravisPy(retry=RetryPolicy(total=0))  # Disables retries.
+
+Safe methods (``GET``, ``HEAD``, ``PUT``...) are retried on any transient failure. ``POST`` and
+``PATCH`` requests are only retried when they were certainly not processed by |travisci| (a
+``429`` response or a connection that could not be established), unless the request is flagged
+as idempotent, like :meth:`.Restartable.cancel`.
+'''
+from email.utils import mktime_tz, parsedate_tz
+from requests.packages.urllib3.exceptions import NewConnectionError
+import random
+import requests
+import threading
+import time
+
+
+class RetryBudget(object):
+    '''
+    Limits retries to a fraction of requests, so retries do not multiply load when |travisci| is
+    struggling.
+
+    Every request deposits ``ratio`` tokens and every retry withdraws one.
+
+    :param float ratio:
+        Fraction of requests that may be retried.
+
+    :param int min_retries:
+        Tokens available initially, allowing retries before many requests were sent.
+
+    :param int max_tokens:
+        Maximum number of tokens accumulated.
+    '''
+
+    def __init__(self, ratio=0.2, min_retries=10, max_tokens=100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = float(min_retries)
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        '''
+        :rtype: float
+        :returns:
+            Number of retries currently allowed.
+        '''
+        return self._tokens
+
+    def deposit(self):
+        '''
+        Must be called for each request (not for retries).
+        '''
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        '''
+        :rtype: bool
+        :returns:
+            ``True`` if a retry is allowed. In that case one token is consumed.
+        '''
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    '''
+    :param int total:
+        Maximum number of retries of a single request.
+
+    :param float backoff:
+        Base delay, in seconds. Retry ``n`` (starting at 0) waits a random time between 0 and
+        ``backoff * 2 ** n`` ("full jitter").
+
+    :param float max_backoff:
+        Maximum delay, in seconds, between retries.
+
+    :param float max_retry_after:
+        Maximum delay, in seconds, accepted from a ``Retry-After`` header. The request is not
+        retried when |travisci| asks to wait longer.
+
+    :param tuple(int) statuses:
+        Status codes that are considered transient.
+
+    :type budget: :class:`RetryBudget` | None
+    :param budget:
+        Budget shared by all requests using this policy. ``None`` means unlimited.
+    '''
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'])
+
+    # Statuses meaning the request was rejected before being processed.
+    NOT_PROCESSED_STATUSES = frozenset([429])
+
+    def __init__(
+            self,
+            total=3,
+            backoff=0.5,
+            max_backoff=30.0,
+            max_retry_after=120.0,
+            statuses=(429, 500, 502, 503, 504),
+            budget=None):
+        self.total = total
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+        self.budget = budget
+
+    # Hooks that may be replaced in tests.
+    sleep = staticmethod(time.sleep)
+    random = staticmethod(random.random)
+
+    def retry_after(self, response):
+        '''
+        :rtype: float | None
+        :returns:
+            Seconds to wait according to ``Retry-After`` header of ``response``, if any.
+        '''
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+        return max(0.0, mktime_tz(date) - time.time())
+
+    def delay(self, attempt, response=None):
+        '''
+        :param int attempt:
+            Number of retries already done.
+
+        :type response: :class:`requests.Response` | None
+        :param response:
+            Response that failed, if any.
+
+        :rtype: float
+        :returns:
+            Seconds to wait before next retry.
+        '''
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return retry_after
+        return self.random() * min(self.max_backoff, self.backoff * 2 ** attempt)
+
+    def is_retryable(self, method, attempt, response=None, error=None, idempotent=None):
+        '''
+        :param str method:
+            HTTP method.
+
+        :param int attempt:
+            Number of retries already done.
+
+        :type response: :class:`requests.Response` | None
+        :param response:
+            Response received, if any.
+
+        :type error: Exception | None
+        :param error:
+            Error raised when no response was received.
+
+        :type idempotent: bool | None
+        :param idempotent:
+            Whether or not the request may be repeated safely. By default it depends on ``method``.
+
+        :rtype: bool
+        :returns:
+            ``True`` if request must be retried. The budget is consumed in that case.
+        '''
+        if attempt >= self.total:
+            return False
+
+        if idempotent is None:
+            idempotent = method.upper() in self.IDEMPOTENT_METHODS
+
+        if error is not None:
+            if idempotent:
+                retryable = isinstance(error, (requests.ConnectionError, requests.Timeout))
+            else:
+                retryable = _not_connected(error)
+        else:
+            status_code = response.status_code
+            if idempotent:
+                retryable = status_code in self.statuses
+            else:
+                retryable = status_code in self.statuses & self.NOT_PROCESSED_STATUSES
+
+            if retryable:
+                retry_after = self.retry_after(response)
+                retryable = retry_after is None or retry_after <= self.max_retry_after
+
+        if retryable and self.budget is not None:
+            retryable = self.budget.withdraw()
+        return retryable
+
+
+def _not_connected(error):
+    '''
+    :rtype: bool
+    :returns:
+        Whether or not ``error`` means a connection could not be established (timed out, refused
+        or host not found), so the request was not sent.
+    '''
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    # Requests wraps the error of urllib3 in a MaxRetryError.
+    reason = getattr(error.args[0], 'reason', error.args[0])
+    return isinstance(reason, NewConnectionError)
@@ -0,0 +1,152 @@
+'''
+Compact serialization of entity collections, meant to ship entities to worker processes without
+pickling their :class:`.Session` and without fetching them again::
+
+    >>> from concurrent.futures import ProcessPoolExecutor
+    >>> from travispy import serialization
+    >>> data = serialization.dumps(travis.jobs(state='failed'))
+    >>> def analyze(data):
+    ...     jobs = serialization.loads(data, Session(PUBLIC))
+    ...     ...
+    >>> ProcessPoolExecutor().submit(analyze, data)
+
+Entities are stored as rows of values following a schema (the list of attribute names) written
+once per class. Data is encoded with `msgpack`_ when it is installed and with compact JSON
+otherwise; :func:`loads` accepts both.
+
+.. _msgpack: https://pypi.org/project/msgpack/
+'''
+from .entities._entity import Entity, _entity_class
+import json
+
+try:
+    import msgpack
+except ImportError:  # Optional dependency.
+    msgpack = None
+
+
+# Format version, increased whenever layout changes.
+VERSION = 1
+
+# First byte of serialized data, identifying its encoding.
+_MSGPACK = b'M'
+_JSON = b'J'
+
+# Key tagging rows of related entities inside values.
+_ENTITY = '__entity__'
+
+
+class _Encoder(object):
+
+    def __init__(self):
+        self.schemas = []
+        self._indexes = {}
+
+    def row(self, entity):
+        entity_class = entity.__class__
+        index = self._indexes.get(entity_class)
+        if index is None:
+            index = self._indexes[entity_class] = len(self.schemas)
+            self.schemas.append([entity_class.__name__] + entity_class._fields())
+
+        # Bit "i" of mask tells whether field "i" is set.
+        mask = 0
+        values = []
+        for i, name in enumerate(entity_class._fields()):
+            try:
+                value = getattr(entity, name)
+            except AttributeError:
+                continue
+            mask |= 1 << i
+            values.append(self.value(value))
+        return [index, mask] + values
+
+    def value(self, value):
+        if isinstance(value, Entity):
+            return {_ENTITY: self.row(value)}
+
+        if isinstance(value, list) and value and isinstance(value[0], Entity):
+            return [self.value(item) for item in value]
+
+        return value
+
+
+class _Decoder(object):
+
+    def __init__(self, schemas, session):
+        self.classes = [_entity_class(schema[0]) for schema in schemas]
+        self.fields = [schema[1:] for schema in schemas]
+        self.session = session
+
+    def entity(self, row):
+        index, mask = row[0], row[1]
+        entity = self.classes[index](self.session)
+        values = iter(row[2:])
+        for i, name in enumerate(self.fields[index]):
+            if mask & (1 << i):
+                setattr(entity, name, self.value(next(values)))
+        return entity
+
+    def value(self, value):
+        if isinstance(value, dict) and _ENTITY in value:
+            return self.entity(value[_ENTITY])
+
+        if isinstance(value, list) and value and isinstance(value[0], dict) \
+                and _ENTITY in value[0]:
+            return [self.value(item) for item in value]
+
+        return value
+
+
+def dumps(entities, use_msgpack=None):
+    '''
+    :param list(:class:`.Entity`) entities:
+        Entities to be serialized. They may be of different classes.
+
+    :type use_msgpack: bool | None
+    :param use_msgpack:
+        Whether or not to encode with `msgpack`_. By default it is used when installed.
+
+    :rtype: bytes
+    '''
+    if use_msgpack is None:
+        use_msgpack = msgpack is not None
+
+    encoder = _Encoder()
+    rows = [encoder.row(entity) for entity in entities]
+    document = [VERSION, encoder.schemas, rows]
+
+    if use_msgpack:
+        return _MSGPACK + msgpack.packb(document, use_bin_type=True)
+    return _JSON + json.dumps(document, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data, session=None):
+    '''
+    :param bytes data:
+        Data returned by :func:`dumps`.
+
+    :type session: :class:`.Session` | None
+    :param session:
+        Session bound to loaded entities.
+
+    :rtype: list(:class:`.Entity`)
+
+    :raises ValueError: when ``data`` is not valid.
+    '''
+    encoding, payload = data[:1], data[1:]
+    if encoding == _MSGPACK:
+        if msgpack is None:
+            raise ValueError('msgpack is required to load this data')
+        document = msgpack.unpackb(payload, raw=False)
+    elif encoding == _JSON:
+        document = json.loads(payload.decode('utf-8'))
+    else:
+        raise ValueError('unknown serialization format')
+
+    version, schemas, rows = document
+    if version != VERSION:
+        raise ValueError('unsupported serialization version %s' % version)
+
+    decoder = _Decoder(schemas, session)
+    return [decoder.entity(row) for row in rows]
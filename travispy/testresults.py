@@ -0,0 +1,424 @@
+'''
+Summaries of test runs found in job logs::
+
+    >>> from travispy.testresults import extract
+    >>> for result in extract(log.iter_archived_log()):
+    ...     print(result.runner, result.passed, result.failed, result.failed_tests)
+
+Supported runners are ``pytest``, ``unittest``, ``junit`` (Maven Surefire and Gradle), ``rspec`` and
+``go`` (``go test``). Logs are read in chunks where the few lines that may be part of a summary
+are found by searching for plain substrings (see :data:`MARKERS`), which is much faster than
+matching regular expressions against every line. Only those lines are decoded and parsed by each
+runner. Results of many runs of the same runner in one log (such as ``tox`` environments) are
+added up.
+
+Logs of many jobs are processed concurrently by :meth:`.TravisPy.test_results`.
+'''
+from travispy._helpers import LineSplitter
+from travispy.logparser import strip_ansi
+import re
+
+
+# Substrings of lines that may be part of test summaries. Other lines are skipped without being
+# decoded.
+MARKERS = [
+    b'== ', b'FAIL', b'ERROR', b'--- PASS', b'--- SKIP', b'Ran ', b'OK', b'ok  ', b'Tests run: ',
+    b' completed, ', b' example', b'Finished in ', b'rspec ', b' passed', b' failed', b' error',
+    b'no tests ran',
+]
+
+_NUMBER = r'(\d+(?:\.\d+)?)'
+
+
+class TestResult(object):
+    '''
+    Summary of tests run by a runner in a log.
+
+    :ivar str runner:
+        ``'pytest'``, ``'unittest'``, ``'junit'``, ``'rspec'`` or ``'go'``.
+
+    :ivar int passed:
+
+    :ivar int failed:
+
+    :ivar int errors:
+        Tests that could not run (or crashed), when the runner tells them apart from failures.
+
+    :ivar int skipped:
+        Skipped or pending tests.
+
+    :ivar float duration:
+        Seconds taken by tests, ``None`` if unknown.
+
+    :ivar list(str) failed_tests:
+        Names of failed (or errored) tests, in the order they were reported.
+    '''
+
+    __slots__ = ['runner', 'passed', 'failed', 'errors', 'skipped', 'duration', 'failed_tests']
+
+    # Not a test class, despite its name.
+    __test__ = False
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.passed = 0
+        self.failed = 0
+        self.errors = 0
+        self.skipped = 0
+        self.duration = None
+        self.failed_tests = []
+
+    def __repr__(self):
+        return '<TestResult %s: %d passed, %d failed, %d errors, %d skipped>' % (
+            self.runner, self.passed, self.failed, self.errors, self.skipped)
+
+    @property
+    def total(self):
+        '''
+        :rtype: int
+        '''
+        return self.passed + self.failed + self.errors + self.skipped
+
+    @property
+    def success(self):
+        '''
+        :rtype: bool
+        '''
+        return not (self.failed or self.errors)
+
+    def to_dict(self):
+        '''
+        :rtype: dict
+        '''
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def _add_duration(self, seconds):
+        self.duration = seconds if self.duration is None else self.duration + seconds
+
+    def _add_failed_test(self, name):
+        if name not in self.failed_tests:
+            self.failed_tests.append(name)
+
+
+class _Runner(object):
+    '''
+    Parses summary lines of a test runner. Subclasses implement :meth:`line`.
+    '''
+
+    name = None
+
+    def __init__(self):
+        self.result = None
+
+    def _result(self):
+        if self.result is None:
+            self.result = TestResult(self.name)
+        return self.result
+
+    def line(self, line):
+        raise NotImplementedError()
+
+    def close(self):
+        '''
+        :rtype: :class:`TestResult` | None
+        '''
+        return self.result
+
+
+class _Pytest(_Runner):
+
+    name = 'pytest'
+
+    # Summary lines are surrounded by "=" unless pytest runs with "-q".
+    summary = re.compile(
+        r'^(?:=+ )?((?:\d+ (?:passed|failed|errors?|skipped|xfailed|xpassed|warnings?|deselected|'
+        r'rerun)(?:, |(?= in )))+|no tests ran) in ' + _NUMBER + r' ?s(?:econds)?\b')
+    count = re.compile(r'(\d+) (passed|failed|errors?|skipped|xfailed|xpassed)')
+    failed_test = re.compile(r'^(?:FAILED|ERROR) (\S+::\S+)|^(\S+::\S+) (?:FAILED|ERROR)\b')
+
+    def line(self, line):
+        match = self.summary.match(line)
+        if match is not None:
+            result = self._result()
+            for count, kind in self.count.findall(match.group(1)):
+                count = int(count)
+                if kind in ('passed', 'xpassed'):
+                    result.passed += count
+                elif kind == 'failed':
+                    result.failed += count
+                elif kind.startswith('error'):
+                    result.errors += count
+                else:
+                    result.skipped += count
+            result._add_duration(float(match.group(2)))
+            return
+
+        match = self.failed_test.match(line)
+        if match is not None:
+            self._result()._add_failed_test(match.group(1) or match.group(2))
+
+
+class _Unittest(_Runner):
+
+    name = 'unittest'
+
+    ran = re.compile(r'^Ran (\d+) tests? in ' + _NUMBER + r's$')
+    outcome = re.compile(r'^(OK|FAILED)(?: \((.*)\))?$')
+    count = re.compile(r'(failures|errors|skipped|expected failures|unexpected successes)=(\d+)')
+    failed_test = re.compile(r'^(?:FAIL|ERROR): (\w+) \(([\w.]+)\)')
+
+    def __init__(self):
+        _Runner.__init__(self)
+        # Tests of last "Ran" line, waiting for their outcome.
+        self._ran = None
+
+    def line(self, line):
+        match = self.ran.match(line)
+        if match is not None:
+            self._ran = int(match.group(1))
+            self._result()._add_duration(float(match.group(2)))
+            return
+
+        match = self.outcome.match(line)
+        if match is not None and self._ran is not None:
+            result = self._result()
+            counts = dict((kind, int(count)) for kind, count in self.count.findall(
+                match.group(2) or ''))
+            failed = counts.get('failures', 0) + counts.get('unexpected successes', 0)
+            errors = counts.get('errors', 0)
+            skipped = counts.get('skipped', 0) + counts.get('expected failures', 0)
+            result.failed += failed
+            result.errors += errors
+            result.skipped += skipped
+            result.passed += max(0, self._ran - failed - errors - skipped)
+            self._ran = None
+            return
+
+        match = self.failed_test.match(line)
+        if match is not None:
+            test, case = match.groups()
+            # Python 3.11 reports the whole name in parentheses.
+            name = case if case.endswith('.' + test) else '%s.%s' % (case, test)
+            self._result()._add_failed_test(name)
+
+
+class _JUnit(_Runner):
+
+    name = 'junit'
+
+    tests_run = re.compile(
+        r'Tests run: (\d+), Failures: (\d+), Errors: (\d+), Skipped: (\d+)'
+        r'(?:, Time elapsed: ' + _NUMBER + r' ?s(?:ec)?)?')
+    failed_test = re.compile(
+        r'^(?:\[ERROR\] )?([\w.$]+?)(?:\(([\w.$]*)\))?(?::\d+)?\s+'
+        r'Time elapsed: [\d.]+ ?s(?:ec)?\s+<<< (?:FAILURE|ERROR)!')
+    gradle_test = re.compile(r'^([\w.$]+) > (.+?) FAILED$')
+    gradle_summary = re.compile(
+        r'^(\d+) tests? completed, (\d+) failed(?:, (\d+) skipped)?')
+
+    def __init__(self):
+        _Runner.__init__(self)
+        # Surefire reports each test class, then totals of each module: classes are counted,
+        # unless there are only totals.
+        self._classes = None
+        self._totals = None
+
+    def _counts(self, attribute):
+        counts = getattr(self, attribute)
+        if counts is None:
+            counts = TestResult(self.name)
+            setattr(self, attribute, counts)
+        return counts
+
+    def line(self, line):
+        # Surefire prefixes lines with a level ("[INFO] ", "[WARNING] "...).
+        match = self.tests_run.search(line)
+        if match is not None:
+            run, failures, errors, skipped = (int(value) for value in match.groups()[:4])
+            counts = self._counts('_classes' if match.group(5) is not None else '_totals')
+            counts.passed += run - failures - errors - skipped
+            counts.failed += failures
+            counts.errors += errors
+            counts.skipped += skipped
+            if match.group(5) is not None:
+                counts._add_duration(float(match.group(5)))
+            return
+
+        match = self.failed_test.match(line)
+        if match is not None:
+            test, case = match.groups()
+            self._result()._add_failed_test('%s.%s' % (case, test) if case else test)
+            return
+
+        match = self.gradle_test.match(line)
+        if match is not None:
+            self._result()._add_failed_test('%s.%s' % match.groups())
+            return
+
+        match = self.gradle_summary.match(line)
+        if match is not None:
+            completed, failed, skipped = (int(value or 0) for value in match.groups())
+            counts = self._counts('_totals')
+            counts.passed += completed - failed - skipped
+            counts.failed += failed
+            counts.skipped += skipped
+
+    def close(self):
+        counts = self._classes or self._totals
+        if counts is None:
+            return self.result
+
+        result = self._result()
+        for name in ('passed', 'failed', 'errors', 'skipped', 'duration'):
+            setattr(result, name, getattr(counts, name))
+        return result
+
+
+class _RSpec(_Runner):
+
+    name = 'rspec'
+
+    finished = re.compile(
+        r'^Finished in (?:(\d+) minutes? )?' + _NUMBER + r' seconds?')
+    summary = re.compile(
+        r'^(\d+) examples?, (\d+) failures?(?:, (\d+) pending)?(?:, (\d+) errors? occurred)?')
+    failed_test = re.compile(r'^rspec (\S+)(?: # (.*))?$')
+
+    def line(self, line):
+        match = self.finished.match(line)
+        if match is not None:
+            minutes, seconds = match.groups()
+            self._result()._add_duration(int(minutes or 0) * 60 + float(seconds))
+            return
+
+        match = self.summary.match(line)
+        if match is not None:
+            examples, failures, pending, errors = (int(value or 0) for value in match.groups())
+            result = self._result()
+            result.passed += examples - failures - pending
+            result.failed += failures
+            result.skipped += pending
+            result.errors += errors
+            return
+
+        match = self.failed_test.match(line)
+        if match is not None:
+            location, description = match.groups()
+            self._result()._add_failed_test(description or location)
+
+
+class _GoTest(_Runner):
+
+    name = 'go'
+
+    test = re.compile(r'^\s*--- (PASS|FAIL|SKIP): (\S+) \(' + _NUMBER + r's\)')
+    package = re.compile(r'^(ok|FAIL)\s+(\S+)\s+' + _NUMBER + r's')
+
+    def line(self, line):
+        match = self.test.match(line)
+        if match is not None:
+            outcome, name, _ = match.groups()
+            result = self._result()
+            if outcome == 'PASS':
+                result.passed += 1
+            elif outcome == 'SKIP':
+                result.skipped += 1
+            else:
+                result.failed += 1
+                result._add_failed_test(name)
+            return
+
+        match = self.package.match(line)
+        if match is not None:
+            self._result()._add_duration(float(match.group(3)))
+
+
+RUNNERS = [_Pytest, _Unittest, _JUnit, _RSpec, _GoTest]
+
+
+class TestResultExtractor(object):
+    '''
+    Incremental extractor: call :meth:`feed` with each chunk of a log, then :meth:`close`.
+    See :func:`extract`.
+    '''
+
+    # Not a test class, despite its name.
+    __test__ = False
+
+    def __init__(self):
+        self._runners = [runner() for runner in RUNNERS]
+        self._splitter = LineSplitter()
+
+    def feed(self, chunk):
+        '''
+        :type chunk: bytes | str
+        :param chunk:
+            Next part of log. It may split lines anywhere.
+        '''
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('utf-8')
+        block = self._splitter.feed(chunk)
+        if block:
+            self._block(block)
+
+    def _block(self, block):
+        runners = self._runners
+        for start in _candidates(block):
+            end = block.find(b'\n', start)
+            line = block[start:end] if end != -1 else block[start:]
+            # Progress output rewrites the same line: only the last version matters.
+            if b'\r' in line:
+                line = line.rstrip(b'\r')
+                line = line[line.rfind(b'\r') + 1:]
+            line = strip_ansi(line).decode('utf-8', 'replace').rstrip()
+            for runner in runners:
+                runner.line(line)
+
+    def close(self):
+        '''
+        :rtype: list(:class:`TestResult`)
+        :returns:
+            Results of runners found in log.
+        '''
+        block = self._splitter.close()
+        if block:
+            self._block(block)
+        results = (runner.close() for runner in self._runners)
+        return [result for result in results if result is not None]
+
+
+def _candidates(block):
+    '''
+    :rtype: list(int)
+    :returns:
+        Sorted start positions of lines of ``block`` containing any of :data:`MARKERS`.
+    '''
+    starts = set()
+    find = block.find
+    rfind = block.rfind
+    for marker in MARKERS:
+        position = find(marker)
+        while position != -1:
+            starts.add(rfind(b'\n', 0, position) + 1)
+            end = find(b'\n', position)
+            if end == -1:
+                break
+            position = find(marker, end)
+    return sorted(starts)
+
+
+def extract(chunks):
+    '''
+    :type chunks: iterable(bytes) | iterable(str)
+    :param chunks:
+        Log contents, split anywhere (such as :meth:`.Log.iter_archived_log` or a single
+        ``bytes`` object in a list).
+
+    :rtype: list(:class:`TestResult`)
+    :returns:
+        Results of each test runner found in log.
+    '''
+    extractor = TestResultExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor.close()
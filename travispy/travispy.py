@@ -9,9 +9,12 @@
     :annotation: = URI template for Travis CI service running under a personal domain. Usage will be
                  something like ENTERPRISE % {'domain': 'http://travis.example.com'}.
 '''
-from ._helpers import get_response_contents
+from ._helpers import get_response_contents, iter_lines
+from .concurrency import bulk_map
 from .entities import Account, Branch, Broadcast, Build, Hook, Job, Log, Repo, Session, User, Setting
-import requests
+from .entities.session import DEFAULT_TIMEOUT
+from concurrent.futures import ThreadPoolExecutor
+import threading
 
 
 PUBLIC = 'https://api.travis-ci.org'
@@ -41,6 +44,53 @@ class TravisPy:
     :param uri:
         URI where Travis CI service is running.
 
+    :type instrumentation: :class:`.Instrumentation` | None
+    :param instrumentation:
+        Instrumentation that will collect information about requests. It may be shared among many
+        instances. When not given a new one is created.
+
+    :type transport: :class:`.TransportPool` | None
+    :param transport:
+        Pool of connections used to send requests. Instances created without it share the pool
+        returned by :meth:`.TransportPool.default`, avoiding new TCP and TLS handshakes for each
+        instance.
+
+    :type retry: :class:`.RetryPolicy` | None
+    :param retry:
+        Policy used to retry requests that failed for transient reasons (``429`` and ``5xx``
+        responses or connection errors). See :class:`.Session`.
+
+    :type rate_limiter: :class:`.RateLimiter` | None
+    :param rate_limiter:
+        Limiter consulted before every request. Share it among instances using the same token.
+
+    :type concurrency: :class:`.AdaptiveLimiter` | None
+    :param concurrency:
+        Limiter controlling how many requests bulk operations (such as :meth:`cancel_many`) run
+        simultaneously.
+
+    :type interner: :class:`.Interner` | None
+    :param interner:
+        When given, repeated values (such as ``.travis.yml`` configs and states) are shared among
+        loaded entities to save memory. It may be shared among many instances.
+
+    :type timeout: float | tuple(float, float) | None
+    :param timeout:
+        Connect and read timeouts, in seconds, of every request. See also :meth:`deadline`.
+
+    :type hedge: :class:`.HedgePolicy` | None
+    :param hedge:
+        When given, ``GET`` requests slower than most recent ones to the same endpoint are sent
+        again and the first response is used. See :mod:`travispy.hedging`.
+
+    :type max_workers: int | None
+    :param max_workers:
+        Maximum number of threads used by :meth:`map` and ``submit_*`` methods. Default is
+        :attr:`.AdaptiveLimiter.maximum` of ``concurrency``.
+
+    Instances using :meth:`map` or ``submit_*`` methods should be closed (or used as context
+    managers) to stop their threads.
+
     .. note::
         Do not confuse ``token`` with the one found on your profile page.
     '''
@@ -50,14 +100,31 @@ class TravisPy:
         'Accept': 'application/vnd.travis-ci.2+json',
     }
 
-    def __init__(self, token=None, uri=PUBLIC):
-        self._session = session = Session(uri)
+    def __init__(
+            self,
+            token=None,
+            uri=PUBLIC,
+            instrumentation=None,
+            interner=None,
+            transport=None,
+            retry=None,
+            rate_limiter=None,
+            concurrency=None,
+            timeout=DEFAULT_TIMEOUT,
+            hedge=None,
+            max_workers=None):
+        self._session = session = Session(
+            uri, instrumentation, interner, transport, retry, rate_limiter, concurrency, timeout,
+            hedge)
+        self._max_workers = max_workers if max_workers is not None else session.concurrency.maximum
+        self._executor = None
+        self._executor_lock = threading.Lock()
         session.headers.update(self._HEADERS)
         if token is not None:
             session.headers['Authorization'] = 'token %s' % token
 
     @classmethod
-    def github_auth(cls, token, uri=PUBLIC):
+    def github_auth(cls, token, uri=PUBLIC, **kwargs):
         '''
         :param str token:
             GitHub access token.
@@ -65,18 +132,159 @@ class TravisPy:
         :param uri:
             See :meth:`__init__`
 
+        :param kwargs:
+            Other arguments accepted by :meth:`__init__`.
+
         :rtype: :class:`.TravisPy`
         :returns:
             A :class:`.TravisPy` instance authenticated with GitHub account.
 
         :raises TravisError: when authentication against GitHub fails.
         '''
-        response = requests.post(uri + '/auth/github', headers=cls._HEADERS, params={
+        result = cls(None, uri, **kwargs)
+        session = result._session
+        response = session.post(uri + '/auth/github', params={
             "github_token": token,
         })
         contents = get_response_contents(response)
-        access_token = contents['access_token']
-        return TravisPy(access_token, uri)
+        session.headers['Authorization'] = 'token %s' % contents['access_token']
+        return result
+
+    @property
+    def instrumentation(self):
+        '''
+        :rtype: :class:`.Instrumentation`
+        :returns:
+            Instrumentation where callbacks may be registered.
+        '''
+        return self._session.instrumentation
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        '''
+        Waits for tasks submitted through :meth:`map` and ``submit_*`` methods, stops their threads
+        and closes the session. Connections are kept in the shared :class:`.TransportPool`.
+        '''
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self._session.close()
+
+    @property
+    def executor(self):
+        '''
+        :rtype: :class:`concurrent.futures.ThreadPoolExecutor`
+        :returns:
+            Executor running :meth:`map` and ``submit_*`` calls, created on first use.
+        '''
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+            return self._executor
+
+    def submit(self, function, *args, **kwargs):
+        '''
+        Schedules ``function(*args, **kwargs)`` on :attr:`executor`. It runs under the
+        :meth:`deadline` active when it is submitted, if any.
+
+        :rtype: :class:`concurrent.futures.Future`
+        '''
+        return self.executor.submit(self._session.propagate(function), *args, **kwargs)
+
+    def map(self, function, items, max_workers=None):
+        '''
+        Calls ``function`` for each item concurrently::
+
+            >>> builds = travis.map(travis.build, build_ids)
+
+        :param callable function:
+            Function receiving one item.
+
+        :param iterable items:
+            Items to be processed.
+
+        :type max_workers: int | None
+        :param max_workers:
+            Maximum number of simultaneous calls. When not given it follows the
+            :class:`.AdaptiveLimiter` of this instance.
+
+        :rtype: list
+        :returns:
+            Results in the same order as ``items``.
+
+        :raises Exception: the first error (following ``items`` order) raised by ``function``,
+            after all calls are finished.
+
+        .. warning::
+            Must not be called from a function running on :attr:`executor`.
+        '''
+        session = self._session
+        limiter = session.concurrency if max_workers is None else threading.Semaphore(max_workers)
+        return bulk_map(session.propagate(function), items, limiter, self.executor)
+
+    def submit_build(self, build_id):
+        '''
+        :rtype: :class:`concurrent.futures.Future`
+        :returns:
+            Future of :meth:`build`.
+        '''
+        return self.submit(self.build, build_id)
+
+    def submit_job(self, job_id):
+        '''
+        :rtype: :class:`concurrent.futures.Future`
+        :returns:
+            Future of :meth:`job`.
+        '''
+        return self.submit(self.job, job_id)
+
+    def submit_log(self, log_id):
+        '''
+        :rtype: :class:`concurrent.futures.Future`
+        :returns:
+            Future of :meth:`log`.
+        '''
+        return self.submit(self.log, log_id)
+
+    def submit_repo(self, id_or_slug):
+        '''
+        :rtype: :class:`concurrent.futures.Future`
+        :returns:
+            Future of :meth:`repo`.
+        '''
+        return self.submit(self.repo, id_or_slug)
+
+    def deadline(self, seconds):
+        '''
+        Limits the time spent by everything done inside the returned context manager::
+
+            >>> with travis.deadline(5.0):
+            ...     builds = travis.builds(slug='travispy/travispy')
+
+        :param float seconds:
+            Time budget.
+
+        :raises DeadlineExceeded: when the budget is exhausted.
+
+        .. seealso:: :meth:`.Session.deadline`
+        '''
+        return self._session.deadline(seconds)
+
+    def stats(self):
+        '''
+        :rtype: dict
+        :returns:
+            Information of all requests performed so far, grouped by endpoint.
+
+        .. seealso:: :meth:`.Instrumentation.stats`
+        '''
+        return self._session.instrumentation.stats()
 
     def accounts(self, all=False):
         '''
@@ -173,6 +381,26 @@ class TravisPy:
         '''
         return Build.find_many(self._session, **kwargs)
 
+    def iter_builds(self, **kwargs):
+        '''
+        Same as :meth:`builds`, but all pages of builds are fetched (newest first), following
+        ``after_number``::
+
+            >>> for build in travis.iter_builds(slug='jayvdb/travispy'):
+            ...     if build.number == '100':
+            ...         break  # Older pages are not fetched.
+
+        :rtype: iterable(:class:`.Build`)
+        '''
+        while True:
+            builds = Build.find_many(self._session, **kwargs)
+            for build in builds:
+                yield build
+            if not builds or 'ids' in kwargs or 'number' in kwargs:
+                return
+
+            kwargs['after_number'] = builds[-1].number
+
     def build(self, build_id):
         '''
         :param int build_id:
@@ -182,6 +410,40 @@ class TravisPy:
         '''
         return Build.find_one(self._session, build_id)
 
+    def cancel_many(self, entities):
+        '''
+        Cancels many builds or jobs concurrently.
+
+        :param list(:class:`.Restartable`) entities:
+            Builds or jobs to be canceled.
+
+        :rtype: list(bool)
+        :returns:
+            Result of :meth:`.Restartable.cancel` for each entity.
+
+        .. seealso:: :mod:`travispy.concurrency`
+        '''
+        session = self._session
+        return bulk_map(
+            session.propagate(lambda entity: entity.cancel()), entities, session.concurrency)
+
+    def restart_many(self, entities):
+        '''
+        Restarts many builds or jobs concurrently.
+
+        :param list(:class:`.Restartable`) entities:
+            Builds or jobs to be restarted.
+
+        :rtype: list(bool)
+        :returns:
+            Result of :meth:`.Restartable.restart` for each entity.
+
+        .. seealso:: :mod:`travispy.concurrency`
+        '''
+        session = self._session
+        return bulk_map(
+            session.propagate(lambda entity: entity.restart()), entities, session.concurrency)
+
     def hooks(self):
         '''
         :rtype: list(:class:`.Hook`)
@@ -213,6 +475,16 @@ class TravisPy:
         '''
         return Job.find_many(self._session, **kwargs)
 
+    def iter_jobs(self, **kwargs):
+        '''
+        Same as :meth:`jobs`, but jobs are generated as the response arrives.
+
+        :rtype: iterable(:class:`.Job`)
+
+        .. seealso:: :meth:`.Entity.iter_many`
+        '''
+        return Job.iter_many(self._session, **kwargs)
+
     def job(self, job_id):
         '''
         :param int job_id:
@@ -222,6 +494,114 @@ class TravisPy:
         '''
         return Job.find_one(self._session, job_id)
 
+    def search_logs(self, jobs, pattern, concurrency=None, max_count=None, processes=None):
+        '''
+        Searches logs of many jobs concurrently, matching them as they are downloaded::
+
+            >>> for match in travis.search_logs(travis.jobs(state='failed'), br'Killed'):
+            ...     print(match.job_id, match.line)
+
+        :type jobs: iterable(:class:`.Job` | int)
+        :param jobs:
+            Jobs (or their ids) whose logs must be searched.
+
+        :type pattern: bytes | str | compiled pattern
+        :param pattern:
+            Regular expression matched against each line.
+
+        :type concurrency: int | None
+        :param concurrency:
+            Number of logs downloaded simultaneously.
+
+        :type max_count: int | None
+        :param max_count:
+            Stop downloading a log after this number of matching lines.
+
+        :type processes: int | None
+        :param processes:
+            When given, lines are matched by a pool of this number of processes.
+
+        :rtype: iterable(:class:`.Match`)
+
+        .. seealso:: :mod:`travispy.logsearch`
+        '''
+        from .logsearch import search
+        return search(self._session, jobs, pattern, concurrency, max_count, processes)
+
+    def cluster_failures(self, jobs, concurrency=None, **kwargs):
+        '''
+        Groups failed jobs whose logs end with similar errors::
+
+            >>> for cluster in travis.cluster_failures(travis.jobs(state='failed')):
+            ...     print(cluster.count, cluster.keys[:5])
+
+        Logs are downloaded concurrently; only their last lines are kept.
+
+        :type jobs: iterable(:class:`.Job` | int)
+        :param jobs:
+            Jobs (or their ids) whose logs must be compared.
+
+        :type concurrency: int | None
+        :param concurrency:
+            Number of logs downloaded simultaneously. See :meth:`map`.
+
+        :param kwargs:
+            Arguments of :class:`.FailureClusterer`.
+
+        :rtype: list(:class:`.Cluster`)
+        :returns:
+            Clusters of job ids, biggest first.
+
+        .. seealso:: :mod:`travispy.failures`
+        '''
+        from .failures import FailureClusterer
+        clusterer = FailureClusterer(**kwargs)
+        session = self._session
+
+        def fingerprint(job_id):
+            log = Log(session)
+            log.job_id = job_id
+            return clusterer.fingerprint(iter_lines(log.iter_archived_log()))
+
+        job_ids = [getattr(job, 'id', job) for job in jobs]
+        for job_id, result in zip(job_ids, self.map(fingerprint, job_ids, concurrency)):
+            clusterer.add_fingerprint(job_id, *result)
+        return clusterer.clusters()
+
+    def test_results(self, jobs, concurrency=None):
+        '''
+        Extracts summaries of test runs from logs of many jobs::
+
+            >>> results = travis.test_results(build.jobs)
+            >>> failed = [r for job_results in results.values() for r in job_results if r.failed]
+
+        Logs are downloaded concurrently and parsed as they arrive.
+
+        :type jobs: iterable(:class:`.Job` | int)
+        :param jobs:
+            Jobs (or their ids) whose logs must be parsed.
+
+        :type concurrency: int | None
+        :param concurrency:
+            Number of logs downloaded simultaneously. See :meth:`map`.
+
+        :rtype: dict(int, list(:class:`.TestResult`))
+        :returns:
+            Results of test runners found in log of each job id.
+
+        .. seealso:: :mod:`travispy.testresults`
+        '''
+        from .testresults import extract
+        session = self._session
+
+        def results(job_id):
+            log = Log(session)
+            log.job_id = job_id
+            return extract(log.iter_archived_log())
+
+        job_ids = [getattr(job, 'id', job) for job in jobs]
+        return dict(zip(job_ids, self.map(results, job_ids, concurrency)))
+
     def log(self, log_id):
         '''
         :param int log_id:
@@ -258,6 +638,16 @@ class TravisPy:
         '''
         return Repo.find_many(self._session, **kwargs)
 
+    def iter_repos(self, **kwargs):
+        '''
+        Same as :meth:`repos`, but repositories are generated as the response arrives.
+
+        :rtype: iterable(:class:`.Repo`)
+
+        .. seealso:: :meth:`.Entity.iter_many`
+        '''
+        return Repo.iter_many(self._session, **kwargs)
+
     def repo(self, id_or_slug):
         '''
         :type id_or_slug: int | str